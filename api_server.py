@@ -0,0 +1,551 @@
+"""
+OrbitalGuard - 本地 HTTP/JSON 查询服务 (Async Paginated API)
+============================================================
+功能：
+1. 基于 asyncio 的本地 HTTP/1.1 服务（仅标准库，支持 keep-alive），只读访问 orbitalguard.db
+2. 游标 (keyset) 分页：下一页条件为 "排序键 > 上一页最后一行的键"，翻到多深都只读取一页数据，
+   不使用 OFFSET（OFFSET 需要先扫描并丢弃前面所有行）
+3. SQLite 读取放在有界线程池中执行，每个线程一个只读连接；排队请求超过上限时直接返回 503
+4. 服务端过滤：风险等级、norad_id（任一物体）、高度分档（与 Query 1.3 相同的 mean_motion 分档；
+   两个物体按各自最新历元的 mean_motion 都须落在该分档内）
+5. 客户端声明 Accept-Encoding: gzip 时压缩响应，分块 (chunked) 流式写出
+6. 内置负载生成器：多个并发客户端沿游标翻页，统计吞吐量与延迟分位数
+
+接口：
+    GET /health
+    GET /conjunctions        Conjunctions 表 (collision_probability.py)，按 risk_rank
+    GET /conjunction-events  ConjunctionEvents 表 (conjunction_screening.py)，按 event_id
+    GET /collision-risks     与 v_collision_risks 视图相同的行，按 (object1_id, object2_id, orbit1_id, orbit2_id)
+
+查询参数：limit, cursor, risk_level (可逗号分隔多个), norad_id (任一物体),
+          altitude_band (分档名称或下标；object1 与 object2 的最新根数都须在该分档内)
+
+用法：
+    python api_server.py serve --port 8765 --workers 4
+    curl -s --compressed "http://127.0.0.1:8765/conjunctions?risk_level=HIGH,CRITICAL&limit=50"
+    python api_server.py loadgen --port 8765 --clients 32 --seconds 10
+    python api_server.py selftest                           # 同进程启动服务并压测
+"""
+
+import sqlite3
+import argparse
+import asyncio
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from create_database import DB_NAME, print_header
+from snapshot import ALTITUDE_BANDS, file_identity
+
+# ============================================================
+# 配置
+# ============================================================
+
+HOST = '127.0.0.1'
+PORT = 8765
+READ_WORKERS = 4
+# 等待线程池的请求上限（含正在执行的），超过后返回 503
+MAX_PENDING = 64
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 5000
+# 每个分块序列化的行数
+STREAM_BATCH = 500
+GZIP_LEVEL = 5
+MAX_HEADER_BYTES = 16384
+KEEPALIVE_TIMEOUT = 30
+
+LOADGEN_CLIENTS = 16
+LOADGEN_SECONDS = 5
+LOADGEN_PAGE_LIMIT = 200
+
+# v_collision_risks 按 Orbits 逐行连接，同一物体对会因多条历元出现多行；
+# 这里与视图相同的条件，额外带出两条根数的 orbit_id，排序键才唯一，游标翻页不会跳过同一对的后续行
+COLLISION_RISKS_SOURCE = """(
+    SELECT s1.norad_id AS object1_id, s1.object_name AS object1_name,
+           s2.norad_id AS object2_id, s2.object_name AS object2_name,
+           o1.orbit_id AS orbit1_id, o2.orbit_id AS orbit2_id,
+           ROUND(ABS(o1.mean_motion - o2.mean_motion) * 7.91, 2) AS relative_velocity_km_s,
+           ROUND(ABS(o1.inclination_deg - o2.inclination_deg), 2) AS inclination_diff_deg,
+           CASE
+               WHEN ROUND(ABS(o1.mean_motion - o2.mean_motion) * 7.91, 2) > 15 THEN 'CRITICAL'
+               WHEN ROUND(ABS(o1.mean_motion - o2.mean_motion) * 7.91, 2) > 10 THEN 'HIGH'
+               WHEN ROUND(ABS(o1.mean_motion - o2.mean_motion) * 7.91, 2) > 5 THEN 'MEDIUM'
+               ELSE 'LOW'
+           END AS risk_level
+    FROM Orbits o1
+    INNER JOIN Orbits o2 ON o1.norad_id < o2.norad_id
+    INNER JOIN SpaceObjects s1 ON o1.norad_id = s1.norad_id
+    INNER JOIN SpaceObjects s2 ON o2.norad_id = s2.norad_id
+    WHERE s1.decay_date IS NULL AND s2.decay_date IS NULL
+      AND ABS(o1.inclination_deg - o2.inclination_deg) < 5.0
+      AND ABS(o1.mean_motion - o2.mean_motion) * 7.91 > 5
+)"""
+
+# 资源定义：from 子句、输出列、排序键（唯一）、过滤列
+RESOURCES = {
+    '/conjunctions': {
+        'source': 'Conjunctions',
+        'columns': ('risk_rank', 'object1_id', 'object2_id', 'tca', 'miss_distance_km',
+                    'relative_velocity_km_s', 'hbr_m', 'pc', 'risk_level'),
+        'key': ('risk_rank',),
+    },
+    '/conjunction-events': {
+        'source': 'ConjunctionEvents',
+        'columns': ('event_id', 'object1_id', 'object2_id', 'tca', 'miss_distance_km',
+                    'relative_velocity_km_s', 'hbr_m', 'pc', 'risk_level'),
+        'key': ('event_id',),
+    },
+    '/collision-risks': {
+        'source': COLLISION_RISKS_SOURCE,
+        'columns': ('object1_id', 'object1_name', 'object2_id', 'object2_name', 'orbit1_id', 'orbit2_id',
+                    'relative_velocity_km_s', 'inclination_diff_deg', 'risk_level'),
+        'key': ('object1_id', 'object2_id', 'orbit1_id', 'orbit2_id'),
+    },
+}
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+# ============================================================
+# 1. 查询构造（游标分页 + 过滤）
+# ============================================================
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, n_keys):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, json.JSONDecodeError):
+        raise ApiError(400, "cursor 无效")
+    if not isinstance(values, list) or len(values) != n_keys:
+        raise ApiError(400, "cursor 与资源排序键不匹配")
+    # bool 是 int 的子类，同样拒绝；其余类型 (dict / list / null) 无法绑定为 SQL 参数
+    if not all(isinstance(v, (int, float, str)) and not isinstance(v, bool) for v in values):
+        raise ApiError(400, "cursor 无效")
+    return values
+
+def band_range(band):
+    """高度分档名称或下标 → mean_motion 区间 (low, high]"""
+    labels = [label for _, label in ALTITUDE_BANDS]
+    if band.isdigit() and int(band) < len(ALTITUDE_BANDS):
+        index = int(band)
+    elif band in labels:
+        index = labels.index(band)
+    else:
+        raise ApiError(400, f"未知高度分档: {band}（可选: {', '.join(labels)} 或下标）")
+    high = ALTITUDE_BANDS[index - 1][0] if index > 0 else None
+    return ALTITUDE_BANDS[index][0], high
+
+def _single(params, name):
+    values = params.get(name)
+    return values[-1] if values else None
+
+def build_query(resource, params):
+    """根据请求参数生成 (sql, args, limit)"""
+    spec = RESOURCES[resource]
+    key = spec['key']
+    where, args = [], []
+
+    limit_text = _single(params, 'limit')
+    try:
+        limit = DEFAULT_LIMIT if limit_text is None else int(limit_text)
+    except ValueError:
+        raise ApiError(400, "limit 必须为整数")
+    limit = min(max(limit, 1), MAX_LIMIT)
+
+    cursor = _single(params, 'cursor')
+    if cursor:
+        values = decode_cursor(cursor, len(key))
+        # 行值比较：(a, b) > (?, ?)，可直接利用排序键上的索引定位
+        where.append(f"({', '.join(key)}) > ({', '.join('?' * len(key))})")
+        args.extend(values)
+
+    levels = _single(params, 'risk_level')
+    if levels:
+        levels = [v.strip().upper() for v in levels.split(',') if v.strip()]
+        where.append(f"risk_level IN ({', '.join('?' * len(levels))})")
+        args.extend(levels)
+
+    norad = _single(params, 'norad_id')
+    if norad:
+        try:
+            norad = int(norad)
+        except ValueError:
+            raise ApiError(400, "norad_id 必须为整数")
+        where.append("(object1_id = ? OR object2_id = ?)")
+        args.extend([norad, norad])
+
+    band = _single(params, 'altitude_band')
+    if band:
+        # 两个物体都须落在该分档内，各自只看最新历元的根数（与 om.load_elements 一致），
+        # 历史 Orbits 记录不参与判断
+        low, high = band_range(band)
+        for column in ('object1_id', 'object2_id'):
+            clause = (f"EXISTS (SELECT 1 FROM Orbits o WHERE o.norad_id = {column}"
+                      f" AND o.epoch = (SELECT MAX(epoch) FROM Orbits WHERE norad_id = {column})"
+                      " AND o.mean_motion > ?")
+            args.append(low)
+            if high is not None:
+                clause += " AND o.mean_motion <= ?"
+                args.append(high)
+            where.append(clause + ")")
+
+    sql = f"SELECT {', '.join(spec['columns'])} FROM {spec['source']}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {', '.join(key)} LIMIT ?"
+    args.append(limit)
+    return sql, args, limit
+
+# ============================================================
+# 2. 有界线程池中的只读连接
+# ============================================================
+
+class ReadPool:
+    """固定线程数的读取池；每个线程持有自己的只读连接
+
+    数据库被重新构建（原子替换文件）后，各线程在下次查询时重新打开连接。
+    """
+
+    def __init__(self, db_path, workers=READ_WORKERS, max_pending=MAX_PENDING):
+        self.db_path = db_path
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='og-read')
+        self.max_pending = max_pending
+        self.pending = 0
+        self._local = threading.local()
+
+    def _connection(self):
+        identity = file_identity(self.db_path)
+        local = self._local
+        if getattr(local, 'identity', None) != identity:
+            if getattr(local, 'conn', None) is not None:
+                local.conn.close()
+            local.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            local.identity = identity
+        return local.conn
+
+    def _fetch(self, sql, args):
+        try:
+            return self._connection().execute(sql, args).fetchall()
+        except sqlite3.OperationalError as e:
+            if 'no such table' in str(e):
+                raise ApiError(404, f"数据源不存在: {e}")
+            raise
+
+    async def fetch(self, sql, args):
+        if self.pending >= self.max_pending:
+            raise ApiError(503, "服务繁忙，请稍后重试")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._fetch, sql, args)
+        finally:
+            self.pending -= 1
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+# ============================================================
+# 3. HTTP 服务
+# ============================================================
+
+class ApiServer:
+    def __init__(self, db_path=DB_NAME, workers=READ_WORKERS):
+        self.pool = ReadPool(db_path, workers)
+        self.requests = 0
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send_error(writer, 400, "请求头过长", False)
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self._send_error(writer, 400, "请求行格式错误", False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version.upper() == 'HTTP/1.1')
+                gzip_ok = 'gzip' in headers.get('accept-encoding', '')
+                self.requests += 1
+                try:
+                    if method != 'GET':
+                        raise ApiError(405, "只支持 GET")
+                    await self._dispatch(writer, target, gzip_ok, keep_alive)
+                except ApiError as e:
+                    await self._send_error(writer, e.status, e.message, keep_alive)
+                except Exception as e:
+                    await self._send_error(writer, 500, f"{type(e).__name__}: {e}", keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def _dispatch(self, writer, target, gzip_ok, keep_alive):
+        url = urlsplit(target)
+        if url.path == '/health':
+            body = json.dumps({'status': 'ok', 'pending': self.pool.pending,
+                               'requests': self.requests}).encode()
+            await self._send(writer, 200, [body], False, keep_alive)
+            return
+        if url.path not in RESOURCES:
+            raise ApiError(404, f"未知接口: {url.path}（可选: {', '.join(RESOURCES)}）")
+
+        spec = RESOURCES[url.path]
+        sql, args, limit = build_query(url.path, parse_qs(url.query))
+        rows = await self.pool.fetch(sql, args)
+
+        # 满页才给出下一页游标；不足一页说明已到末尾
+        next_cursor = None
+        if len(rows) == limit:
+            positions = [spec['columns'].index(k) for k in spec['key']]
+            next_cursor = encode_cursor(rows[-1][p] for p in positions)
+        await self._send(writer, 200, self._page_chunks(spec['columns'], rows, next_cursor),
+                         gzip_ok, keep_alive)
+
+    @staticmethod
+    def _page_chunks(columns, rows, next_cursor):
+        """按 STREAM_BATCH 行一段生成 JSON 文本，避免整页拼成一个大字符串"""
+        yield b'{"items":['
+        for start in range(0, len(rows), STREAM_BATCH):
+            batch = rows[start:start + STREAM_BATCH]
+            text = ','.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) for row in batch)
+            yield (',' if start else '').encode() + text.encode()
+        tail = {'count': len(rows), 'next_cursor': next_cursor}
+        yield b'],' + json.dumps(tail)[1:].encode()
+
+    async def _send(self, writer, status, chunks, gzip_ok, keep_alive):
+        head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+                "Content-Type: application/json; charset=utf-8",
+                "Transfer-Encoding: chunked",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if gzip_ok:
+            head.append("Content-Encoding: gzip")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode())
+
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if gzip_ok else None
+        for chunk in chunks:
+            data = compressor.compress(chunk) if compressor else chunk
+            if data:
+                writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+                await writer.drain()
+        if compressor:
+            data = compressor.flush()
+            writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def _send_error(self, writer, status, message, keep_alive):
+        body = json.dumps({'error': message, 'status': status}, ensure_ascii=False).encode()
+        try:
+            await self._send(writer, status, [body], False, keep_alive)
+        except ConnectionError:
+            pass
+
+    async def start(self, host=HOST, port=PORT):
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+
+    def close(self):
+        self.pool.close()
+
+# ============================================================
+# 4. 负载生成器
+# ============================================================
+
+class HttpClient:
+    """最小 keep-alive HTTP/1.1 客户端（支持 chunked 与 gzip）"""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def get(self, target):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"GET {target} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Accept-Encoding: gzip\r\n\r\n".encode())
+        await self.writer.drain()
+
+        head = (await self.reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        status = int(head[0].split(' ')[1])
+        headers = {k.strip().lower(): v.strip() for k, v in
+                   (line.split(':', 1) for line in head[1:] if ':' in line)}
+        body = bytearray()
+        while True:
+            size = int((await self.reader.readuntil(b'\r\n')).strip(), 16)
+            if size == 0:
+                await self.reader.readexactly(2)
+                break
+            body += await self.reader.readexactly(size)
+            await self.reader.readexactly(2)
+        wire_bytes = len(body)
+        if headers.get('content-encoding') == 'gzip':
+            body = gzip.decompress(bytes(body))
+        if headers.get('connection') == 'close':
+            await self.close()
+        return status, json.loads(body), wire_bytes, len(body)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+            self.reader = self.writer = None
+
+def _loadgen_targets():
+    """各客户端轮流使用的首页请求（不同资源与过滤组合）"""
+    base = f"limit={LOADGEN_PAGE_LIMIT}"
+    return [
+        f"/conjunctions?{base}",
+        f"/conjunctions?{base}&risk_level=HIGH,CRITICAL,MEDIUM",
+        f"/conjunction-events?{base}",
+        f"/conjunction-events?{base}&altitude_band=0",
+        f"/collision-risks?{base}",
+        f"/collision-risks?{base}&risk_level=HIGH",
+    ]
+
+async def run_loadgen(host=HOST, port=PORT, clients=LOADGEN_CLIENTS, seconds=LOADGEN_SECONDS):
+    """每个客户端沿游标翻页直到末尾，再换下一个首页请求，持续 seconds 秒"""
+    print_header(f"负载生成: {clients} 个并发客户端, {seconds:g} 秒 → {host}:{port}")
+    targets = _loadgen_targets()
+    latencies, statuses = [], {}
+    totals = {'rows': 0, 'wire': 0, 'raw': 0, 'walks': 0}
+    deadline = time.perf_counter() + seconds
+
+    async def client(index):
+        http = HttpClient(host, port)
+        k = index
+        try:
+            while time.perf_counter() < deadline:
+                first = targets[k % len(targets)]
+                k += 1
+                target = first
+                while time.perf_counter() < deadline:
+                    t = time.perf_counter()
+                    status, body, wire, raw = await http.get(target)
+                    latencies.append(time.perf_counter() - t)
+                    statuses[status] = statuses.get(status, 0) + 1
+                    totals['wire'] += wire
+                    totals['raw'] += raw
+                    if status != 200:
+                        break
+                    totals['rows'] += body['count']
+                    if not body['next_cursor']:
+                        totals['walks'] += 1
+                        break
+                    target = f"{first}&cursor={body['next_cursor']}"
+        finally:
+            await http.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    if not latencies:
+        print("❌ 没有完成任何请求")
+        return
+    lat = np.array(latencies) * 1000
+    print(f"   请求数:   {len(lat):,} ({len(lat) / elapsed:,.0f} req/s)")
+    print(f"   状态码:   {', '.join(f'{k}×{v:,}' for k, v in sorted(statuses.items()))}")
+    print(f"   返回行数: {totals['rows']:,} ({totals['rows'] / elapsed:,.0f} rows/s), "
+          f"完整翻页 {totals['walks']:,} 次")
+    print(f"   延迟 (ms): p50 {np.percentile(lat, 50):.2f}  p95 {np.percentile(lat, 95):.2f}  "
+          f"p99 {np.percentile(lat, 99):.2f}  max {lat.max():.2f}")
+    if totals['raw']:
+        print(f"   传输量:   {totals['wire'] / 1e6:.2f} MB (未压缩 {totals['raw'] / 1e6:.2f} MB, "
+              f"压缩比 {totals['raw'] / max(totals['wire'], 1):.1f}×)")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+async def serve(db_path, host, port, workers):
+    server = ApiServer(db_path, workers)
+    listener = await server.start(host, port)
+    print(f"✅ 监听 http://{host}:{port} (读取线程 {workers}, 排队上限 {MAX_PENDING})")
+    print(f"   接口: /health {' '.join(RESOURCES)}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+async def selftest(db_path, workers, clients, seconds):
+    server = ApiServer(db_path, workers)
+    listener = await server.start(HOST, 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        http = HttpClient(HOST, port)
+        print_header("接口检查")
+        for target in ['/health'] + [f"{path}?limit=3" for path in RESOURCES]:
+            status, body, wire, raw = await http.get(target)
+            detail = body.get('error') or f"{body.get('count', '-')} 行, next_cursor={body.get('next_cursor')}"
+            print(f"   {status}  {target:32s} {detail}")
+        await http.close()
+        await run_loadgen(HOST, port, clients, seconds)
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 本地 HTTP/JSON 查询服务")
+    parser.add_argument('command', choices=['serve', 'loadgen', 'selftest'])
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=READ_WORKERS, help="读取线程数")
+    parser.add_argument('--clients', type=int, default=LOADGEN_CLIENTS, help="负载生成并发客户端数")
+    parser.add_argument('--seconds', type=float, default=LOADGEN_SECONDS, help="负载生成持续时间")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 本地 HTTP/JSON 查询服务")
+    print("="*70)
+
+    if args.command != 'loadgen' and not os.path.exists(args.db):
+        print(f"❌ 数据库不存在: {args.db}")
+        return
+    try:
+        if args.command == 'serve':
+            asyncio.run(serve(args.db, args.host, args.port, args.workers))
+        elif args.command == 'loadgen':
+            asyncio.run(run_loadgen(args.host, args.port, args.clients, args.seconds))
+        else:
+            asyncio.run(selftest(args.db, args.workers, args.clients, args.seconds))
+    except KeyboardInterrupt:
+        print("\n👋 已停止")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+OrbitalGuard - 解体碎片云模拟 (NASA Standard Breakup Model)
+==========================================================
+功能：
+1. 以 SpaceObjects / Orbits 中的一个母体 (norad_id) 为对象，模拟爆炸或碰撞解体
+2. 按 NASA 标准解体模型 (SBM 2001) 生成碎片：特征尺寸、面质比、速度增量，全部 NumPy 向量化
+3. 母体在解体时刻的状态叠加速度增量，反算每个碎片的轨道根数
+4. 碎片作为合成目录写入草稿数据库（原库只读），也可只输出高度壳层占用变化
+5. 输出各高度壳层新增碎片数与 v_debris_statistics 对比
+
+模型要点 (Johnson et al., 2001)：
+- 碎片数量：爆炸 N(>Lc) = 6·S·Lc^-1.6；碰撞 N(>Lc) = 0.1·M^0.75·Lc^-1.71
+- 碰撞能量比 EMR ≥ 40 J/g 为灾难性碰撞，M 取两者质量之和；否则 M = m_p·v² (kg, km/s)
+- 面质比 log10(A/M)：Lc > 11 cm 为双峰正态（航天器 / 火箭体参数不同），Lc < 8 cm 为单峰正态，
+  中间区间按尺寸线性过渡
+- 速度增量 log10(Δv)：爆炸均值 0.2χ + 1.85，碰撞均值 0.9χ + 2.9，σ = 0.4，方向各向同性
+
+限制：
+- 不强制质量守恒，碎片总质量仅作参考输出
+- 碎片根数为二体密切根数，与 orbit_math.propagate 的模型一致；近地点低于 REENTRY_PERIGEE_KM
+  或逃逸的碎片视为立即再入/逃逸并剔除
+
+用法：
+    python breakup_simulator.py --norad 25544
+    python breakup_simulator.py --norad 25544 --event collision --impactor-mass 10 --impact-velocity 10
+    python breakup_simulator.py --norad 25544 --count 3000 --no-db   # 只输出壳层占用，不写草稿库
+"""
+
+import sqlite3
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from create_database import DB_NAME, print_header
+from snapshot import ALTITUDE_BANDS, OTHER_BAND, altitude_band_index
+import orbit_math as om
+
+# ============================================================
+# 配置
+# ============================================================
+
+SCRATCH_DB_NAME = "breakup_scratch.db"
+# 合成碎片的 NORAD 编号从此处开始（实际目录尚未使用的区间）
+SYNTHETIC_NORAD_START = 900000
+
+LC_MIN_M = 0.1          # 最小特征尺寸：10 cm，对应编目可跟踪下限
+LC_MAX_M = 1.0          # 最大特征尺寸
+EXPLOSION_SCALE = 1.0   # 爆炸缩放因子 S（火箭体典型值 1.0）
+CATASTROPHIC_EMR_J_PER_G = 40.0
+REENTRY_PERIGEE_KM = 100.0
+
+# 缺少 SatelliteDetails 质量时按 rcs_size 假定母体质量 (kg)
+DEFAULT_MASS_KG = {
+    'LARGE': 1000.0,
+    'MEDIUM': 100.0,
+    'SMALL': 10.0,
+}
+FALLBACK_MASS_KG = 500.0
+
+# B* ≈ ρ0 · Cd · (A/M) / 2，ρ0 = 0.15696615 kg/m²/ER，Cd = 2.2
+BSTAR_PER_AREA_TO_MASS = 0.15696615 * 2.2 / 2
+
+# SATCAT RCS 分档 (m²)
+RCS_SMALL_M2 = 0.1
+RCS_LARGE_M2 = 1.0
+
+# ============================================================
+# 1. 母体
+# ============================================================
+
+def load_parent(conn, norad_id):
+    """读取母体最新根数、类型与质量"""
+    elements = om.load_elements(conn, active_only=False, extra_columns=(
+        'object_name', 'object_type', 'intl_designator', 'country', 'rcs_size'))
+    index = np.flatnonzero(elements['norad_id'] == norad_id)
+    if len(index) == 0:
+        raise ValueError(f"Orbits 中没有 norad_id={norad_id} 的有效根数")
+    parent = om.subset(elements, index)
+
+    row = conn.execute("""
+        SELECT COALESCE(dry_mass_kg, launch_mass_kg) FROM SatelliteDetails WHERE norad_id = ?
+    """, (norad_id,)).fetchone()
+    if row and row[0]:
+        mass = float(row[0])
+    else:
+        mass = DEFAULT_MASS_KG.get(parent['rcs_size'][0], FALLBACK_MASS_KG)
+    return parent, mass
+
+# ============================================================
+# 2. NASA 标准解体模型
+# ============================================================
+
+def fragment_count(event, parent_mass, lc_min, impactor_mass=0.0, impact_velocity=0.0):
+    """特征尺寸 ≥ lc_min 的碎片数"""
+    if event == 'explosion':
+        return int(6.0 * EXPLOSION_SCALE * lc_min ** -1.6)
+
+    emr = 0.5 * impactor_mass * (impact_velocity * 1000.0) ** 2 / (parent_mass * 1000.0)
+    if emr >= CATASTROPHIC_EMR_J_PER_G:
+        mass = parent_mass + impactor_mass
+    else:
+        mass = impactor_mass * impact_velocity ** 2
+    return int(0.1 * mass ** 0.75 * lc_min ** -1.71)
+
+def _ramp(lam, x0, y0, x1, y1):
+    """分段线性函数：x0 以下为 y0，x1 以上为 y1，中间线性"""
+    return np.interp(lam, [x0, x1], [y0, y1])
+
+def sample_sizes(rng, n, event, lc_min=LC_MIN_M, lc_max=LC_MAX_M):
+    """按幂律 N(>Lc) ∝ Lc^-k 在 [lc_min, lc_max] 上逆变换采样"""
+    k = 1.6 if event == 'explosion' else 1.71
+    u = rng.random(n)
+    return lc_min * (1.0 - u * (1.0 - (lc_min / lc_max) ** k)) ** (-1.0 / k)
+
+def sample_area_to_mass(rng, lc, rocket_body):
+    """log10(A/M) 分布采样，返回 A/M (m²/kg)"""
+    lam = np.log10(lc)
+    n = len(lc)
+
+    if rocket_body:
+        alpha = _ramp(lam, -1.4, 1.0, 0.0, 0.5)
+        mu1 = _ramp(lam, -0.5, -0.45, 0.0, -0.9)
+        sigma1 = np.full(n, 0.55)
+        mu2 = np.full(n, -0.9)
+        sigma2 = _ramp(lam, -1.0, 0.28, 0.1, 0.1)
+    else:
+        alpha = _ramp(lam, -1.95, 0.0, 0.55, 1.0)
+        mu1 = _ramp(lam, -1.1, -0.6, 0.0, -0.95)
+        sigma1 = _ramp(lam, -1.3, 0.1, -0.3, 0.3)
+        mu2 = _ramp(lam, -0.7, -1.2, -0.1, -2.0)
+        sigma2 = _ramp(lam, -0.5, 0.5, -0.3, 0.3)
+
+    first = rng.random(n) < alpha
+    z = rng.standard_normal(n)
+    chi_large = np.where(first, mu1 + sigma1 * z, mu2 + sigma2 * z)
+
+    # 小碎片单峰分布（σ 在 λ > -3.5 后线性增长）
+    mu_small = _ramp(lam, -1.75, -0.3, -1.25, -1.0)
+    sigma_small = 0.2 + 0.1333 * np.maximum(lam + 3.5, 0.0)
+    chi_small = mu_small + sigma_small * rng.standard_normal(n)
+
+    # 8-11 cm 之间按尺寸线性过渡
+    weight = np.clip((lc - 0.08) / 0.03, 0.0, 1.0)
+    chi = np.where(rng.random(n) < weight, chi_large, chi_small)
+    return 10.0 ** chi
+
+def characteristic_area(lc):
+    """特征尺寸 (m) → 平均横截面积 (m²)"""
+    return np.where(lc < 0.00167, 0.540424 * lc ** 2, 0.556945 * lc ** 2.0047077)
+
+def sample_delta_v(rng, area_to_mass, event):
+    """速度增量 (km/s)，方向在单位球面上均匀分布"""
+    chi = np.log10(area_to_mass)
+    mu = 0.2 * chi + 1.85 if event == 'explosion' else 0.9 * chi + 2.9
+    dv = 10.0 ** (mu + 0.4 * rng.standard_normal(len(chi))) / 1000.0
+
+    direction = rng.standard_normal((len(chi), 3))
+    direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+    return direction * dv[:, None]
+
+def generate_fragments(parent, parent_mass, t_break, event='explosion', count=None,
+                       lc_min=LC_MIN_M, lc_max=LC_MAX_M, impactor_mass=0.0,
+                       impact_velocity=0.0, seed=None):
+    """生成碎片云
+
+    Args:
+        parent: load_parent() 返回的单元素根数字典
+        t_break: 解体时刻 (UNIX 秒)
+        count: 指定碎片数；None 时按 SBM 数量公式计算
+
+    Returns:
+        碎片根数列数组字典（附带 lc_m、area_m2、mass_kg、area_to_mass、delta_v_km_s），
+        以及剔除的再入/逃逸碎片数
+    """
+    rng = np.random.default_rng(seed)
+    if count is None:
+        count = fragment_count(event, parent_mass, lc_min, impactor_mass, impact_velocity)
+    rocket_body = parent['object_type'][0] == 'ROCKET BODY'
+
+    lc = sample_sizes(rng, count, event, lc_min, lc_max)
+    area_to_mass = sample_area_to_mass(rng, lc, rocket_body)
+    area = characteristic_area(lc)
+    dv = sample_delta_v(rng, area_to_mass, event)
+
+    r, v = om.propagate(parent, t_break)
+    fragments = om.rv_to_elements(np.repeat(r, count, axis=0), v + dv, t_break)
+    fragments['bstar'] = BSTAR_PER_AREA_TO_MASS * area_to_mass
+    fragments.update({
+        'lc_m': lc,
+        'area_m2': area,
+        'mass_kg': area / area_to_mass,
+        'area_to_mass': area_to_mass,
+        'delta_v_km_s': np.linalg.norm(dv, axis=1),
+    })
+
+    bound = fragments['eccentricity'] < 1.0
+    with np.errstate(invalid='ignore'):
+        perigee, _ = om.perigee_apogee_altitude(fragments)
+    keep = bound & (perigee > REENTRY_PERIGEE_KM)
+    return om.subset(fragments, keep), int(count - keep.sum())
+
+# ============================================================
+# 3. 写入草稿数据库
+# ============================================================
+
+def rcs_size_class(area):
+    return np.where(area < RCS_SMALL_M2, 'SMALL', np.where(area > RCS_LARGE_M2, 'LARGE', 'MEDIUM'))
+
+def create_scratch_db(source_path=DB_NAME, scratch_path=SCRATCH_DB_NAME):
+    """用 backup API 复制整库（含视图与索引）到草稿库"""
+    if os.path.exists(scratch_path):
+        os.remove(scratch_path)
+    src = sqlite3.connect(source_path)
+    scratch = sqlite3.connect(scratch_path)
+    try:
+        src.backup(scratch)
+    finally:
+        src.close()
+    return scratch
+
+def inject_fragments(conn, parent, fragments):
+    """碎片作为 DEBRIS 写入 SpaceObjects + Orbits，返回分配的 NORAD 编号"""
+    max_id = conn.execute("SELECT MAX(norad_id) FROM SpaceObjects").fetchone()[0] or 0
+    first = max(SYNTHETIC_NORAD_START, max_id + 1)
+    norad_ids = np.arange(first, first + len(fragments['epoch']))
+
+    epoch = om.unix_to_iso(fragments['epoch'][0])
+    name = f"{parent['object_name'][0]} DEB (SIM)"
+    rcs = rcs_size_class(fragments['area_m2'])
+
+    conn.executemany("""
+        INSERT INTO SpaceObjects (norad_id, object_name, intl_designator, object_type,
+                                  country, launch_date, decay_date, rcs_size)
+        VALUES (?, ?, ?, 'DEBRIS', ?, ?, NULL, ?)
+    """, [(int(n), name, parent['intl_designator'][0], parent['country'][0], epoch[:10], r)
+          for n, r in zip(norad_ids, rcs)])
+
+    columns = ['epoch'] + om.ELEMENT_COLUMNS
+    values = np.column_stack([fragments[c] for c in om.ELEMENT_COLUMNS])
+    conn.executemany(f"""
+        INSERT INTO Orbits (norad_id, {', '.join(columns)})
+        VALUES (?, ?, {', '.join('?' * len(om.ELEMENT_COLUMNS))})
+    """, [(int(n), epoch, *map(float, row)) for n, row in zip(norad_ids, values)])
+    conn.commit()
+    return norad_ids
+
+# ============================================================
+# 4. 壳层占用分析
+# ============================================================
+
+def shell_occupancy(before, fragments):
+    """在轨目录 + 碎片按 ALTITUDE_BANDS 分档计数"""
+    n_bands = len(ALTITUDE_BANDS) + 1
+    base = np.bincount(altitude_band_index(before['mean_motion']), minlength=n_bands)
+    added = np.bincount(altitude_band_index(fragments['mean_motion']), minlength=n_bands)
+    labels = [label for _, label in ALTITUDE_BANDS] + [OTHER_BAND]
+    return pd.DataFrame({'altitude_range': labels, 'before': base,
+                         'added': added, 'after': base + added})
+
+def print_occupancy(table):
+    print(f"   {'高度壳层':16s} {'解体前':>8s} {'新增':>8s} {'解体后':>8s} {'增幅':>8s}")
+    for row in table.itertuples():
+        if row.after == 0:
+            continue
+        growth = f"{row.added * 100.0 / row.before:.1f}%" if row.before else "new"
+        print(f"   {row.altitude_range:16s} {row.before:8,d} {row.added:8,d} {row.after:8,d} {growth:>8s}")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 解体碎片云模拟")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--norad', type=int, required=True, help="母体 NORAD 编号")
+    parser.add_argument('--event', choices=['explosion', 'collision'], default='explosion')
+    parser.add_argument('--impactor-mass', type=float, default=10.0, help="撞击体质量 (kg)")
+    parser.add_argument('--impact-velocity', type=float, default=10.0, help="撞击速度 (km/s)")
+    parser.add_argument('--count', type=int, help="指定碎片数（默认按 SBM 公式）")
+    parser.add_argument('--lc-min', type=float, default=LC_MIN_M, help="最小特征尺寸 (m)")
+    parser.add_argument('--at', type=float, help="解体时刻 (UNIX 秒，默认母体历元)")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--scratch', default=SCRATCH_DB_NAME, help="草稿数据库路径")
+    parser.add_argument('--no-db', action='store_true', help="不写草稿库，只输出壳层占用")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 解体碎片云模拟")
+    print("="*70)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        parent, mass = load_parent(conn, args.norad)
+        before = om.load_elements(conn)
+    finally:
+        conn.close()
+
+    perigee, apogee = om.perigee_apogee_altitude(parent)
+    t_break = args.at if args.at is not None else float(parent['epoch'][0])
+    print(f"📊 母体: {parent['object_name'][0]} ({parent['object_type'][0]}), "
+          f"{mass:,.0f} kg, {perigee[0]:.0f} × {apogee[0]:.0f} km, i={parent['inclination_deg'][0]:.1f}°")
+    print(f"🕒 解体时刻: {om.unix_to_iso(t_break)[:19]}  事件: {args.event}")
+
+    print_header("生成碎片")
+    start = time.perf_counter()
+    fragments, dropped = generate_fragments(
+        parent, mass, t_break, args.event, args.count, args.lc_min,
+        impactor_mass=args.impactor_mass, impact_velocity=args.impact_velocity, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    n = len(fragments['epoch'])
+    print(f"✅ 碎片: {n + dropped:,} 个 ({elapsed * 1000:.1f} ms)，"
+          f"其中 {dropped:,} 个立即再入/逃逸，保留 {n:,} 个")
+    if n:
+        print(f"   特征尺寸中位数: {np.median(fragments['lc_m']) * 100:.1f} cm")
+        print(f"   面质比中位数:   {np.median(fragments['area_to_mass']):.3f} m²/kg")
+        print(f"   Δv 中位数:      {np.median(fragments['delta_v_km_s']) * 1000:.1f} m/s")
+        print(f"   碎片总质量:     {fragments['mass_kg'].sum():,.0f} kg (母体 {mass:,.0f} kg，未强制守恒)")
+
+    print_header("高度壳层占用变化")
+    print_occupancy(shell_occupancy(before, fragments))
+
+    if args.no_db or n == 0:
+        return
+
+    print_header(f"写入草稿数据库 {args.scratch}")
+    scratch = create_scratch_db(args.db, args.scratch)
+    try:
+        norad_ids = inject_fragments(scratch, parent, fragments)
+        print(f"✅ 写入 {len(norad_ids):,} 个合成碎片 (NORAD {norad_ids[0]}-{norad_ids[-1]})")
+        has_view = scratch.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'v_debris_statistics'
+        """).fetchone()
+        if has_view:
+            print("\n📊 v_debris_statistics（草稿库）:")
+            for row in scratch.execute("SELECT * FROM v_debris_statistics ORDER BY total_debris DESC"):
+                print(f"   {row[0]:14s} {row[1]:6,d} 个 ({row[2]}%)")
+        else:
+            print("⚠️  草稿库中没有 v_debris_statistics 视图（先执行 create_views_and_indexes.sql）")
+    finally:
+        scratch.close()
+    print(f"\n💡 可在草稿库上运行碰撞筛选: python collision_probability.py --db {args.scratch}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+"""
+OrbitalGuard - 紧凑目录 (Array-Backed In-Process Catalog)
+=========================================================
+功能：
+1. Catalog 以一个 NumPy 结构化数组保存目录：每个物体一行固定宽度记录（约 120 字节），
+   取代每条 40 个字符串键值的 OMM 字典列表
+2. 类型化的列：根数为 float64，历元为 datetime64[us]，物体类型 / RCS / 轨道区域为 int8 编码，
+   名称与国际编号为定长 ASCII 字节串
+3. norad_id → 行号索引（排序 + searchsorted），按物体类型 / 轨道区域 / 在轨状态生成布尔掩码
+4. 零拷贝：catalog['mean_motion'] 等列是结构化数组的字段视图，切片同样是视图；
+   elements() 返回可直接传给 orbit_math.propagate 的根数字典
+5. 三种加载方式：GP / OMM JSON 文件、二进制缓存 (.npy，memory-map 只读加载)、orbitalguard.db
+6. 基准测试：每个物体的内存占用与常见操作耗时（字典列表 vs Catalog）
+
+轨道区域与 export_columnar.py 的分区规则一致：
+    mean_motion > 11.25 → LEO；否则偏心率 ≥ 0.25 → HEO；0.9–1.1 圈/天 → GEO；其余 MEO
+
+用法：
+    python catalog.py                                  # 从 orbitalguard.db 加载并打印概况
+    python catalog.py --json data_cosmos2251_debris.json data_iridium33_debris.json
+    python catalog.py --save catalog.npy               # 写入二进制缓存
+    python catalog.py --cache catalog.npy              # 从缓存加载（memory-map）
+    python catalog.py --bench --json data_*.json
+"""
+
+import sqlite3
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from create_database import DB_NAME, print_header
+from cleaning import CleaningStats, clean_float, clean_int, clean_strip, clean_upper, get_column
+from partition_storage import LEO_MIN_MEAN_MOTION
+import orbit_math as om
+
+# ============================================================
+# 配置
+# ============================================================
+
+# 编码列的取值表，下标即编码；0 表示缺失或未知值
+OBJECT_TYPES = ('UNKNOWN', 'PAYLOAD', 'ROCKET BODY', 'DEBRIS', 'TBA')
+RCS_SIZES = ('', 'SMALL', 'MEDIUM', 'LARGE')
+REGIMES = ('UNKNOWN', 'LEO', 'MEO', 'GEO', 'HEO')
+HEO_MIN_ECCENTRICITY = 0.25
+GEO_MEAN_MOTION = (0.9, 1.1)
+
+NAME_WIDTH = 25
+INTL_DESIGNATOR_WIDTH = 12
+COUNTRY_WIDTH = 6
+TLE_WIDTH = 69
+
+CATALOG_DTYPE = np.dtype([
+    ('norad_id', np.int32),
+    ('epoch', 'datetime64[us]'),
+    ('inclination_deg', np.float64),
+    ('eccentricity', np.float64),
+    ('mean_motion', np.float64),
+    ('ra_of_asc_node', np.float64),
+    ('arg_of_pericenter', np.float64),
+    ('mean_anomaly', np.float64),
+    ('bstar', np.float64),
+    ('decay_date', 'datetime64[D]'),   # NaT = 在轨
+    ('object_type', np.int8),
+    ('rcs_size', np.int8),
+    ('regime', np.int8),
+    ('object_name', f'S{NAME_WIDTH}'),
+    ('intl_designator', f'S{INTL_DESIGNATOR_WIDTH}'),
+    ('country', f'S{COUNTRY_WIDTH}'),
+])
+
+# OMM JSON 字段 → 目录列
+OMM_ELEMENT_FIELDS = {
+    'INCLINATION': 'inclination_deg',
+    'ECCENTRICITY': 'eccentricity',
+    'MEAN_MOTION': 'mean_motion',
+    'RA_OF_ASC_NODE': 'ra_of_asc_node',
+    'ARG_OF_PERICENTER': 'arg_of_pericenter',
+    'MEAN_ANOMALY': 'mean_anomaly',
+    'BSTAR': 'bstar',
+}
+_CODED = {'object_type': OBJECT_TYPES, 'rcs_size': RCS_SIZES, 'regime': REGIMES}
+
+BENCH_LOOKUPS = 10_000
+
+# ============================================================
+# 1. 编码辅助
+# ============================================================
+
+def _encode_codes(values, table):
+    """字符串数组 → int8 编码（不在取值表中的值为 0）"""
+    codes = pd.Series(values, dtype=object).map({v: k for k, v in enumerate(table) if v})
+    return codes.fillna(0).to_numpy(dtype=np.int8)
+
+def _fixed_bytes(values, width):
+    """字符串数组 → 定长 ASCII 字节串（None 为空，非 ASCII 字符替换为 '?'，超长截断）"""
+    text = np.where(pd.isna(pd.Series(values, dtype=object)).to_numpy(), '', values).astype(f'U{width}')
+    return np.char.encode(text, 'ascii', 'replace').astype(f'S{width}')
+
+def _to_datetime(values, unit):
+    return pd.to_datetime(pd.Series(values, dtype=object), errors='coerce',
+                          format='ISO8601').to_numpy().astype(f'datetime64[{unit}]')
+
+def classify_regime(mean_motion, eccentricity):
+    """按平均运动 / 偏心率划分轨道区域 → int8 编码（REGIMES 下标）"""
+    regime = np.full(len(mean_motion), REGIMES.index('MEO'), dtype=np.int8)
+    geo = (mean_motion >= GEO_MEAN_MOTION[0]) & (mean_motion <= GEO_MEAN_MOTION[1])
+    regime[geo] = REGIMES.index('GEO')
+    regime[eccentricity >= HEO_MIN_ECCENTRICITY] = REGIMES.index('HEO')
+    regime[mean_motion > LEO_MIN_MEAN_MOTION] = REGIMES.index('LEO')
+    regime[~np.isfinite(mean_motion)] = REGIMES.index('UNKNOWN')
+    return regime
+
+# ============================================================
+# 2. Catalog
+# ============================================================
+
+class Catalog:
+    """结构化数组支撑的目录
+
+    records 的每个字段即一列；按列名取值返回字段视图（不复制），
+    按切片取值返回共享内存的子目录，按布尔掩码 / 下标数组取值返回副本。
+
+    TLE 行（仅 JSON 加载时存在）单独保存在 tle_lines 中，不占用主记录空间。
+    """
+
+    def __init__(self, records, tle_lines=None):
+        if records.dtype != CATALOG_DTYPE:
+            raise ValueError("records 必须为 CATALOG_DTYPE 结构化数组")
+        self.records = records
+        self.tle_lines = tle_lines
+        self._order = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.records[key]
+        tle = None if self.tle_lines is None else tuple(lines[key] for lines in self.tle_lines)
+        return Catalog(self.records[key], tle)
+
+    @property
+    def columns(self):
+        return CATALOG_DTYPE.names
+
+    @property
+    def nbytes(self):
+        tle = 0 if self.tle_lines is None else sum(lines.nbytes for lines in self.tle_lines)
+        return self.records.nbytes + tle
+
+    # ---------- 索引 ----------
+
+    def rows(self, norad_ids):
+        """norad_id（标量或数组）→ 行号，不在目录中为 -1；重复编号返回历元最新的一行"""
+        if self._order is None:
+            # 按 (norad_id, epoch) 排序，同一编号的最后一行即最新历元
+            self._order = np.lexsort((self.records['epoch'], self.records['norad_id']))
+        sorted_ids = self.records['norad_id'][self._order]
+        query = np.atleast_1d(np.asarray(norad_ids, dtype=np.int64))
+        pos = np.searchsorted(sorted_ids, query, side='right') - 1
+        found = (pos >= 0) & (sorted_ids[np.maximum(pos, 0)] == query)
+        rows = np.where(found, self._order[np.maximum(pos, 0)], -1)
+        return rows if np.ndim(norad_ids) else int(rows[0])
+
+    def get(self, norad_id):
+        """单个物体的记录 (np.void)，不存在返回 None"""
+        row = self.rows(norad_id)
+        return None if row < 0 else self.records[row]
+
+    def latest(self):
+        """每个 norad_id 只保留历元最新的一行，按 norad_id 升序"""
+        order = np.lexsort((self.records['epoch'], self.records['norad_id']))
+        ids = self.records['norad_id'][order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = ids[1:] != ids[:-1]
+        return self[order[last]]
+
+    # ---------- 掩码 ----------
+
+    def mask_object_type(self, *names):
+        return np.isin(self.records['object_type'], [OBJECT_TYPES.index(n.upper()) for n in names])
+
+    def mask_regime(self, *names):
+        return np.isin(self.records['regime'], [REGIMES.index(n.upper()) for n in names])
+
+    def mask_active(self):
+        return np.isnat(self.records['decay_date'])
+
+    def mask_name_contains(self, text):
+        return np.char.find(self.records['object_name'], text.upper().encode('ascii')) >= 0
+
+    # ---------- 列访问 ----------
+
+    def decode(self, column):
+        """编码列 / 字节串列 → 字符串对象数组（缺失为 None）"""
+        values = self.records[column]
+        if column in _CODED:
+            table = np.array(_CODED[column], dtype=object)
+            if column != 'regime':
+                table[0] = None
+            return table[values]
+        text = np.char.decode(values, 'ascii').astype(object)
+        text[text == ''] = None
+        return text
+
+    def epoch_unix(self):
+        return self.records['epoch'].astype(np.int64) / 1e6
+
+    def elements(self, extra_columns=()):
+        """→ orbit_math 根数字典（与 om.load_elements 相同的键）
+
+        根数列为字段视图；epoch 转为 UNIX 秒，bstar 缺失按 0 处理（与 load_elements 一致）。
+        """
+        elements = {'norad_id': self.records['norad_id'], 'epoch': self.epoch_unix()}
+        for c in om.ELEMENT_COLUMNS[:-1]:
+            elements[c] = self.records[c]
+        elements['bstar'] = np.nan_to_num(self.records['bstar'])
+        for c in extra_columns:
+            elements[c] = self.decode(c)
+        return elements
+
+    # ---------- 加载 / 保存 ----------
+
+    @classmethod
+    def from_records(cls, records, stats=None, keep_tle=False):
+        """OMM / GP 字典列表 → Catalog（保持输入顺序；缺少编号或历元的记录被剔除）"""
+        df = pd.DataFrame.from_records(records) if records else pd.DataFrame()
+        column = lambda name: get_column(df, name)
+        if stats is None:
+            stats = CleaningStats()
+
+        out = np.zeros(len(df), dtype=CATALOG_DTYPE)
+        norad_id = clean_int(column('NORAD_CAT_ID'), 'NORAD_CAT_ID', stats)
+        epoch = _to_datetime(column('EPOCH'), 'us')
+        keep = np.not_equal(norad_id, None) & ~np.isnat(epoch)
+        stats.add('EPOCH', 'missing', (np.not_equal(norad_id, None) & np.isnat(epoch)).sum())
+        stats.add('NORAD_CAT_ID', 'row_dropped', (~keep).sum())
+
+        out['norad_id'] = np.where(keep, norad_id, 0).astype(np.int32)
+        out['epoch'] = epoch
+        for field, c in OMM_ELEMENT_FIELDS.items():
+            out[c] = clean_float(column(field), field, stats)
+        out['decay_date'] = _to_datetime(column('DECAY_DATE'), 'D')
+        out['object_type'] = _encode_codes(clean_upper(column('OBJECT_TYPE'), 'OBJECT_TYPE', stats), OBJECT_TYPES)
+        out['rcs_size'] = _encode_codes(clean_upper(column('RCS_SIZE'), 'RCS_SIZE', stats), RCS_SIZES)
+        out['regime'] = classify_regime(out['mean_motion'], out['eccentricity'])
+        out['object_name'] = _fixed_bytes(clean_strip(column('OBJECT_NAME'), 'OBJECT_NAME', stats), NAME_WIDTH)
+        out['intl_designator'] = _fixed_bytes(clean_upper(column('OBJECT_ID'), 'OBJECT_ID', stats),
+                                              INTL_DESIGNATOR_WIDTH)
+        out['country'] = _fixed_bytes(clean_upper(column('COUNTRY_CODE'), 'COUNTRY_CODE', stats), COUNTRY_WIDTH)
+
+        tle = None
+        if keep_tle:
+            tle = tuple(_fixed_bytes(column(f).to_numpy(dtype=object), TLE_WIDTH)[keep]
+                        for f in ('TLE_LINE1', 'TLE_LINE2'))
+        return cls(out[keep], tle)
+
+    @classmethod
+    def from_json(cls, paths, latest_only=True, stats=None, keep_tle=False):
+        """读取一个或多个 GP / OMM JSON 文件（JSON 数组）
+
+        Args:
+            latest_only: 多个文件重叠时每个物体只保留最新历元
+            keep_tle: 保留 TLE_LINE1 / TLE_LINE2（定长 69 字节）
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        records = []
+        for path in paths:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                records.extend(data)
+        catalog = cls.from_records(records, stats, keep_tle)
+        return catalog.latest() if latest_only else catalog
+
+    @classmethod
+    def from_db(cls, conn, active_only=True):
+        """每个物体最新历元的根数 + SpaceObjects 属性（查询规则同 om.load_elements）"""
+        extra = ('object_name', 'intl_designator', 'object_type', 'country', 'rcs_size', 'decay_date')
+        df = pd.read_sql_query(f"""
+            SELECT o.norad_id, o.epoch, {', '.join('o.' + c for c in om.ELEMENT_COLUMNS)},
+                   {', '.join('s.' + c for c in extra)}
+            FROM Orbits o
+            INNER JOIN (
+                SELECT norad_id, MAX(epoch) AS epoch FROM Orbits GROUP BY norad_id
+            ) latest ON o.norad_id = latest.norad_id AND o.epoch = latest.epoch
+            INNER JOIN SpaceObjects s ON o.norad_id = s.norad_id
+            {"WHERE s.decay_date IS NULL" if active_only else ""}
+            ORDER BY o.norad_id
+        """, conn).drop_duplicates('norad_id', keep='last')
+
+        out = np.zeros(len(df), dtype=CATALOG_DTYPE)
+        out['norad_id'] = df['norad_id'].to_numpy()
+        out['epoch'] = _to_datetime(df['epoch'], 'us')
+        for c in om.ELEMENT_COLUMNS:
+            out[c] = df[c].to_numpy(dtype=np.float64)
+        out['decay_date'] = _to_datetime(df['decay_date'], 'D')
+        out['object_type'] = _encode_codes(df['object_type'], OBJECT_TYPES)
+        out['rcs_size'] = _encode_codes(df['rcs_size'], RCS_SIZES)
+        out['regime'] = classify_regime(out['mean_motion'], out['eccentricity'])
+        out['object_name'] = _fixed_bytes(df['object_name'].to_numpy(dtype=object), NAME_WIDTH)
+        out['intl_designator'] = _fixed_bytes(df['intl_designator'].to_numpy(dtype=object), INTL_DESIGNATOR_WIDTH)
+        out['country'] = _fixed_bytes(df['country'].to_numpy(dtype=object), COUNTRY_WIDTH)
+        return cls(out)
+
+    @classmethod
+    def from_cache(cls, path, mmap=True):
+        """读取 save() 写出的 .npy；mmap=True 时只读映射，按需从磁盘读取页面"""
+        records = np.load(path, mmap_mode='r' if mmap else None)
+        if records.dtype != CATALOG_DTYPE:
+            raise ValueError(f"{path}: 缓存格式与 CATALOG_DTYPE 不一致，请重新生成")
+        return cls(records)
+
+    def save(self, path):
+        np.save(path, np.ascontiguousarray(self.records))
+
+    # ---------- 概况 ----------
+
+    def summary(self):
+        """→ {(轨道区域, 物体类型): 数量}"""
+        keys = self.records['regime'].astype(np.int64) * len(OBJECT_TYPES) + self.records['object_type']
+        codes, counts = np.unique(keys, return_counts=True)
+        return {(REGIMES[c // len(OBJECT_TYPES)], OBJECT_TYPES[c % len(OBJECT_TYPES)]): int(n)
+                for c, n in zip(codes, counts)}
+
+# ============================================================
+# 3. 基准测试
+# ============================================================
+
+def _measure(load):
+    """→ (结果, 结果占用的内存字节数, 耗时)；内存与耗时分两次测量（tracemalloc 会拖慢分配）"""
+    t = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - t
+    tracemalloc.start()
+    result = load()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+def run_benchmark(json_paths, n_lookups=BENCH_LOOKUPS, seed=5):
+    print_header(f"基准测试: OMM 字典列表 vs Catalog ({len(json_paths)} 个文件)")
+
+    def load_dicts():
+        records = []
+        for path in json_paths:
+            with open(path, 'r') as f:
+                records.extend(json.load(f))
+        return records
+
+    records, dict_bytes, dict_load = _measure(load_dicts)
+    catalog, catalog_bytes, catalog_load = _measure(lambda: Catalog.from_json(json_paths, latest_only=False))
+    n = len(records)
+    print(f"   {'':14s} {'内存':>12s} {'每个物体':>12s} {'加载':>10s}")
+    print(f"   {'字典列表':12s} {dict_bytes / 1e6:10.1f} MB {dict_bytes / n:10,.0f} B {dict_load:9.2f}秒")
+    print(f"   {'Catalog':14s} {catalog_bytes / 1e6:10.1f} MB {catalog_bytes / len(catalog):10,.0f} B "
+          f"{catalog_load:9.2f}秒")
+    print(f"   内存缩减 {dict_bytes / catalog_bytes:.0f}×（记录数组 {catalog.nbytes / len(catalog):.0f} 字节/物体）")
+
+    rng = np.random.default_rng(seed)
+    ids = catalog['norad_id'][rng.integers(0, len(catalog), n_lookups)]
+    by_id = {}
+    for r in records:
+        by_id[int(r['NORAD_CAT_ID'])] = r
+
+    operations = [
+        ("LEO 碎片筛选",
+         lambda: [r for r in records if r.get('OBJECT_TYPE') == 'DEBRIS'
+                  and float(r.get('MEAN_MOTION') or 0) > LEO_MIN_MEAN_MOTION],
+         lambda: catalog[catalog.mask_object_type('DEBRIS') & catalog.mask_regime('LEO')]),
+        ("平均倾角",
+         lambda: sum(float(r['INCLINATION']) for r in records) / n,
+         lambda: catalog['inclination_deg'].mean()),
+        (f"{n_lookups:,} 次编号查找",
+         lambda: [by_id.get(int(i)) for i in ids],
+         lambda: catalog.rows(ids)),
+    ]
+    for label, with_dicts, with_catalog in operations:
+        t = time.perf_counter()
+        with_dicts()
+        t_dicts = time.perf_counter() - t
+        t = time.perf_counter()
+        with_catalog()
+        t_catalog = time.perf_counter() - t
+        print(f"   {label:16s} 字典 {t_dicts * 1000:8.2f} ms  Catalog {t_catalog * 1000:7.2f} ms  "
+              f"加速 {t_dicts / max(t_catalog, 1e-9):6.0f}×")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def print_summary(catalog, label):
+    print_header(f"{label}: {len(catalog):,} 个物体, {catalog.nbytes / 1024:,.0f} KB "
+                 f"({catalog.nbytes / max(len(catalog), 1):.0f} 字节/物体)")
+    for (regime, object_type), count in sorted(catalog.summary().items()):
+        print(f"   {regime:8s} {object_type:12s} {count:>8,}")
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 紧凑目录")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--json', nargs='+', metavar='FILE', help="从 GP / OMM JSON 文件加载")
+    parser.add_argument('--cache', metavar='FILE', help="从二进制缓存 (.npy) 加载")
+    parser.add_argument('--save', metavar='FILE', help="写入二进制缓存 (.npy)")
+    parser.add_argument('--all', action='store_true', help="数据库加载时包含已陨落物体")
+    parser.add_argument('--bench', action='store_true', help="内存与操作耗时对比（需 --json）")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 紧凑目录")
+    print("="*70)
+
+    if args.bench:
+        if not args.json:
+            parser.error("--bench 需要 --json 指定 GP 文件")
+        run_benchmark(args.json)
+        return
+
+    t = time.time()
+    if args.cache:
+        catalog, label = Catalog.from_cache(args.cache), args.cache
+    elif args.json:
+        catalog, label = Catalog.from_json(args.json), f"{len(args.json)} 个 JSON 文件"
+    else:
+        conn = sqlite3.connect(args.db)
+        try:
+            catalog, label = Catalog.from_db(conn, active_only=not args.all), args.db
+        finally:
+            conn.close()
+    print(f"✅ 加载完成 ({time.time() - t:.2f}秒)")
+    print_summary(catalog, label)
+
+    if args.save:
+        catalog.save(args.save)
+        print(f"\n💾 已写入缓存: {args.save}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+OrbitalGuard - 目录快照比对与机动检测 (Catalog Diff & Maneuver Detection)
+=========================================================================
+功能：
+1. 读取前后两份 GP 快照（download_data.py 刷新时把上一版保留为 data_active_gp.previous.json）
+2. 按 NORAD_CAT_ID 排序后用 searchsorted 做有序数组连接，得到共有 / 新增 / 消失三组物体
+3. 共有物体计算根数差并按历元间隔归一化：半长轴、倾角、偏心率，以及扣除 J2 预期漂移后的升交点残差
+4. 超过阈值的标记为疑似机动 (MANEUVER)，新增物体标记 NEW，从在轨快照中消失的标记 DECAYED
+5. 变化写入 CatalogChangeLog 表（追加，不覆盖历史）；常规根数更新不入表。
+   该表放在独立文件 orbitalguard_changelog.db 中：orbitalguard.db 每次导入都会整库重建并原子替换，
+   而上一版快照只保留一份，历史无法重新生成
+
+判定规则（历元间隔 Δt 天）：
+- 半长轴抬升 > SMA_RAISE_KM，或下降超过 SMA_RAISE_KM + 大气衰减容许量 × Δt
+- 倾角变化 > INC_JUMP_DEG
+- 升交点赤经实际变化与 J2 预测之差 > RAAN_RESIDUAL_DEG
+- 历元未更新 (Δt = 0) 的物体不参与判定
+
+用法：
+    python catalog_diff.py                                           # previous vs 当前快照
+    python catalog_diff.py old_gp.json.gz new_gp.json --dry-run      # 只打印，不写表
+    python catalog_diff.py --log history/changelog.db                # 指定变化日志文件
+    python catalog_diff.py --bench 30000                             # 合成快照基准测试
+"""
+
+import sqlite3
+import argparse
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from create_database import DATA_FILES, print_header
+from element_archive import load_gp_file
+import orbit_math as om
+
+# ============================================================
+# 配置
+# ============================================================
+
+PREVIOUS_GP_FILE = 'data_active_gp.previous.json'
+# 变化日志独立于 orbitalguard.db（后者每次导入整库重建）
+CHANGELOG_DB = 'orbitalguard_changelog.db'
+
+SMA_RAISE_KM = 0.5
+# 大气阻力每天可使低轨物体半长轴下降数百米，下降方向额外放宽
+DECAY_ALLOWANCE_KM_PER_DAY = 1.0
+INC_JUMP_DEG = 0.02
+RAAN_RESIDUAL_DEG = 0.1
+
+ELEMENT_COLUMNS = ('inclination_deg', 'eccentricity', 'mean_motion', 'ra_of_asc_node',
+                   'arg_of_pericenter', 'mean_anomaly', 'bstar')
+
+# ============================================================
+# 1. 快照加载
+# ============================================================
+
+def load_snapshot(filename):
+    """GP JSON / TLE 文件 → 按 norad_id 升序的列数组字典（同一物体保留最新历元）"""
+    df = load_gp_file(filename)
+    norad = np.asarray(df['norad_id'], dtype=np.float64)
+    epoch = om.epoch_to_unix(df['epoch'])
+    valid = ~np.isnan(norad) & ~np.isnan(epoch)
+
+    snap = {'norad_id': norad[valid].astype(np.int64), 'epoch': epoch[valid]}
+    for col in ELEMENT_COLUMNS:
+        snap[col] = np.asarray(df[col], dtype=np.float64)[valid]
+    return _sort_unique(snap)
+
+def _sort_unique(snap):
+    order = np.lexsort((snap['epoch'], snap['norad_id']))
+    ids = snap['norad_id'][order]
+    last = np.ones(len(ids), dtype=bool)
+    last[:-1] = ids[1:] != ids[:-1]
+    return {k: v[order][last] for k, v in snap.items()}
+
+# ============================================================
+# 2. 有序连接与比对
+# ============================================================
+
+def sorted_join(old_ids, new_ids):
+    """两个升序唯一数组的连接
+
+    Returns:
+        (old_idx, new_idx, new_only, old_only)：共有物体在两侧的下标，以及各自独有的下标
+    """
+    if len(old_ids) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.arange(len(new_ids)), empty
+    pos = np.searchsorted(old_ids, new_ids)
+    found = old_ids[np.minimum(pos, len(old_ids) - 1)] == new_ids
+    old_idx, new_idx = pos[found], np.flatnonzero(found)
+
+    in_new = np.zeros(len(old_ids), dtype=bool)
+    in_new[old_idx] = True
+    return old_idx, new_idx, np.flatnonzero(~found), np.flatnonzero(~in_new)
+
+def _wrap_deg(angle):
+    return (angle + 180.0) % 360.0 - 180.0
+
+def diff_snapshots(old, new):
+    """比对两份快照，返回变化记录的列数组字典（只含 NEW / DECAYED / MANEUVER）"""
+    old_idx, new_idx, new_only, old_only = sorted_join(old['norad_id'], new['norad_id'])
+    a_old = om.mean_motion_to_sma(old['mean_motion'][old_idx])
+    a_new = om.mean_motion_to_sma(new['mean_motion'][new_idx])
+    gap_days = (new['epoch'][new_idx] - old['epoch'][old_idx]) / om.SECONDS_PER_DAY
+
+    d_sma = a_new - a_old
+    d_inc = new['inclination_deg'][new_idx] - old['inclination_deg'][old_idx]
+    d_ecc = new['eccentricity'][new_idx] - old['eccentricity'][old_idx]
+
+    # 升交点：实际变化减去 J2 长期漂移预测（取前一快照的根数）
+    raan_dot, _ = om.j2_secular_rates(a_old, old['eccentricity'][old_idx],
+                                      np.radians(old['inclination_deg'][old_idx]))
+    predicted = np.degrees(raan_dot) * gap_days * om.SECONDS_PER_DAY
+    raan_residual = _wrap_deg(new['ra_of_asc_node'][new_idx] - old['ra_of_asc_node'][old_idx] - predicted)
+
+    updated = gap_days > 0
+    lower_limit = SMA_RAISE_KM + DECAY_ALLOWANCE_KM_PER_DAY * gap_days
+    # 各判据超限倍数，取最大值作为机动评分
+    score = np.maximum.reduce([
+        np.where(d_sma > 0, d_sma / SMA_RAISE_KM, -d_sma / lower_limit),
+        np.abs(d_inc) / INC_JUMP_DEG,
+        np.abs(raan_residual) / RAAN_RESIDUAL_DEG,
+    ])
+    maneuver = updated & (score > 1.0)
+
+    m = np.flatnonzero(maneuver)
+    n_new, n_gone, n_man = len(new_only), len(old_only), len(m)
+    nan = lambda n: np.full(n, np.nan)
+    safe_gap = np.where(gap_days[m] > 0, gap_days[m], np.nan)
+
+    return {
+        'norad_id': np.concatenate([new['norad_id'][new_only], old['norad_id'][old_only],
+                                    new['norad_id'][new_idx[m]]]),
+        'change_type': np.array(['NEW'] * n_new + ['DECAYED'] * n_gone + ['MANEUVER'] * n_man,
+                                dtype=object),
+        'old_epoch': np.concatenate([nan(n_new), old['epoch'][old_only], old['epoch'][old_idx[m]]]),
+        'new_epoch': np.concatenate([new['epoch'][new_only], nan(n_gone), new['epoch'][new_idx[m]]]),
+        'epoch_gap_days': np.concatenate([nan(n_new + n_gone), gap_days[m]]),
+        'delta_sma_km': np.concatenate([nan(n_new + n_gone), d_sma[m]]),
+        'delta_inclination_deg': np.concatenate([nan(n_new + n_gone), d_inc[m]]),
+        'delta_eccentricity': np.concatenate([nan(n_new + n_gone), d_ecc[m]]),
+        'raan_residual_deg': np.concatenate([nan(n_new + n_gone), raan_residual[m]]),
+        'sma_rate_km_per_day': np.concatenate([nan(n_new + n_gone), d_sma[m] / safe_gap]),
+        'score': np.concatenate([nan(n_new + n_gone), score[m]]),
+        'matched': len(old_idx),
+        'updated': int(updated.sum()),
+    }
+
+# ============================================================
+# 3. 变化日志
+# ============================================================
+
+LOG_COLUMNS = ('norad_id', 'change_type', 'old_epoch', 'new_epoch', 'epoch_gap_days', 'delta_sma_km',
+               'delta_inclination_deg', 'delta_eccentricity', 'raan_residual_deg',
+               'sma_rate_km_per_day', 'score')
+
+def create_change_log(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS CatalogChangeLog (
+            change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            detected_at TEXT,
+            norad_id INTEGER,
+            change_type TEXT,
+            old_epoch TEXT,
+            new_epoch TEXT,
+            epoch_gap_days REAL,
+            delta_sma_km REAL,
+            delta_inclination_deg REAL,
+            delta_eccentricity REAL,
+            raan_residual_deg REAL,
+            sma_rate_km_per_day REAL,
+            score REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_changelog_norad ON CatalogChangeLog(norad_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_changelog_type ON CatalogChangeLog(change_type, detected_at)")
+
+def _nullable(value, convert=float):
+    return None if value is None or value != value else convert(value)
+
+def store_changes(conn, changes):
+    detected_at = datetime.now().isoformat(timespec='seconds')
+    rows = []
+    for k in range(len(changes['norad_id'])):
+        old_epoch, new_epoch = changes['old_epoch'][k], changes['new_epoch'][k]
+        rows.append((detected_at, int(changes['norad_id'][k]), changes['change_type'][k],
+                     _nullable(old_epoch, om.unix_to_iso), _nullable(new_epoch, om.unix_to_iso))
+                    + tuple(_nullable(changes[c][k]) for c in LOG_COLUMNS[4:]))
+
+    create_change_log(conn)
+    conn.executemany(f"""
+        INSERT INTO CatalogChangeLog (detected_at, {', '.join(LOG_COLUMNS)})
+        VALUES ({', '.join('?' * (len(LOG_COLUMNS) + 1))})
+    """, rows)
+    conn.commit()
+    return len(rows)
+
+def print_summary(changes, limit=10):
+    types = changes['change_type']
+    print(f"   共有物体: {changes['matched']:,} (历元已更新 {changes['updated']:,})")
+    for label in ('NEW', 'DECAYED', 'MANEUVER'):
+        print(f"   {label:9s} {int((types == label).sum()):,}")
+
+    man = np.flatnonzero(types == 'MANEUVER')
+    if len(man) and limit:
+        print("\n📌 评分最高的疑似机动:")
+        for k in man[np.argsort(-changes['score'][man])][:limit]:
+            print(f"   {changes['norad_id'][k]:>6d}  Δa {changes['delta_sma_km'][k]:+8.2f} km  "
+                  f"Δi {changes['delta_inclination_deg'][k]:+7.3f}°  "
+                  f"ΔΩ残差 {changes['raan_residual_deg'][k]:+7.3f}°  "
+                  f"间隔 {changes['epoch_gap_days'][k]:5.2f} 天  评分 {changes['score'][k]:6.1f}")
+
+# ============================================================
+# 4. 基准测试
+# ============================================================
+
+def synthetic_pair(n_objects, seed=11):
+    """生成一对合成快照：约 1% 新增、1% 消失、0.5% 注入机动，其余按 J2 正常演化"""
+    rng = np.random.default_rng(seed)
+    ids = np.sort(rng.choice(np.arange(1, 10 * n_objects), n_objects, replace=False))
+    old = {
+        'norad_id': ids,
+        'epoch': 1.7e9 + rng.uniform(0, 86400, n_objects),
+        'inclination_deg': rng.uniform(0, 110, n_objects),
+        'eccentricity': rng.uniform(0, 0.02, n_objects),
+        'mean_motion': rng.uniform(11.0, 15.5, n_objects),
+        'ra_of_asc_node': rng.uniform(0, 360, n_objects),
+        'arg_of_pericenter': rng.uniform(0, 360, n_objects),
+        'mean_anomaly': rng.uniform(0, 360, n_objects),
+        'bstar': rng.uniform(0, 1e-4, n_objects),
+    }
+
+    new = {k: v.copy() for k, v in old.items()}
+    new['epoch'] += rng.uniform(0.3, 2.0, n_objects) * om.SECONDS_PER_DAY
+    a = om.mean_motion_to_sma(old['mean_motion'])
+    raan_dot, _ = om.j2_secular_rates(a, old['eccentricity'], np.radians(old['inclination_deg']))
+    new['ra_of_asc_node'] = (old['ra_of_asc_node']
+                             + np.degrees(raan_dot) * (new['epoch'] - old['epoch'])
+                             + rng.normal(0, 0.005, n_objects)) % 360
+    new['inclination_deg'] += rng.normal(0, 0.002, n_objects)
+
+    injected = rng.choice(n_objects, n_objects // 200, replace=False)
+    new['mean_motion'][injected] -= 0.02            # 半长轴抬升约数公里
+
+    keep = np.ones(n_objects, dtype=bool)
+    keep[rng.choice(n_objects, n_objects // 100, replace=False)] = False
+    new = {k: v[keep] for k, v in new.items()}
+    extra = n_objects // 100
+    added = {k: v[:extra].copy() for k, v in new.items()}
+    added['norad_id'] = 10 * n_objects + np.arange(extra)
+    new = _sort_unique({k: np.concatenate([new[k], added[k]]) for k in new})
+    return old, new, ids[injected[keep[injected]]]
+
+def run_benchmark(n_objects, repeat=5):
+    print_header(f"基准测试: {n_objects:,} 个物体的快照比对")
+    old, new, injected = synthetic_pair(n_objects)
+
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        changes = diff_snapshots(old, new)
+        times.append(time.perf_counter() - t)
+    print(f"   比对耗时: {min(times) * 1000:.1f} ms (最好 {repeat} 次)")
+    print_summary(changes, limit=0)
+
+    flagged = changes['norad_id'][changes['change_type'] == 'MANEUVER']
+    hit = np.isin(injected, flagged).sum()
+    false_alarm = len(flagged) - np.isin(flagged, injected).sum()
+    print(f"   注入机动检出: {hit}/{len(injected)}, 误报 {false_alarm}")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 目录快照比对与机动检测")
+    parser.add_argument('old', nargs='?', default=PREVIOUS_GP_FILE, help="前一份快照")
+    parser.add_argument('new', nargs='?', default=DATA_FILES['active_gp'], help="当前快照")
+    parser.add_argument('--log', default=CHANGELOG_DB, help="变化日志文件（CatalogChangeLog 表）")
+    parser.add_argument('--dry-run', action='store_true', help="只打印结果，不写 CatalogChangeLog")
+    parser.add_argument('--bench', type=int, metavar='OBJECTS', help="合成快照基准测试")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 目录快照比对与机动检测")
+    print("="*70)
+
+    if args.bench:
+        run_benchmark(args.bench)
+        return
+
+    for path in (args.old, args.new):
+        if not os.path.exists(path):
+            print(f"❌ 快照不存在: {path}")
+            if path == PREVIOUS_GP_FILE:
+                print("   💡 下次运行 download_data.py 时会自动保留上一版快照")
+            return
+
+    t = time.time()
+    old, new = load_snapshot(args.old), load_snapshot(args.new)
+    print(f"📊 前一快照 {len(old['norad_id']):,} 个, 当前快照 {len(new['norad_id']):,} 个 "
+          f"(读取 {time.time() - t:.2f}秒)")
+
+    print_header("比对结果")
+    t = time.perf_counter()
+    changes = diff_snapshots(old, new)
+    print(f"✅ 比对耗时 {(time.perf_counter() - t) * 1000:.1f} ms")
+    print_summary(changes)
+
+    if args.dry_run:
+        return
+    conn = sqlite3.connect(args.log)
+    try:
+        stored = store_changes(conn, changes)
+        print(f"\n💾 写入 CatalogChangeLog ({args.log}): {stored:,} 条")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+OrbitalGuard - 目录全文检索 (FTS5 Trigram Catalog Search)
+=========================================================
+功能：
+1. 建立 FTS5 trigram 索引 CatalogSearch，覆盖名称、国际编号、运营商、承包商、用途
+   (rowid = norad_id；trigram 分词支持任意位置的子串匹配，大小写不敏感)
+2. 在 SpaceObjects / SatelliteDetails 上建立触发器，导入或修改数据时自动同步索引
+3. 检索接口：按 bm25 相关度排序（名称权重最高），分页返回，附带命中片段高亮
+4. 基准测试：与 LIKE '%...%' 全表扫描对比查询耗时
+
+与 example_queries.sql 中 LIKE '%FENGYUN 1C%' 的区别：
+- 前导通配符 LIKE 无法使用 B-tree 索引，每次查询都扫描全表
+- trigram 索引按三字符片段倒排，子串查询只读取包含这些片段的行
+
+限制：trigram 只能匹配 ≥3 个字符的词，更短的查询退化为对索引表的 LIKE 扫描
+
+用法：
+    python catalog_search.py "fengyun deb"                  # 多个词同时命中 (AND)
+    python catalog_search.py "iridium" --page 2 --page-size 10
+    python catalog_search.py "spacex" --field operator_owner
+    python catalog_search.py --rebuild                      # 重建索引与触发器
+    python catalog_search.py --bench
+"""
+
+import sqlite3
+import argparse
+import time
+
+from create_database import DB_NAME, print_header
+
+# ============================================================
+# 配置
+# ============================================================
+
+SEARCH_TABLE = 'CatalogSearch'
+SEARCH_FIELDS = ('object_name', 'intl_designator', 'operator_owner', 'contractor', 'purpose')
+# bm25 列权重（与 SEARCH_FIELDS 顺序一致）：名称与编号命中优先
+FIELD_WEIGHTS = (10.0, 5.0, 2.0, 1.0, 1.0)
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+MIN_TRIGRAM_CHARS = 3
+
+BENCH_QUERIES = ('FENGYUN 1C', 'COSMOS 2251', 'IRIDIUM', '1999-025', 'STARLINK', 'DEB')
+BENCH_REPEAT = 20
+
+# 按 norad_id 重新生成一行索引内容（SpaceObjects 为主，SatelliteDetails 可缺失）
+_ROW_SELECT = """
+    SELECT s.norad_id, s.object_name, s.intl_designator,
+           d.operator_owner, d.contractor, d.purpose
+    FROM SpaceObjects s
+    LEFT JOIN SatelliteDetails d ON d.norad_id = s.norad_id
+"""
+
+def _refresh_sql(key):
+    return (f"DELETE FROM {SEARCH_TABLE} WHERE rowid = {key};\n"
+            f"            INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_FIELDS)})\n"
+            f"            {_ROW_SELECT.strip()} WHERE s.norad_id = {key};")
+
+_TRIGGERS = {
+    'trg_search_objects_insert': ("AFTER INSERT ON SpaceObjects", _refresh_sql('new.norad_id')),
+    'trg_search_objects_update': ("AFTER UPDATE OF norad_id, object_name, intl_designator ON SpaceObjects",
+                                  f"DELETE FROM {SEARCH_TABLE} WHERE rowid = old.norad_id;\n"
+                                  f"            " + _refresh_sql('new.norad_id')),
+    'trg_search_objects_delete': ("AFTER DELETE ON SpaceObjects",
+                                  f"DELETE FROM {SEARCH_TABLE} WHERE rowid = old.norad_id;"),
+    'trg_search_details_insert': ("AFTER INSERT ON SatelliteDetails", _refresh_sql('new.norad_id')),
+    'trg_search_details_update': ("AFTER UPDATE ON SatelliteDetails",
+                                  _refresh_sql('old.norad_id') + "\n            " + _refresh_sql('new.norad_id')),
+    'trg_search_details_delete': ("AFTER DELETE ON SatelliteDetails", _refresh_sql('old.norad_id')),
+}
+
+# ============================================================
+# 1. 索引与触发器
+# ============================================================
+
+def create_search_index(conn, rebuild=False):
+    """创建索引表与同步触发器；索引为空或 rebuild=True 时全量重建"""
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE}
+        USING fts5({', '.join(SEARCH_FIELDS)}, tokenize='trigram')
+    """)
+    for name, (event, body) in _TRIGGERS.items():
+        if rebuild:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} {event}
+            BEGIN
+            {body}
+            END
+        """)
+
+    empty = conn.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {SEARCH_TABLE})").fetchone()[0]
+    if rebuild or empty:
+        conn.execute(f"DELETE FROM {SEARCH_TABLE}")
+        conn.execute(f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) {_ROW_SELECT}")
+        # 合并 b-tree 段，减少查询时需要读取的段数
+        conn.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    conn.commit()
+    return conn.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}").fetchone()[0]
+
+def has_search_index(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (SEARCH_TABLE,)).fetchone() is not None
+
+# ============================================================
+# 2. 检索
+# ============================================================
+
+def _terms(query):
+    return [t for t in query.split() if t]
+
+def build_match(terms, field=None):
+    """词列表 → FTS5 MATCH 表达式：每个词作为短语（双引号转义），词之间 AND"""
+    phrases = ' AND '.join('"' + t.replace('"', '""') + '"' for t in terms)
+    if field:
+        return f"{field} : ({phrases})"
+    return phrases
+
+def search(conn, query, page=1, page_size=PAGE_SIZE, field=None):
+    """检索目录
+
+    Args:
+        query: 空白分隔的词，全部命中才返回（子串匹配，大小写不敏感）
+        page: 页码，从 1 开始
+        field: 只在某个字段中检索（SEARCH_FIELDS 之一）
+
+    Returns:
+        {'query', 'total', 'page', 'page_size', 'results': [dict, ...]}
+    """
+    if field is not None and field not in SEARCH_FIELDS:
+        raise ValueError(f"未知检索字段: {field}")
+    page = max(int(page), 1)
+    page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+    terms = _terms(query)
+    response = {'query': query, 'total': 0, 'page': page, 'page_size': page_size, 'results': []}
+    if not terms:
+        return response
+
+    fields = [field] if field else list(SEARCH_FIELDS)
+    if all(len(t) >= MIN_TRIGRAM_CHARS for t in terms):
+        where = f"{SEARCH_TABLE} MATCH ?"
+        params = [build_match(terms, field)]
+        weights = ', '.join(str(w) for w in FIELD_WEIGHTS)
+        order = f"bm25({SEARCH_TABLE}, {weights}), f.rowid"
+    else:
+        # 短词无法构成 trigram：对索引表逐行 LIKE，按 norad_id 排序
+        clauses, params = [], []
+        for t in terms:
+            clauses.append('(' + ' OR '.join(f"f.{c} LIKE ?" for c in fields) + ')')
+            params.extend([f"%{t}%"] * len(fields))
+        where = ' AND '.join(clauses)
+        order = "f.rowid"
+
+    response['total'] = conn.execute(
+        f"SELECT COUNT(*) FROM {SEARCH_TABLE} f WHERE {where}", params).fetchone()[0]
+    rows = conn.execute(f"""
+        SELECT f.rowid, f.object_name, f.intl_designator, f.operator_owner,
+               f.contractor, f.purpose, s.object_type, s.country, s.decay_date,
+               highlight({SEARCH_TABLE}, 0, '[', ']')
+        FROM {SEARCH_TABLE} f
+        JOIN SpaceObjects s ON s.norad_id = f.rowid
+        WHERE {where}
+        ORDER BY {order}
+        LIMIT ? OFFSET ?
+    """, params + [page_size, (page - 1) * page_size]).fetchall()
+
+    columns = ('norad_id',) + SEARCH_FIELDS + ('object_type', 'country', 'decay_date', 'highlight')
+    response['results'] = [dict(zip(columns, row)) for row in rows]
+    return response
+
+# ============================================================
+# 3. 基准测试
+# ============================================================
+
+def _like_scan(conn, term):
+    return conn.execute("""
+        SELECT COUNT(*) FROM SpaceObjects s
+        LEFT JOIN SatelliteDetails d ON d.norad_id = s.norad_id
+        WHERE s.object_name LIKE ?1 OR s.intl_designator LIKE ?1 OR d.operator_owner LIKE ?1
+           OR d.contractor LIKE ?1 OR d.purpose LIKE ?1
+    """, (f"%{term}%",)).fetchone()[0]
+
+def run_benchmark(conn, queries=BENCH_QUERIES, repeat=BENCH_REPEAT):
+    print_header(f"基准测试: LIKE 全表扫描 vs trigram 索引 (每个查询 {repeat} 次)")
+    print(f"   {'查询':14s} {'LIKE (ms)':>10s} {'FTS5 (ms)':>10s} {'加速':>8s} {'命中':>8s}")
+    for term in queries:
+        t = time.perf_counter()
+        for _ in range(repeat):
+            like_count = _like_scan(conn, term)
+        like_ms = (time.perf_counter() - t) / repeat * 1000
+
+        t = time.perf_counter()
+        for _ in range(repeat):
+            result = search(conn, term)
+        fts_ms = (time.perf_counter() - t) / repeat * 1000
+
+        mark = '' if result['total'] == like_count else f"  ⚠️ LIKE={like_count}"
+        print(f"   {term:14s} {like_ms:10.2f} {fts_ms:10.2f} {like_ms / fts_ms:7.1f}× "
+              f"{result['total']:8,}{mark}")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 目录全文检索")
+    parser.add_argument('query', nargs='?', default='', help="检索词（空白分隔，全部命中）")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--page', type=int, default=1)
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    parser.add_argument('--field', choices=SEARCH_FIELDS, help="只检索指定字段")
+    parser.add_argument('--rebuild', action='store_true', help="重建索引与触发器")
+    parser.add_argument('--bench', action='store_true', help="与 LIKE 扫描对比耗时")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 目录全文检索")
+    print("="*70)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.rebuild or not has_search_index(conn):
+            t = time.time()
+            count = create_search_index(conn, rebuild=args.rebuild)
+            print(f"✅ 检索索引: {count:,} 个物体 ({time.time() - t:.2f}秒)")
+
+        if args.bench:
+            run_benchmark(conn)
+            return
+        if not args.query:
+            return
+
+        t = time.perf_counter()
+        result = search(conn, args.query, args.page, args.page_size, args.field)
+        elapsed = (time.perf_counter() - t) * 1000
+        pages = (result['total'] + result['page_size'] - 1) // result['page_size']
+        print_header(f"\"{args.query}\": {result['total']:,} 条, 第 {result['page']}/{max(pages, 1)} 页 "
+                     f"({elapsed:.1f} ms)")
+        for row in result['results']:
+            status = '已陨落' if row['decay_date'] else '在轨'
+            print(f"   {row['norad_id']:>6d}  {row['highlight'] or '':30s} {row['intl_designator'] or '':12s} "
+                  f"{row['object_type'] or '':12s} {status:4s} {(row['operator_owner'] or '')[:30]}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+OrbitalGuard - 列式数据清洗 (Vectorized Column Cleaning)
+========================================================
+功能：
+1. 整列清洗函数（pandas / NumPy），与 create_database.py 中逐值调用的 safe_* 规则对应：
+   - clean_float：数值转换，拒绝无法解析的值与 NaN / ±Inf
+   - clean_int：编号类字段（NORAD 编号），拒绝带小数部分的值
+   - clean_date：取前 10 个字符，校验 YYYY-MM-DD 格式与月 / 日范围
+   - clean_upper / clean_strip：去首尾空白（可选转大写）
+   - 所有函数统一把 None、NaN、''、'N/A' 以及去空白后为空的字符串视为缺失
+   - 文本 / 日期列先做字典编码 (pd.factorize)，字符串处理只在去重后的值上执行一次
+2. CleaningStats 按 "列.规则" 统计被拒绝 / 置空的值，导入结束后打印
+3. JSON (SATCAT / GP) 与 Excel (UCS) 导入都调用本模块，规则只定义一处
+4. 基准测试：与逐值调用 safe_* 的标量路径对比耗时并校验结果
+
+与标量路径的差异（有意修正）：
+- Excel 空单元格读入为 NaN，safe_strip(NaN) 会返回字符串 'nan'；这里视为缺失
+- 只含空白的字符串，safe_strip 返回 ''；这里视为缺失
+
+用法：
+    python cleaning.py --bench 1000000
+"""
+
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# 配置
+# ============================================================
+
+MISSING_TOKENS = ('', 'N/A')
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+BENCH_ROWS = 200_000
+
+# ============================================================
+# 1. 规则计数
+# ============================================================
+
+class CleaningStats:
+    """按 (列, 规则) 统计被拒绝或置空的值"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, column, rule, count):
+        count = int(count)
+        if count:
+            key = (column, rule)
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def total(self, rule=None):
+        return sum(v for (_, r), v in self.counts.items() if rule is None or r == rule)
+
+    def report(self, indent='   '):
+        if not self.counts:
+            print(f"{indent}清洗规则: 无被拒绝的值")
+            return
+        print(f"{indent}清洗规则计数:")
+        for (column, rule), count in sorted(self.counts.items()):
+            print(f"{indent}   {column:28s} {rule:14s} {count:>10,}")
+
+def _record(stats, column, rule, mask):
+    if stats is not None:
+        stats.add(column, rule, np.count_nonzero(mask))
+
+# ============================================================
+# 2. 列式清洗函数
+# ============================================================
+
+def _as_series(values):
+    if isinstance(values, pd.Series):
+        return values.reset_index(drop=True)
+    return pd.Series(values, dtype=object)
+
+def _text(values):
+    """→ (去首尾空白的字符串 Series, 缺失掩码)；非字符串值先 str()"""
+    s = _as_series(values)
+    missing = s.isna().to_numpy()
+    text = s.where(~missing, '').astype(str).str.strip()
+    missing = missing | text.isin(MISSING_TOKENS).to_numpy()
+    return text, missing
+
+def _encode(values):
+    """字典编码：→ (codes, 去重后的值)；None / NaN 的 code 为 -1
+
+    目录里的分类与日期列重复度很高（国家、类型、发射日期），
+    字符串处理只在去重后的值上做一次，再按 codes 取回整列
+    """
+    codes, uniques = pd.factorize(_as_series(values), use_na_sentinel=True)
+    return codes, np.asarray(uniques, dtype=object)
+
+def _decode(codes, cleaned, missing_unique):
+    """去重值上的清洗结果 → 整列对象数组（缺失为 None）与缺失掩码"""
+    cleaned = np.append(np.where(missing_unique, None, cleaned), None)
+    missing = np.append(missing_unique, True)[codes]
+    return cleaned[codes], missing
+
+def clean_float(values, column='value', stats=None):
+    """数值列 → float64 数组，缺失 / 无法解析 / 非有限值为 NaN"""
+    s = _as_series(values)
+    if s.dtype.kind in 'fiu':
+        result = s.to_numpy(dtype=np.float64, copy=True)
+        missing = np.isnan(result)
+        bad = np.zeros(len(result), dtype=bool)
+    else:
+        # 整列交给 C 实现的数值转换，只有转换失败的少数值再做字符串判断
+        result = pd.to_numeric(s, errors='coerce').to_numpy(dtype=np.float64, copy=True)
+        failed = np.flatnonzero(np.isnan(result))
+        _, failed_missing = _text(s.iloc[failed])
+        missing = np.zeros(len(result), dtype=bool)
+        missing[failed[failed_missing]] = True
+        # 原值非缺失但转换为 NaN：无法解析，或字面量 'nan'
+        bad = np.isnan(result) & ~missing
+    non_finite = np.isinf(result)
+    _record(stats, column, 'missing', missing)
+    _record(stats, column, 'unparseable', bad)
+    _record(stats, column, 'non_finite', non_finite)
+    result[non_finite] = np.nan
+    return result
+
+def clean_int(values, column='id', stats=None):
+    """编号列 → Python int / None 对象数组（可直接写入 INTEGER 列）"""
+    f = clean_float(values, column, stats)
+    valid = ~np.isnan(f)
+    fractional = valid & (f != np.round(f))
+    _record(stats, column, 'non_integer', fractional)
+    valid &= ~fractional
+    result = np.full(len(f), None, dtype=object)
+    result[valid] = f[valid].astype(np.int64).tolist()
+    return result
+
+def clean_date(values, column='date', stats=None):
+    """日期列 → YYYY-MM-DD 字符串对象数组（无效为 None）"""
+    codes, uniques = _encode(values)
+    text, missing_u = _text(uniques)
+    head = text.str.slice(0, 10)
+    formatted_u = head.str.fullmatch(DATE_PATTERN).to_numpy(dtype=bool) & ~missing_u
+
+    month = pd.to_numeric(head.str.slice(5, 7).where(formatted_u), errors='coerce').to_numpy()
+    day = pd.to_numeric(head.str.slice(8, 10).where(formatted_u), errors='coerce').to_numpy()
+    valid_u = formatted_u & (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+
+    result, invalid = _decode(codes, head.to_numpy(dtype=object), ~valid_u)
+    missing = np.append(missing_u, True)[codes]
+    formatted = np.append(formatted_u, False)[codes]
+    _record(stats, column, 'missing', missing)
+    _record(stats, column, 'bad_format', ~missing & ~formatted)
+    _record(stats, column, 'out_of_range', formatted & invalid)
+    return result
+
+def clean_strip(values, column='text', stats=None):
+    """文本列 → 去首尾空白的对象数组（缺失为 None）"""
+    codes, uniques = _encode(values)
+    text, missing_u = _text(uniques)
+    result, missing = _decode(codes, text.to_numpy(dtype=object), missing_u)
+    _record(stats, column, 'missing', missing)
+    return result
+
+def clean_upper(values, column='text', stats=None):
+    """分类字段 → 去空白并转大写的对象数组（缺失为 None）"""
+    codes, uniques = _encode(values)
+    text, missing_u = _text(uniques)
+    result, missing = _decode(codes, text.str.upper().to_numpy(dtype=object), missing_u)
+    _record(stats, column, 'missing', missing)
+    return result
+
+def get_column(df, name):
+    """取 DataFrame 的一列；源文件缺少该列时返回全缺失列"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series([None] * len(df), dtype=object)
+
+def to_sql_values(array):
+    """float 数组中的 NaN → None，便于 executemany 写入 NULL"""
+    array = np.asarray(array)
+    if array.dtype.kind == 'f':
+        return np.where(np.isnan(array), None, array.astype(object))
+    return array
+
+# ============================================================
+# 3. 基准测试
+# ============================================================
+
+def _messy_columns(n, seed=3, dirty_fraction=0.1):
+    """模拟 JSON / Excel 中常见的值分布：数值大多可解析、日期与分类高度重复，
+    其中 dirty_fraction 比例混入空白、大小写、'N/A'、NaN、Inf、坏日期"""
+    rng = np.random.default_rng(seed)
+    dirty = rng.random(n) < dirty_fraction
+
+    numbers = np.round(rng.lognormal(6, 1.5, n), 3).astype(str).astype(object)
+    numbers[dirty] = rng.choice(np.array([' 42 ', '1.2e-4', 'N/A', '', 'abc', 'inf', 'nan', None],
+                                         dtype=object), dirty.sum())
+
+    days = np.datetime64('1957-10-04') + rng.integers(0, 25_000, n).astype('timedelta64[D]')
+    dates = days.astype(str).astype(object)
+    dates[dirty] = rng.choice(np.array(['2024-13-01', '2024-02-30T12:00:00', 'N/A', None,
+                                        '15/03/2024', '1999-12-31 00:00:00', ''], dtype=object), dirty.sum())
+
+    text = rng.choice(np.array(['LEO', 'GEO', 'MEO', 'Elliptical', 'PAYLOAD', 'DEBRIS', 'ROCKET BODY'],
+                               dtype=object), n)
+    text[dirty] = rng.choice(np.array(['  leo ', 'N/A', '', None, 'Meo'], dtype=object), dirty.sum())
+    return numbers, dates, text
+
+def _equal(a, b):
+    # 标量路径用 None 表示无效数值，列式路径用 NaN
+    if isinstance(b, float) and b != b:
+        b = None
+    if a is None or b is None:
+        return a is None and b is None
+    return a == b
+
+def run_benchmark(n_rows=BENCH_ROWS):
+    from create_database import print_header, safe_float, safe_date, safe_upper, safe_strip
+
+    print_header(f"基准测试: 列式清洗 vs 逐值 safe_* ({n_rows:,} 行 × 4 列)")
+    numbers, dates, text = _messy_columns(n_rows)
+    cases = [
+        ('数值', numbers, safe_float, clean_float),
+        ('日期', dates, safe_date, clean_date),
+        ('大写', text, safe_upper, clean_upper),
+        ('去空白', text, safe_strip, clean_strip),
+    ]
+    total_scalar = total_vector = 0.0
+    total_differ = 0
+    stats = CleaningStats()
+    for label, values, scalar, vector in cases:
+        t = time.perf_counter()
+        expected = [scalar(v) for v in values]
+        t_scalar = time.perf_counter() - t
+
+        t = time.perf_counter()
+        result = vector(values, label, stats)
+        t_vector = time.perf_counter() - t
+        total_scalar += t_scalar
+        total_vector += t_vector
+
+        got = result.tolist()
+        differ = sum(not _equal(a, b) for a, b in zip(expected, got))
+        total_differ += differ
+        print(f"   {label:6s} 标量 {t_scalar * 1000:8.1f} ms  列式 {t_vector * 1000:7.1f} ms  "
+              f"加速 {t_scalar / t_vector:5.1f}×  与标量不同 {differ:,} 个")
+    print(f"   合计   标量 {total_scalar * 1000:8.1f} ms  列式 {total_vector * 1000:7.1f} ms  "
+          f"加速 {total_scalar / total_vector:5.1f}×")
+    if total_differ:
+        print("   💡 差异来自有意修正：只含空白的字符串视为缺失")
+    stats.report()
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 列式数据清洗")
+    parser.add_argument('--bench', type=int, metavar='ROWS', default=BENCH_ROWS, help="基准测试行数")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 列式数据清洗")
+    print("="*70)
+    run_benchmark(args.bench)
+
+if __name__ == "__main__":
+    main()
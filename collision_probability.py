@@ -0,0 +1,455 @@
+"""
+OrbitalGuard - 碰撞概率计算 (Vectorized Collision Probability)
+==============================================================
+功能：
+1. 从 Orbits 在轨目录中筛选近距离候选对（时间采样 + 网格近邻搜索）
+2. 对每个候选对迭代求解最近接近时刻 (TCA)，得到脱靶距离与真实相对速度
+3. 按 rcs_size 设定假定协方差与硬体半径，计算二维相遇平面碰撞概率 Pc
+4. 结果写入 Conjunctions 表并按 Pc 排序
+5. 向量化实现与逐对标量参考实现的吞吐量对比 (pairs/sec)
+
+与 v_collision_risks / Query 1.1 的区别：
+- 旧视图用 ABS(mean_motion 差) * 7.91 作为"相对速度"，该量并非速度，也不含概率
+- 本模块的相对速度来自 TCA 时刻两物体速度矢量之差，风险等级由 Pc 决定
+
+Pc 计算方法：
+- 两物体协方差在各自 RTN 坐标系中为对角阵，转换到惯性系后相加
+- 投影到垂直于相对速度的相遇平面，得到 2×2 协方差
+- 在半径为 HBR (两物体硬体半径之和) 的圆上对二维正态密度做极坐标高斯求积
+
+用法：
+    python collision_probability.py                 # 默认 24 小时窗口
+    python collision_probability.py --hours 72 --threshold 10
+    python collision_probability.py --bench 5000    # 只运行吞吐量对比
+"""
+
+import sqlite3
+import argparse
+import math
+import time
+from datetime import datetime
+
+import numpy as np
+
+from create_database import DB_NAME, print_header
+import orbit_math as om
+
+# ============================================================
+# 配置
+# ============================================================
+
+WINDOW_HOURS = 24
+SCREEN_STEP_SECONDS = 20
+MISS_THRESHOLD_KM = 5.0
+# LEO 最大相对速度约 15.5 km/s：采样间隔内相对位移上限，用于放大筛选半径
+MAX_RELATIVE_SPEED_KM_S = 15.5
+TCA_ITERATIONS = 6
+
+# 假定位置不确定度 (RTN, km)：尺寸越小跟踪越差，沿迹方向误差最大
+SIGMA_RTN_KM = {
+    'LARGE': (0.1, 0.5, 0.1),
+    'MEDIUM': (0.2, 1.0, 0.2),
+    'SMALL': (0.4, 2.0, 0.4),
+}
+DEFAULT_SIGMA_RTN_KM = (0.3, 1.5, 0.3)
+
+# 硬体半径 (m)
+HBR_M = {
+    'LARGE': 5.0,
+    'MEDIUM': 1.0,
+    'SMALL': 0.1,
+}
+DEFAULT_HBR_M = 1.0
+
+# 风险等级阈值（Pc ≥ 1e-4 为常用机动决策门限）
+PC_LEVELS = [
+    (1e-4, 'CRITICAL'),
+    (1e-5, 'HIGH'),
+    (1e-7, 'MEDIUM'),
+]
+
+# 极坐标求积节点
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(8)
+N_THETA = 32
+
+# ============================================================
+# 1. 候选对筛选
+# ============================================================
+
+def screen_candidates(elements, start, hours=WINDOW_HOURS, step=SCREEN_STEP_SECONDS,
+                      threshold=MISS_THRESHOLD_KM):
+    """按固定步长采样位置，网格搜索出可能在窗口内接近到 threshold 以内的物体对
+
+    采样间隔内两物体最多相对移动 MAX_RELATIVE_SPEED_KM_S * step，
+    因此筛选半径取 threshold + 该距离的一半，保证不漏掉步间的接近。
+
+    Returns:
+        (i, j, t0)：物体下标对与采样到最小距离的时刻，作为 TCA 迭代初值
+    """
+    radius = threshold + MAX_RELATIVE_SPEED_KM_S * step / 2
+    n = len(elements['norad_id'])
+    keys, dists, times = [np.empty(0, dtype=np.int64)], [np.empty(0)], [np.empty(0)]
+
+    for k, t in enumerate(np.arange(start, start + hours * 3600 + step, step)):
+        r, _ = om.propagate(elements, t)
+        i, j = om.find_close_pairs(r, radius)
+        keys.append(i * n + j)
+        dists.append(np.linalg.norm(r[i] - r[j], axis=-1))
+        times.append(np.full(len(i), t))
+        # 定期归并，只保留每对的最小距离，控制内存
+        if k % 100 == 99:
+            keys, dists, times = [[a] for a in _keep_closest(keys, dists, times)]
+
+    keys, _, t0 = _keep_closest(keys, dists, times)
+    return keys // n, keys % n, t0
+
+def _keep_closest(keys, dists, times):
+    """合并各步结果，每个物体对只保留距离最小的一次采样"""
+    keys, dists, times = np.concatenate(keys), np.concatenate(dists), np.concatenate(times)
+    order = np.lexsort((dists, keys))
+    keys, dists, times = keys[order], dists[order], times[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    return keys[first], dists[first], times[first]
+
+# ============================================================
+# 2. TCA 与相遇几何（向量化）
+# ============================================================
+
+def refine_tca(el_a, el_b, t0, t_min, t_max, iterations=TCA_ITERATIONS):
+    """牛顿迭代求 f(t) = Δr·Δv = 0，即相对距离的极小点
+
+    f'(t) = |Δv|² + Δr·Δa，Δa 取二体引力加速度之差。
+    """
+    t = np.array(t0, dtype=np.float64)
+    for _ in range(iterations):
+        ra, va = om.propagate(el_a, t)
+        rb, vb = om.propagate(el_b, t)
+        dr, dv = rb - ra, vb - va
+        acc_a = -om.MU_EARTH * ra / np.linalg.norm(ra, axis=-1, keepdims=True)**3
+        acc_b = -om.MU_EARTH * rb / np.linalg.norm(rb, axis=-1, keepdims=True)**3
+        f = np.einsum('ij,ij->i', dr, dv)
+        df = np.einsum('ij,ij->i', dv, dv) + np.einsum('ij,ij->i', dr, acc_b - acc_a)
+        step = np.where(df > 0, f / np.where(df > 0, df, 1.0), 0.0)
+        t = np.clip(t - step, t_min, t_max)
+
+    ra, va = om.propagate(el_a, t)
+    rb, vb = om.propagate(el_b, t)
+    return t, ra, va, rb, vb
+
+def rtn_covariance(r, v, sigma_rtn):
+    """各物体 RTN 对角协方差 → 惯性系 3×3 协方差 (P, 3, 3)"""
+    r_hat = r / np.linalg.norm(r, axis=-1, keepdims=True)
+    h = np.cross(r, v)
+    n_hat = h / np.linalg.norm(h, axis=-1, keepdims=True)
+    t_hat = np.cross(n_hat, r_hat)
+    basis = np.stack([r_hat, t_hat, n_hat], axis=-1)          # 列向量为 R, T, N
+    return np.einsum('pik,pk,pjk->pij', basis, sigma_rtn**2, basis)
+
+def encounter_plane(dr, dv, cov):
+    """投影到相遇平面：返回脱靶距离 (km) 与 2×2 协方差"""
+    v_hat = dv / np.linalg.norm(dv, axis=-1, keepdims=True)
+    miss_vec = dr - np.einsum('ij,ij->i', dr, v_hat)[:, None] * v_hat
+    miss = np.linalg.norm(miss_vec, axis=-1)
+
+    # 脱靶矢量为零时任取一个垂直于 v 的方向
+    fallback = np.cross(v_hat, np.array([0.0, 0.0, 1.0]))
+    fallback_bad = np.linalg.norm(fallback, axis=-1) < 1e-8
+    fallback[fallback_bad] = np.cross(v_hat[fallback_bad], np.array([1.0, 0.0, 0.0]))
+    e1 = np.where((miss > 1e-12)[:, None], miss_vec, fallback)
+    e1 /= np.linalg.norm(e1, axis=-1, keepdims=True)
+    e2 = np.cross(v_hat, e1)
+
+    B = np.stack([e1, e2], axis=-1)                           # (P, 3, 2)
+    cov2 = np.einsum('pki,pkl,plj->pij', B, cov, B)
+    return miss, cov2
+
+def pc_2d(miss, cov2, hbr_km):
+    """二维相遇平面碰撞概率：∫∫_{|x|<HBR} N(x; (miss, 0), C) dA"""
+    det = cov2[:, 0, 0] * cov2[:, 1, 1] - cov2[:, 0, 1]**2
+    inv00 = cov2[:, 1, 1] / det
+    inv11 = cov2[:, 0, 0] / det
+    inv01 = -cov2[:, 0, 1] / det
+
+    # 径向 Gauss-Legendre 节点映射到 [0, HBR]，角向均匀节点
+    radius = (_GL_NODES[None, :] + 1) / 2 * hbr_km[:, None]             # (P, R)
+    theta = np.arange(N_THETA) * (2 * np.pi / N_THETA)
+    x = radius[:, :, None] * np.cos(theta)[None, None, :] - miss[:, None, None]
+    y = radius[:, :, None] * np.sin(theta)[None, None, :]
+    quad = (inv00[:, None, None] * x**2 + 2 * inv01[:, None, None] * x * y
+            + inv11[:, None, None] * y**2)
+    density = np.exp(-0.5 * quad) / (2 * np.pi * np.sqrt(det))[:, None, None]
+
+    weights = (_GL_WEIGHTS[None, :] * hbr_km[:, None] / 2) * radius     # (P, R)
+    integral = (density.sum(axis=2) * (2 * np.pi / N_THETA) * weights).sum(axis=1)
+    return np.clip(integral, 0.0, 1.0)
+
+def size_parameters(rcs_sizes):
+    """rcs_size 列 → (RTN 标准差数组 (P, 3), 硬体半径 km (P,))"""
+    sigma = np.array([SIGMA_RTN_KM.get(s, DEFAULT_SIGMA_RTN_KM) for s in rcs_sizes])
+    hbr = np.array([HBR_M.get(s, DEFAULT_HBR_M) for s in rcs_sizes]) / 1000.0
+    return sigma, hbr
+
+def compute_conjunctions(elements, i, j, t0, t_min, t_max):
+    """对候选对批量计算 TCA、脱靶距离、相对速度与 Pc（全部向量化）"""
+    el_a, el_b = om.subset(elements, i), om.subset(elements, j)
+    tca, ra, va, rb, vb = refine_tca(el_a, el_b, t0, t_min, t_max)
+
+    sigma_a, hbr_a = size_parameters(el_a['rcs_size'])
+    sigma_b, hbr_b = size_parameters(el_b['rcs_size'])
+    cov = rtn_covariance(ra, va, sigma_a) + rtn_covariance(rb, vb, sigma_b)
+
+    dr, dv = rb - ra, vb - va
+    miss, cov2 = encounter_plane(dr, dv, cov)
+    hbr = hbr_a + hbr_b
+    pc = pc_2d(miss, cov2, hbr)
+
+    return {
+        'object1_id': el_a['norad_id'],
+        'object2_id': el_b['norad_id'],
+        'tca': tca,
+        'miss_distance_km': miss,
+        'relative_velocity_km_s': np.linalg.norm(dv, axis=-1),
+        'hbr_m': hbr * 1000.0,
+        'pc': pc,
+    }
+
+# ============================================================
+# 3. 标量参考实现（逐对 Python 循环，用于校验与基准对比）
+# ============================================================
+
+def _vec_sub(a, b):
+    return [a[0] - b[0], a[1] - b[1], a[2] - b[2]]
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _cross(a, b):
+    return [a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]]
+
+def _norm(a):
+    return math.sqrt(_dot(a, a))
+
+def _propagate_scalar(el, t):
+    inc = math.radians(el['inclination_deg'])
+    e = el['eccentricity']
+    n = el['mean_motion'] * 2 * math.pi / om.SECONDS_PER_DAY
+    a = (om.MU_EARTH / n**2) ** (1 / 3)
+    p = a * (1 - e**2)
+    factor = 1.5 * om.J2 * (om.R_EARTH / p)**2 * n
+    dt = t - el['epoch']
+    raan = math.radians(el['ra_of_asc_node']) - factor * math.cos(inc) * dt
+    argp = math.radians(el['arg_of_pericenter']) + factor * (2.0 - 2.5 * math.sin(inc)**2) * dt
+    M = (math.radians(el['mean_anomaly']) + n * dt) % (2 * math.pi)
+    E = M if e < 0.8 else math.pi
+    for _ in range(8):
+        E -= (E - e * math.sin(E) - M) / (1 - e * math.cos(E))
+    x_pf, y_pf = a * (math.cos(E) - e), a * math.sqrt(1 - e**2) * math.sin(E)
+    v_scale = math.sqrt(om.MU_EARTH * a) / (a * (1 - e * math.cos(E)))
+    vx_pf, vy_pf = -v_scale * math.sin(E), v_scale * math.sqrt(1 - e**2) * math.cos(E)
+    cO, sO, cw, sw, ci, si = (math.cos(raan), math.sin(raan), math.cos(argp),
+                              math.sin(argp), math.cos(inc), math.sin(inc))
+    P = [cO * cw - sO * sw * ci, sO * cw + cO * sw * ci, sw * si]
+    Q = [-cO * sw - sO * cw * ci, -sO * sw + cO * cw * ci, cw * si]
+    r = [P[k] * x_pf + Q[k] * y_pf for k in range(3)]
+    v = [P[k] * vx_pf + Q[k] * vy_pf for k in range(3)]
+    return r, v
+
+def conjunction_scalar(el_a, el_b, t0, t_min, t_max):
+    """单对参考实现，与 compute_conjunctions 的数学步骤一一对应"""
+    t = t0
+    for _ in range(TCA_ITERATIONS):
+        ra, va = _propagate_scalar(el_a, t)
+        rb, vb = _propagate_scalar(el_b, t)
+        dr, dv = _vec_sub(rb, ra), _vec_sub(vb, va)
+        acc = [-om.MU_EARTH * rb[k] / _norm(rb)**3 + om.MU_EARTH * ra[k] / _norm(ra)**3 for k in range(3)]
+        df = _dot(dv, dv) + _dot(dr, acc)
+        if df > 0:
+            t = min(max(t - _dot(dr, dv) / df, t_min), t_max)
+    ra, va = _propagate_scalar(el_a, t)
+    rb, vb = _propagate_scalar(el_b, t)
+
+    cov = [[0.0] * 3 for _ in range(3)]
+    hbr = 0.0
+    for r, v, size in ((ra, va, el_a['rcs_size']), (rb, vb, el_b['rcs_size'])):
+        sigma = SIGMA_RTN_KM.get(size, DEFAULT_SIGMA_RTN_KM)
+        hbr += HBR_M.get(size, DEFAULT_HBR_M) / 1000.0
+        r_hat = [c / _norm(r) for c in r]
+        h = _cross(r, v)
+        n_hat = [c / _norm(h) for c in h]
+        t_hat = _cross(n_hat, r_hat)
+        for row in range(3):
+            for col in range(3):
+                cov[row][col] += sum(axis[row] * axis[col] * s**2
+                                     for axis, s in zip((r_hat, t_hat, n_hat), sigma))
+
+    dr, dv = _vec_sub(rb, ra), _vec_sub(vb, va)
+    v_hat = [c / _norm(dv) for c in dv]
+    along = _dot(dr, v_hat)
+    miss_vec = [dr[k] - along * v_hat[k] for k in range(3)]
+    miss = _norm(miss_vec)
+    e1 = [c / miss for c in miss_vec] if miss > 1e-12 else None
+    if e1 is None:
+        e1 = _cross(v_hat, [0.0, 0.0, 1.0])
+        if _norm(e1) < 1e-8:
+            e1 = _cross(v_hat, [1.0, 0.0, 0.0])
+        e1 = [c / _norm(e1) for c in e1]
+    e2 = _cross(v_hat, e1)
+    basis = (e1, e2)
+    c2 = [[sum(basis[a][r] * cov[r][c] * basis[b][c] for r in range(3) for c in range(3))
+           for b in range(2)] for a in range(2)]
+
+    det = c2[0][0] * c2[1][1] - c2[0][1]**2
+    pc = 0.0
+    for node, weight in zip(_GL_NODES.tolist(), _GL_WEIGHTS.tolist()):
+        rho = (node + 1) / 2 * hbr
+        ring = 0.0
+        for k in range(N_THETA):
+            theta = k * 2 * math.pi / N_THETA
+            x, y = rho * math.cos(theta) - miss, rho * math.sin(theta)
+            quad = (c2[1][1] * x * x - 2 * c2[0][1] * x * y + c2[0][0] * y * y) / det
+            ring += math.exp(-0.5 * quad) / (2 * math.pi * math.sqrt(det))
+        pc += ring * (2 * math.pi / N_THETA) * weight * hbr / 2 * rho
+    return t, miss, _norm(dv), min(max(pc, 0.0), 1.0)
+
+# ============================================================
+# 4. 存储
+# ============================================================
+
+def risk_level(pc):
+    for threshold, level in PC_LEVELS:
+        if pc >= threshold:
+            return level
+    return 'LOW'
+
+def create_conjunction_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS Conjunctions (
+            risk_rank INTEGER PRIMARY KEY,
+            object1_id INTEGER,
+            object2_id INTEGER,
+            tca TEXT,
+            miss_distance_km REAL,
+            relative_velocity_km_s REAL,
+            hbr_m REAL,
+            pc REAL,
+            risk_level TEXT,
+            computed_at TEXT,
+            FOREIGN KEY (object1_id) REFERENCES SpaceObjects(norad_id),
+            FOREIGN KEY (object2_id) REFERENCES SpaceObjects(norad_id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conjunctions_object1 ON Conjunctions(object1_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conjunctions_object2 ON Conjunctions(object2_id)")
+
+def store_conjunctions(conn, results, threshold=MISS_THRESHOLD_KM):
+    """保留脱靶距离在阈值内的事件，按 Pc 降序写入 Conjunctions（整表替换）"""
+    keep = results['miss_distance_km'] < threshold
+    order = np.lexsort((results['miss_distance_km'][keep], -results['pc'][keep]))
+    computed_at = datetime.now().isoformat(timespec='seconds')
+
+    rows = []
+    for rank, k in enumerate(np.flatnonzero(keep)[order], start=1):
+        pc = float(results['pc'][k])
+        rows.append((rank, int(results['object1_id'][k]), int(results['object2_id'][k]),
+                     om.unix_to_iso(results['tca'][k]), float(results['miss_distance_km'][k]),
+                     float(results['relative_velocity_km_s'][k]), float(results['hbr_m'][k]),
+                     pc, risk_level(pc), computed_at))
+
+    create_conjunction_table(conn)
+    conn.execute("DELETE FROM Conjunctions")
+    conn.executemany("INSERT INTO Conjunctions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    return len(rows)
+
+# ============================================================
+# 5. 基准测试
+# ============================================================
+
+def benchmark(elements, n_pairs, start):
+    print_header(f"吞吐量对比: 向量化 vs 标量参考 ({n_pairs:,} 对)")
+
+    rng = np.random.default_rng(7)
+    n = len(elements['norad_id'])
+    i = rng.integers(0, n, n_pairs)
+    j = (i + rng.integers(1, n, n_pairs)) % n
+    t0 = start + rng.uniform(0, WINDOW_HOURS * 3600, n_pairs)
+    t_min, t_max = start, start + WINDOW_HOURS * 3600
+
+    t_vec = time.perf_counter()
+    results = compute_conjunctions(elements, i, j, t0, t_min, t_max)
+    t_vec = time.perf_counter() - t_vec
+
+    n_scalar = min(n_pairs, 500)
+    rows = [{k: v[idx] for k, v in elements.items()} for idx in range(n)]
+    t_sca = time.perf_counter()
+    scalar = [conjunction_scalar(rows[i[k]], rows[j[k]], t0[k], t_min, t_max) for k in range(n_scalar)]
+    t_sca = time.perf_counter() - t_sca
+
+    vec_rate = n_pairs / t_vec
+    sca_rate = n_scalar / t_sca
+    print(f"   向量化:  {vec_rate:>12,.0f} pairs/sec ({t_vec * 1000:.1f} ms)")
+    print(f"   标量参考: {sca_rate:>12,.0f} pairs/sec (抽样 {n_scalar} 对)")
+    print(f"   加速比:   {vec_rate / sca_rate:>12.1f}×")
+
+    # 一致性校验
+    miss_err = max(abs(s[1] - results['miss_distance_km'][k]) for k, s in enumerate(scalar))
+    pc_err = max(abs(s[3] - results['pc'][k]) for k, s in enumerate(scalar))
+    print(f"   最大差异: 脱靶距离 {miss_err:.2e} km, Pc {pc_err:.2e}")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 碰撞概率计算")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--hours', type=float, default=WINDOW_HOURS, help="筛选时间窗口 (小时)")
+    parser.add_argument('--step', type=float, default=SCREEN_STEP_SECONDS, help="采样步长 (秒)")
+    parser.add_argument('--threshold', type=float, default=MISS_THRESHOLD_KM, help="脱靶距离阈值 (km)")
+    parser.add_argument('--bench', type=int, metavar='PAIRS', help="只运行吞吐量对比")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 碰撞概率 (Pc) 计算")
+    print("="*70)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        elements = om.load_elements(conn, extra_columns=('rcs_size',))
+        # 窗口从目录中最新的历元开始，避免对陈旧数据外推过久
+        start = float(elements['epoch'].max())
+        print(f"📊 在轨物体: {len(elements['norad_id']):,} 个")
+        print(f"🕒 窗口: {om.unix_to_iso(start)[:19]} 起 {args.hours:g} 小时")
+
+        if args.bench:
+            benchmark(elements, args.bench, start)
+            return
+
+        print_header("候选对筛选")
+        t = time.time()
+        i, j, t0 = screen_candidates(elements, start, args.hours, args.step, args.threshold)
+        print(f"✅ 候选对: {len(i):,} ({time.time() - t:.1f}秒)")
+
+        print_header("TCA 与 Pc 计算")
+        t = time.time()
+        results = compute_conjunctions(elements, i, j, t0, start, start + args.hours * 3600)
+        stored = store_conjunctions(conn, results, args.threshold)
+        print(f"✅ 写入 Conjunctions: {stored:,} 条 ({time.time() - t:.2f}秒)")
+
+        top = conn.execute("""
+            SELECT c.risk_rank, s1.object_name, s2.object_name, c.tca,
+                   c.miss_distance_km, c.relative_velocity_km_s, c.pc, c.risk_level
+            FROM Conjunctions c
+            LEFT JOIN SpaceObjects s1 ON c.object1_id = s1.norad_id
+            LEFT JOIN SpaceObjects s2 ON c.object2_id = s2.norad_id
+            ORDER BY c.risk_rank LIMIT 10
+        """).fetchall()
+        for rank, name1, name2, tca, miss, vrel, pc, level in top:
+            print(f"   #{rank:<3d} {str(name1)[:20]:20s} × {str(name2)[:20]:20s} "
+                  f"TCA {tca[:19]}  {miss:6.3f} km  {vrel:5.2f} km/s  Pc={pc:.2e} {level}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+OrbitalGuard - 长时段交会筛选 (Verlet Neighbor-List Conjunction Screening)
+===========================================================================
+功能：
+1. 对 Orbits 在轨目录按固定步长推进 7 天，逐步找出近距离物体对
+2. 近邻表带安全余量 (skin)：建表半径 = 筛选半径 + skin，后续各步只检查表内物体对，
+   自建表以来位移最大的两个物体位移之和超过 skin 时才重建（此前表外物体对不可能进入筛选半径）
+3. 采样时刻按线性相对运动估计最近接近时刻，只保留"最近采样点"作为事件初值，
+   再用 collision_probability 的 TCA 牛顿迭代在步间精化，并计算 Pc
+4. 事件写入 ConjunctionEvents 表（整表替换），同一物体对的多次相遇分别记录
+5. 基准测试：每步重建网格 vs 近邻表复用，比较耗时并校验候选事件完全一致
+
+与 collision_probability.py 的区别：
+- 后者每个物体对在窗口内只保留一次最小采样距离，适合 24 小时快速排序
+- 本模块按相遇逐次记录事件，适合多日时段；每步不再对全目录做网格哈希
+
+筛选半径：threshold + MAX_RELATIVE_SPEED_KM_S × step / 2，保证相遇时刻附近的采样点一定落在半径内
+
+用法：
+    python conjunction_screening.py                          # 默认 7 天，步长 10 秒
+    python conjunction_screening.py --days 3 --threshold 10
+    python conjunction_screening.py --bench --hours 6        # 每步重建 vs 近邻表复用
+"""
+
+import sqlite3
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from create_database import DB_NAME, print_header
+import orbit_math as om
+import collision_probability as cp
+
+# ============================================================
+# 配置
+# ============================================================
+
+HORIZON_DAYS = 7
+STEP_SECONDS = 10
+MISS_THRESHOLD_KM = cp.MISS_THRESHOLD_KM
+# 近邻表安全余量 (km)：越大重建越少，但表内物体对越多
+SKIN_KM = 600.0
+# 每批同时推进的时间步数（(T, N, 3) 位置数组）
+STEPS_PER_BATCH = 32
+# 线性 TCA 估计落在 ±step/2 × 该系数内即视为最近采样点（略放宽，重复事件在精化后去除）
+NEAREST_SAMPLE_TOLERANCE = 1.1
+
+BENCH_HOURS = 6
+BENCH_SKINS = (300.0, 600.0, 1200.0, 2400.0)
+
+# ============================================================
+# 1. 近邻表
+# ============================================================
+
+def screening_radius(threshold, step):
+    return threshold + cp.MAX_RELATIVE_SPEED_KM_S * step / 2
+
+class NeighborList:
+    """带安全余量的 Verlet 近邻表
+
+    建表时记录所有距离 < radius + skin 的物体对及各物体参考位置。
+    任一表外物体对的距离至多减少两物体位移之和，因此只要位移最大的两个物体
+    位移之和不超过 skin，表外物体对就仍在 radius 之外，表可继续使用。
+    """
+
+    def __init__(self, radius, skin):
+        self.radius = radius
+        self.skin = skin
+        self.i = self.j = self.reference = None
+        self.builds = 0
+        self.steps = 0
+        self.pair_total = 0
+
+    def needs_rebuild(self, positions):
+        if self.reference is None:
+            return True
+        disp = np.linalg.norm(positions - self.reference, axis=-1)
+        if len(disp) < 2:
+            return False
+        top_two = np.partition(disp, len(disp) - 2)[-2:]
+        return top_two.sum() > self.skin
+
+    def build(self, positions):
+        self.i, self.j = om.find_close_pairs(positions, self.radius + self.skin)
+        self.reference = positions.copy()
+        self.builds += 1
+
+    def pairs(self, positions):
+        """返回当前时刻可能在 radius 内的物体对（必要时先重建）"""
+        if self.needs_rebuild(positions):
+            self.build(positions)
+        self.steps += 1
+        self.pair_total += len(self.i)
+        return self.i, self.j
+
+class RebuildEveryStep:
+    """对照组：每步对全目录做一次网格近邻搜索"""
+
+    def __init__(self, radius):
+        self.radius = radius
+        self.builds = 0
+        self.steps = 0
+        self.pair_total = 0
+
+    def pairs(self, positions):
+        i, j = om.find_close_pairs(positions, self.radius)
+        self.builds += 1
+        self.steps += 1
+        self.pair_total += len(i)
+        return i, j
+
+# ============================================================
+# 2. 逐步筛选
+# ============================================================
+
+def nearest_sample_events(r, v, i, j, t, radius, step):
+    """在单个采样时刻挑出"最近采样点"落在本步的相遇
+
+    线性相对运动下 TCA 偏移 τ = -(Δr·Δv)/|Δv|²；|τ| ≤ step/2 说明本采样点最接近该次相遇。
+    """
+    dr = r[j] - r[i]
+    close = np.einsum('ij,ij->i', dr, dr) < radius**2
+    i, j, dr = i[close], j[close], dr[close]
+    dv = v[j] - v[i]
+    tau = -np.einsum('ij,ij->i', dr, dv) / np.maximum(np.einsum('ij,ij->i', dv, dv), 1e-12)
+    nearest = np.abs(tau) <= step / 2 * NEAREST_SAMPLE_TOLERANCE
+    return i[nearest], j[nearest], t + tau[nearest]
+
+def screen(elements, start, hours, step=STEP_SECONDS, threshold=MISS_THRESHOLD_KM,
+           skin=SKIN_KM, neighbors=None):
+    """按步长推进并收集事件初值
+
+    Args:
+        neighbors: 近邻策略对象（NeighborList / RebuildEveryStep），默认 NeighborList
+
+    Returns:
+        (i, j, t0, neighbors)
+    """
+    radius = screening_radius(threshold, step)
+    if neighbors is None:
+        neighbors = NeighborList(radius, skin)
+    times = np.arange(start, start + hours * 3600 + step / 2, step)
+
+    found_i, found_j, found_t = [], [], []
+    for b in range(0, len(times), STEPS_PER_BATCH):
+        batch = times[b:b + STEPS_PER_BATCH]
+        r_batch, v_batch = om.propagate(elements, batch[:, None])
+        for t, r, v in zip(batch, r_batch, v_batch):
+            i, j = neighbors.pairs(r)
+            i, j, t0 = nearest_sample_events(r, v, i, j, t, radius, step)
+            found_i.append(i)
+            found_j.append(j)
+            found_t.append(t0)
+
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_t), neighbors
+
+def refine_events(elements, i, j, t0, start, end, step, threshold):
+    """步间 TCA 精化 + Pc；去掉脱靶距离超阈值的事件和同一相遇的重复初值"""
+    if len(i) == 0:
+        return None
+    t_min = np.maximum(t0 - step, start)
+    t_max = np.minimum(t0 + step, end)
+    results = cp.compute_conjunctions(elements, i, j, t0, t_min, t_max)
+
+    keep = results['miss_distance_km'] < threshold
+    results = {k: val[keep] for k, val in results.items()}
+    if len(results['tca']) == 0:
+        return results
+
+    # 同一物体对 TCA 相差不足一步的视为同一次相遇，保留脱靶距离最小者
+    order = np.lexsort((results['miss_distance_km'], results['tca'],
+                        results['object2_id'], results['object1_id']))
+    results = {k: val[order] for k, val in results.items()}
+    same_pair = ((results['object1_id'][1:] == results['object1_id'][:-1])
+                 & (results['object2_id'][1:] == results['object2_id'][:-1]))
+    duplicate = np.zeros(len(order), dtype=bool)
+    duplicate[1:] = same_pair & (np.diff(results['tca']) < step)
+    return {k: val[~duplicate] for k, val in results.items()}
+
+# ============================================================
+# 3. 存储
+# ============================================================
+
+def create_event_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ConjunctionEvents (
+            event_id INTEGER PRIMARY KEY,
+            object1_id INTEGER,
+            object2_id INTEGER,
+            tca TEXT,
+            miss_distance_km REAL,
+            relative_velocity_km_s REAL,
+            hbr_m REAL,
+            pc REAL,
+            risk_level TEXT,
+            computed_at TEXT,
+            FOREIGN KEY (object1_id) REFERENCES SpaceObjects(norad_id),
+            FOREIGN KEY (object2_id) REFERENCES SpaceObjects(norad_id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conj_events_tca ON ConjunctionEvents(tca)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conj_events_object1 ON ConjunctionEvents(object1_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_conj_events_object2 ON ConjunctionEvents(object2_id)")
+
+def store_events(conn, results):
+    """按 TCA 顺序写入 ConjunctionEvents（整表替换）"""
+    computed_at = datetime.now().isoformat(timespec='seconds')
+    rows = []
+    if results is not None:
+        for event_id, k in enumerate(np.argsort(results['tca'], kind='stable'), start=1):
+            pc = float(results['pc'][k])
+            rows.append((event_id, int(results['object1_id'][k]), int(results['object2_id'][k]),
+                         om.unix_to_iso(results['tca'][k]), float(results['miss_distance_km'][k]),
+                         float(results['relative_velocity_km_s'][k]), float(results['hbr_m'][k]),
+                         pc, cp.risk_level(pc), computed_at))
+
+    create_event_table(conn)
+    conn.execute("DELETE FROM ConjunctionEvents")
+    conn.executemany("INSERT INTO ConjunctionEvents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    return len(rows)
+
+# ============================================================
+# 4. 基准测试
+# ============================================================
+
+def _event_keys(i, j, t0, n):
+    # 物体对 + 采样时刻（取整到毫秒）唯一标识一个事件初值
+    return np.unique((i * n + j) * 10**10 + np.round((t0 - t0.min()) * 1000).astype(np.int64))
+
+def run_benchmark(elements, start, hours=BENCH_HOURS, step=STEP_SECONDS,
+                  threshold=MISS_THRESHOLD_KM, skins=BENCH_SKINS):
+    print_header(f"基准测试: 每步重建 vs 近邻表复用 ({hours:g} 小时, 步长 {step:g} 秒)")
+    n = len(elements['norad_id'])
+    radius = screening_radius(threshold, step)
+
+    t = time.perf_counter()
+    i, j, t0, base = screen(elements, start, hours, step, threshold,
+                            neighbors=RebuildEveryStep(radius))
+    base_time = time.perf_counter() - t
+    base_keys = _event_keys(i, j, t0, n) if len(i) else np.empty(0, dtype=np.int64)
+    print(f"   每步重建:    {base_time:7.2f} 秒  重建 {base.builds:,} 次  "
+          f"平均候选 {base.pair_total / base.steps:,.0f} 对/步  事件初值 {len(base_keys):,}")
+
+    for skin in skins:
+        t = time.perf_counter()
+        i, j, t0, nl = screen(elements, start, hours, step, threshold, skin=skin)
+        elapsed = time.perf_counter() - t
+        keys = _event_keys(i, j, t0, n) if len(i) else np.empty(0, dtype=np.int64)
+        same = '✅ 一致' if np.array_equal(keys, base_keys) else '❌ 不一致'
+        print(f"   skin {skin:5.0f} km: {elapsed:7.2f} 秒  重建 {nl.builds:,} 次 "
+              f"(每 {nl.steps / nl.builds:.1f} 步)  平均表长 {nl.pair_total / nl.steps:,.0f} 对  "
+              f"加速 {base_time / elapsed:.2f}×  {same}")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 长时段交会筛选")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--days', type=float, default=HORIZON_DAYS, help="筛选时段 (天)")
+    parser.add_argument('--hours', type=float, help="筛选时段 (小时，优先于 --days)")
+    parser.add_argument('--step', type=float, default=STEP_SECONDS, help="采样步长 (秒)")
+    parser.add_argument('--threshold', type=float, default=MISS_THRESHOLD_KM, help="脱靶距离阈值 (km)")
+    parser.add_argument('--skin', type=float, default=SKIN_KM, help="近邻表安全余量 (km)")
+    parser.add_argument('--bench', action='store_true', help="只运行基准测试")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 长时段交会筛选 (近邻表复用)")
+    print("="*70)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        elements = om.load_elements(conn, extra_columns=('rcs_size',))
+        start = float(elements['epoch'].max())
+        print(f"📊 在轨物体: {len(elements['norad_id']):,} 个")
+
+        if args.bench:
+            run_benchmark(elements, start, args.hours or BENCH_HOURS, args.step, args.threshold)
+            return
+
+        hours = args.hours or args.days * 24
+        end = start + hours * 3600
+        print(f"🕒 时段: {om.unix_to_iso(start)[:19]} 起 {hours:g} 小时, 步长 {args.step:g} 秒")
+
+        print_header("逐步筛选")
+        t = time.time()
+        i, j, t0, nl = screen(elements, start, hours, args.step, args.threshold, args.skin)
+        print(f"✅ 事件初值: {len(i):,} 个 ({time.time() - t:.1f}秒)")
+        print(f"   近邻表重建 {nl.builds:,} 次 / {nl.steps:,} 步, 平均表长 {nl.pair_total / nl.steps:,.0f} 对")
+
+        print_header("TCA 精化与 Pc")
+        t = time.time()
+        results = refine_events(elements, i, j, t0, start, end, args.step, args.threshold)
+        stored = store_events(conn, results)
+        print(f"✅ 写入 ConjunctionEvents: {stored:,} 条 ({time.time() - t:.2f}秒)")
+
+        top = conn.execute("""
+            SELECT e.tca, s1.object_name, s2.object_name, e.miss_distance_km,
+                   e.relative_velocity_km_s, e.pc, e.risk_level
+            FROM ConjunctionEvents e
+            LEFT JOIN SpaceObjects s1 ON e.object1_id = s1.norad_id
+            LEFT JOIN SpaceObjects s2 ON e.object2_id = s2.norad_id
+            ORDER BY e.pc DESC, e.miss_distance_km LIMIT 10
+        """).fetchall()
+        if top:
+            print("\n📌 Pc 最高的事件:")
+        for tca, name1, name2, miss, vrel, pc, level in top:
+            print(f"   {tca[:19]}  {str(name1)[:20]:20s} × {str(name2)[:20]:20s} "
+                  f"{miss:6.3f} km  {vrel:5.2f} km/s  Pc={pc:.2e} {level}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
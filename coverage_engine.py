@@ -0,0 +1,375 @@
+"""
+OrbitalGuard - 覆盖栅格计算 (Vectorized Coverage Raster)
+========================================================
+功能：
+1. 按 SatelliteDetails.operator_owner 选取星座，在时间网格上批量计算星下点轨迹
+2. 按最小仰角求每颗卫星的可见圆（地心角半径），逐纬度行求经度区间，
+   用差分数组 + 累加一次性写入全球 [时间, 纬度, 经度] 可见卫星数栅格
+3. 统计每个格网"至少 N 颗卫星可见"的时间占比、平均重访间隔，以及按面积加权的全球覆盖率
+4. 单颗卫星根数更新时，只减去旧轨迹贡献、加上新轨迹贡献（只触及其可见圆内的格网），无需重算整个星座
+
+与 Query 4.2 / 4.3 的区别：
+- 旧查询用"倾角 ≥ 纬度"近似覆盖，不考虑高度、仰角与卫星数量
+- 本模块给出每个格网的真实可见时间占比（球形地球、二体 + J2 轨道模型）
+
+可见圆：地心角 λ = arccos(R·cos ε / (R + h)) − ε，ε 为最小仰角，h 为卫星高度
+
+用法：
+    python coverage_engine.py --list                                    # 列出 ≥5 颗卫星的运营商
+    python coverage_engine.py --operator "Iridium Communications" --min-sats 1
+    python coverage_engine.py --operator "SpaceX" --hours 6 --step 30 --cell 1
+    python coverage_engine.py --operator "Iridium Communications" --bench
+"""
+
+import sqlite3
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from create_database import DB_NAME, print_header
+import orbit_math as om
+
+# ============================================================
+# 配置
+# ============================================================
+
+HOURS = 24
+STEP_SECONDS = 60
+CELL_DEG = 2.0
+MIN_ELEVATION_DEG = 10.0
+MIN_SATELLITES = 1
+# 每次处理的时间步数（控制差分数组内存）
+TIME_CHUNK = 120
+OUTPUT_DIR = 'coverage'
+
+# 与 Query 4.2 相同的纬度分区（按 |纬度| 下界）
+LATITUDE_REGIONS = [
+    (75, 'Polar (≥75°)'),
+    (60, 'High Latitude (60-75°)'),
+    (45, 'High Mid-Latitude (45-60°)'),
+    (0, 'Mid-Low Latitude (<45°)'),
+]
+
+# ============================================================
+# 1. 数据加载
+# ============================================================
+
+def load_constellation(conn, operator):
+    """在轨 PAYLOAD 中 operator_owner 匹配（不区分大小写）的卫星根数"""
+    elements = om.load_elements(conn, extra_columns=('object_type',))
+    owners = pd.read_sql_query("""
+        SELECT norad_id FROM SatelliteDetails WHERE UPPER(operator_owner) = UPPER(?)
+    """, conn, params=(operator,))['norad_id'].to_numpy()
+    mask = np.isin(elements['norad_id'], owners) & (elements['object_type'] == 'PAYLOAD')
+    return om.subset(elements, mask)
+
+def list_operators(conn, min_satellites=5):
+    return conn.execute("""
+        SELECT sd.operator_owner, COUNT(*)
+        FROM SpaceObjects s
+        INNER JOIN SatelliteDetails sd ON s.norad_id = sd.norad_id
+        WHERE s.decay_date IS NULL AND s.object_type = 'PAYLOAD'
+          AND sd.operator_owner IS NOT NULL
+        GROUP BY sd.operator_owner
+        HAVING COUNT(*) >= ?
+        ORDER BY COUNT(*) DESC
+    """, (min_satellites,)).fetchall()
+
+# ============================================================
+# 2. 覆盖引擎
+# ============================================================
+
+def footprint_half_angle(altitude_km, min_elevation_deg=MIN_ELEVATION_DEG):
+    """可见圆地心角半径 (rad)"""
+    eps = np.radians(min_elevation_deg)
+    ratio = om.R_EARTH / (om.R_EARTH + np.maximum(altitude_km, 0.0))
+    return np.arccos(ratio * np.cos(eps)) - eps
+
+class CoverageEngine:
+    """星座覆盖栅格
+
+    Attributes:
+        times: 时间网格 (UNIX 秒)
+        lat, lon: 格网中心 (度)
+        counts: (T, n_lat, n_lon) 每个时刻每个格网可见的卫星数
+        elements: 当前参与计算的根数（与 counts 一致）
+    """
+
+    def __init__(self, elements, start, hours=HOURS, step=STEP_SECONDS,
+                 cell_deg=CELL_DEG, min_elevation_deg=MIN_ELEVATION_DEG):
+        self.times = start + np.arange(0.0, hours * 3600, step)
+        self.step = step
+        self.cell = cell_deg
+        self.min_elevation = min_elevation_deg
+        self.n_lat = int(round(180 / cell_deg))
+        self.n_lon = int(round(360 / cell_deg))
+        self.lat = -90 + (np.arange(self.n_lat) + 0.5) * cell_deg
+        self.lon = -180 + (np.arange(self.n_lon) + 0.5) * cell_deg
+
+        self.elements = {k: v.copy() for k, v in elements.items()}
+        self.counts = np.zeros((len(self.times), self.n_lat, self.n_lon), dtype=np.uint16)
+        self._accumulate(self.elements, +1)
+
+    # ---------- 轨迹 → 栅格 ----------
+
+    def _intervals(self, elements, times):
+        """每个 (时刻, 卫星, 纬度行) 的经度格网区间
+
+        Returns:
+            (时间下标, 纬度行, 起始经度列, 列数)，均为一维数组
+        """
+        t = times[:, None]
+        r, _ = om.propagate(elements, t)
+        lat_s, lon_s, alt = om.eci_to_lat_lon(r, t)
+        half = np.degrees(footprint_half_angle(alt, self.min_elevation))
+
+        # 可见圆覆盖的纬度行：中心纬度落在 [lat_s - λ, lat_s + λ] 内
+        row_lo = np.ceil((lat_s - half + 90) / self.cell - 0.5).astype(np.int64)
+        row_hi = np.floor((lat_s + half + 90) / self.cell - 0.5).astype(np.int64)
+        n_rows = int(np.ceil(2 * half.max() / self.cell)) + 2
+        rows = row_lo[..., None] + np.arange(n_rows)
+        ok = (rows <= row_hi[..., None]) & (rows >= 0) & (rows < self.n_lat)
+
+        # 球面余弦定理：该纬度上到星下点地心角 ≤ λ 的经度半宽
+        phi = np.radians(-90 + (np.clip(rows, 0, self.n_lat - 1) + 0.5) * self.cell)
+        phi_s = np.radians(lat_s)[..., None]
+        lam = np.radians(half)[..., None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cos_dlon = (np.cos(lam) - np.sin(phi) * np.sin(phi_s)) / (np.cos(phi) * np.cos(phi_s))
+        ok &= cos_dlon <= 1.0
+        dlon = np.degrees(np.arccos(np.clip(cos_dlon, -1.0, 1.0)))
+
+        centre = (lon_s + 180)[..., None] / self.cell - 0.5
+        col_lo = np.ceil(centre - dlon / self.cell).astype(np.int64)
+        col_hi = np.floor(centre + dlon / self.cell).astype(np.int64)
+        length = np.minimum(col_hi - col_lo + 1, self.n_lon)
+        ok &= length > 0
+
+        t_idx = np.broadcast_to(np.arange(len(times))[:, None, None], rows.shape)
+        return t_idx[ok], rows[ok], np.mod(col_lo[ok], self.n_lon), length[ok]
+
+    def _hits(self, elements, lo, hi):
+        """时间步 [lo, hi) 内各格网被 elements 中卫星覆盖的次数 (hi-lo, n_lat, n_lon)"""
+        times = self.times[lo:hi]
+        t_idx, rows, start, length = self._intervals(elements, times)
+
+        # 环形区间：在长度 2·n_lon 的差分数组上 +1 / -1，累加后两半折叠
+        width = 2 * self.n_lon
+        base = (t_idx * self.n_lat + rows) * width
+        size = len(times) * self.n_lat * width
+        diff = (np.bincount(base + start, minlength=size)
+                - np.bincount(base + start + length, minlength=size))
+        acc = np.cumsum(diff.reshape(len(times), self.n_lat, width), axis=-1)
+        return acc[..., :self.n_lon] + acc[..., self.n_lon:]
+
+    def _accumulate(self, elements, sign):
+        if len(elements['norad_id']) == 0:
+            return
+        if len(elements['norad_id']) == 1:
+            self._accumulate_single(elements, sign)
+            return
+        for lo in range(0, len(self.times), TIME_CHUNK):
+            hi = min(lo + TIME_CHUNK, len(self.times))
+            hits = self._hits(elements, lo, hi)
+            if sign > 0:
+                self.counts[lo:hi] += hits.astype(np.uint16)
+            else:
+                self.counts[lo:hi] -= hits.astype(np.uint16)
+
+    def _accumulate_single(self, elements, sign):
+        """单颗卫星：直接按格网下标增减，只触及可见圆内的格网
+
+        同一时刻单颗卫星的可见圆内每个格网只出现一次，下标无重复，可直接做花式索引加减。
+        """
+        t_idx, rows, start, length = self._intervals(elements, self.times)
+        owner = np.repeat(np.arange(len(length)), length)
+        k = np.arange(length.sum()) - np.repeat(np.cumsum(length) - length, length)
+        cols = np.mod(start[owner] + k, self.n_lon)
+        flat = (t_idx[owner] * self.n_lat + rows[owner]) * self.n_lon + cols
+        counts = self.counts.reshape(-1)
+        if sign > 0:
+            counts[flat] += 1
+        else:
+            counts[flat] -= 1
+
+    # ---------- 增量更新 ----------
+
+    def _row(self, norad_id):
+        match = np.flatnonzero(self.elements['norad_id'] == norad_id)
+        return int(match[0]) if len(match) else None
+
+    def update_satellite(self, new_elements):
+        """用单颗卫星的新根数（单元素字典）替换旧轨迹贡献；不在星座中则新增"""
+        row = self._row(int(new_elements['norad_id'][0]))
+        if row is not None:
+            self._accumulate(om.subset(self.elements, [row]), -1)
+            for k in self.elements:
+                self.elements[k][row] = new_elements[k][0]
+        else:
+            self.elements = {k: np.concatenate([self.elements[k], new_elements[k]]) for k in self.elements}
+        self._accumulate(new_elements, +1)
+
+    def remove_satellite(self, norad_id):
+        row = self._row(norad_id)
+        if row is None:
+            return
+        self._accumulate(om.subset(self.elements, [row]), -1)
+        keep = np.arange(len(self.elements['norad_id'])) != row
+        self.elements = om.subset(self.elements, keep)
+
+    # ---------- 统计 ----------
+
+    def coverage_fraction(self, min_satellites=MIN_SATELLITES):
+        """每个格网至少 min_satellites 颗卫星可见的时间占比 (n_lat, n_lon)"""
+        return (self.counts >= min_satellites).mean(axis=0)
+
+    def mean_revisit_minutes(self, min_satellites=MIN_SATELLITES):
+        """每个格网的平均不可见间隔（分钟）；全程覆盖为 0，从未覆盖为 NaN"""
+        covered = self.counts >= min_satellites
+        gaps_start = (~covered[0]).astype(np.int64)
+        gaps_start = gaps_start + (covered[:-1] & ~covered[1:]).sum(axis=0)
+        uncovered = (~covered).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_gap = uncovered / gaps_start * self.step / 60.0
+        mean_gap = np.where(uncovered == 0, 0.0, mean_gap)
+        return np.where(uncovered == len(self.times), np.nan, mean_gap)
+
+    def area_weights(self):
+        w = np.cos(np.radians(self.lat))[:, None] * np.ones(self.n_lon)
+        return w / w.sum()
+
+    def summary(self, min_satellites=MIN_SATELLITES):
+        fraction = self.coverage_fraction(min_satellites)
+        weights = self.area_weights()
+        revisit = self.mean_revisit_minutes(min_satellites)
+        regions = []
+        abs_lat = np.abs(self.lat)
+        upper = 90
+        for lower, label in LATITUDE_REGIONS:
+            rows = (abs_lat >= lower) & (abs_lat < upper)
+            upper = lower
+            w = weights[rows]
+            regions.append({
+                'region': label,
+                'time_covered_percent': round(float((fraction[rows] * w).sum() / w.sum()) * 100, 2),
+                'mean_revisit_minutes': round(float(np.nanmean(revisit[rows])), 1)
+                if np.isfinite(revisit[rows]).any() else None,
+            })
+        return {
+            'satellites': int(len(self.elements['norad_id'])),
+            'time_covered_percent': round(float((fraction * weights).sum()) * 100, 2),
+            'continuous_area_percent': round(float(weights[fraction >= 1.0].sum()) * 100, 2),
+            'never_covered_area_percent': round(float(weights[fraction == 0].sum()) * 100, 2),
+            'regions': regions,
+        }
+
+    def save(self, path, min_satellites=MIN_SATELLITES):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez_compressed(path, lat=self.lat, lon=self.lon, times=self.times,
+                            fraction=self.coverage_fraction(min_satellites),
+                            revisit_minutes=self.mean_revisit_minutes(min_satellites),
+                            norad_ids=self.elements['norad_id'])
+
+# ============================================================
+# 3. 基准测试
+# ============================================================
+
+def run_benchmark(engine):
+    print_header("增量更新 vs 全量重算")
+    n = len(engine.elements['norad_id'])
+
+    start = time.perf_counter()
+    full = CoverageEngine(engine.elements, engine.times[0], len(engine.times) * engine.step / 3600,
+                          engine.step, engine.cell, engine.min_elevation)
+    t_full = time.perf_counter() - start
+
+    # 模拟一颗卫星收到新根数（升交点赤经 +0.5°，平近点角 +3°）
+    changed = om.subset(engine.elements, [n // 2])
+    changed['ra_of_asc_node'] = changed['ra_of_asc_node'] + 0.5
+    changed['mean_anomaly'] = changed['mean_anomaly'] + 3.0
+    start = time.perf_counter()
+    engine.update_satellite(changed)
+    t_inc = time.perf_counter() - start
+
+    rebuilt = CoverageEngine(engine.elements, engine.times[0], len(engine.times) * engine.step / 3600,
+                             engine.step, engine.cell, engine.min_elevation)
+    same = np.array_equal(rebuilt.counts, engine.counts)
+    print(f"   全量重算 ({n} 颗): {t_full * 1000:8.1f} ms")
+    print(f"   单星增量更新:     {t_inc * 1000:8.1f} ms  ({t_full / t_inc:.0f}×)")
+    print(f"   增量结果与全量重算一致: {'✅' if same else '❌'}")
+    del full
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def _slug(text):
+    return re.sub(r'[^A-Za-z0-9]+', '_', text).strip('_').lower()
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 覆盖栅格计算")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--operator', help="SatelliteDetails.operator_owner")
+    parser.add_argument('--list', action='store_true', help="列出 ≥5 颗在轨卫星的运营商")
+    parser.add_argument('--min-sats', type=int, default=MIN_SATELLITES, help="至少 N 颗卫星可见")
+    parser.add_argument('--hours', type=float, default=HOURS)
+    parser.add_argument('--step', type=float, default=STEP_SECONDS, help="时间步长 (秒)")
+    parser.add_argument('--cell', type=float, default=CELL_DEG, help="格网大小 (度)")
+    parser.add_argument('--elevation', type=float, default=MIN_ELEVATION_DEG, help="最小仰角 (度)")
+    parser.add_argument('--bench', action='store_true', help="增量更新与全量重算对比")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 覆盖栅格计算")
+    print("="*70)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.list or not args.operator:
+            print_header("运营商 (在轨 PAYLOAD ≥ 5)")
+            operators = list_operators(conn)
+            for owner, count in operators:
+                print(f"   {owner:40s} {count:6,d}")
+            if not operators:
+                print("⚠️  没有在轨卫星数 ≥ 5 的运营商")
+            return
+        elements = load_constellation(conn, args.operator)
+    finally:
+        conn.close()
+
+    if len(elements['norad_id']) == 0:
+        print(f"⚠️  没有 operator_owner = {args.operator!r} 的在轨卫星")
+        return
+
+    start = float(elements['epoch'].max())
+    print(f"📊 {args.operator}: {len(elements['norad_id']):,} 颗卫星")
+    print(f"🕒 {om.unix_to_iso(start)[:19]} 起 {args.hours:g} 小时, 步长 {args.step:g} 秒, "
+          f"格网 {args.cell:g}°, 最小仰角 {args.elevation:g}°")
+
+    print_header(f"覆盖计算 (≥{args.min_sats} 颗可见)")
+    t = time.time()
+    engine = CoverageEngine(elements, start, args.hours, args.step, args.cell, args.elevation)
+    print(f"✅ 栅格 {engine.counts.shape} 完成 ({time.time() - t:.2f}秒)")
+
+    result = engine.summary(args.min_sats)
+    print(f"   面积加权覆盖时间占比: {result['time_covered_percent']}%")
+    print(f"   连续覆盖面积:         {result['continuous_area_percent']}%")
+    print(f"   从未覆盖面积:         {result['never_covered_area_percent']}%")
+    print(f"\n   {'纬度分区':28s} {'覆盖时间%':>10s} {'平均重访(分钟)':>14s}")
+    for region in result['regions']:
+        revisit = '-' if region['mean_revisit_minutes'] is None else f"{region['mean_revisit_minutes']:.1f}"
+        print(f"   {region['region']:28s} {region['time_covered_percent']:>10.2f} {revisit:>14s}")
+
+    path = os.path.join(OUTPUT_DIR, f"{_slug(args.operator)}_n{args.min_sats}.npz")
+    engine.save(path, args.min_sats)
+    print(f"\n💾 栅格已保存: {path}")
+
+    if args.bench:
+        run_benchmark(engine)
+
+if __name__ == "__main__":
+    main()
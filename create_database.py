@@ -7,6 +7,9 @@ OrbitalGuard - 数据库创建与数据导入脚本
 3. 从 JSON/Excel 导入数据
 4. 实施数据清洗和分层中位数填充策略
 5. 生成统计报告
+6. 导出 Parquet / Arrow 列式文件 (export_columnar.py)
+7. 建立目录全文检索索引与同步触发器 (catalog_search.py)
+8. 建立增量维护的星座 / 发射汇总表 (rollup_tables.py)
 
 数据流：
 - SpaceObjects    ← data_satcat.json
@@ -25,7 +28,8 @@ OrbitalGuard - 数据库创建与数据导入脚本
    - 处理 None, 'N/A', '' 等缺失值
 
 3. 数值处理
-   - 使用 safe_float() 安全转换，失败返回 None
+   - 导入时按整列清洗 (cleaning.py)，规则与逐值的 safe_float() 等函数一致，失败为 NULL
+   - Orbits 根数取 GP JSON 字段；JSON 缺失的字段由 TLE_LINE1/TLE_LINE2 批量解析补齐 (tle_parser.py)
    - 保留 NULL 值而非填充 0
 
 4. 日期处理
@@ -36,19 +40,27 @@ OrbitalGuard - 数据库创建与数据导入脚本
    - expected_lifetime_years: 分层中位数填充
    - launch_mission_id: 从国际编号提取前8位
    - LaunchMissions: 聚合时规范化country和launch_site
+   - 每个导入步骤结束后打印各列被拒绝 / 置空的值的数量
 """
 
 import sqlite3
 import json
+import re
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import os
 
+from cleaning import (CleaningStats, clean_date, clean_float, clean_int, clean_strip,
+                      clean_upper, get_column, to_sql_values)
+
 # ============================================================
 # 配置
 # ============================================================
 
 DB_NAME = "orbitalguard.db"
+# 构建期间写入临时文件，完成后原子替换 DB_NAME，读取方不会看到半成品数据库
+DB_BUILD_NAME = DB_NAME + ".building"
 DATA_FILES = {
     'satcat': 'data_satcat.json',
     'active_gp': 'data_active_gp.json',
@@ -67,6 +79,8 @@ LIFETIME_MEDIAN = {
     'ELLIPTICAL': 7.0
 }
 
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
 # ============================================================
 # 辅助函数
 # ============================================================
@@ -101,8 +115,6 @@ def safe_date(value):
     - 长格式字符串（自动取前 10 字符）
     - 日期有效性验证
     """
-    import re
-    
     if value is None or value in ['', 'N/A']:
         return None
     
@@ -111,7 +123,7 @@ def safe_date(value):
         date_str = str(value)[:10] if value else None
         
         # 验证 YYYY-MM-DD 格式
-        if not re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
+        if not _DATE_PATTERN.match(date_str):
             return None
         
         # 进一步验证日期的合理性
@@ -232,44 +244,41 @@ def import_space_objects(conn):
     with open(DATA_FILES['satcat'], 'r') as f:
         satcat = json.load(f)
     
-    cursor = conn.cursor()
-    imported = 0
-    
-    for record in satcat:
-        try:
-            # 提取 launch_mission_id (国际编号的前8位，如 1998-067)
-            intl_des = record.get('INTLDES', '')
-            launch_mission_id = intl_des[:8] if len(intl_des) >= 8 else intl_des
-            
-            # 数据清洗：规范化文本字段
-            object_type = safe_upper(record.get('OBJECT_TYPE'))
-            country = safe_upper(record.get('COUNTRY'))
-            rcs_size = safe_upper(record.get('RCS_SIZE'))
-            launch_site = safe_upper(record.get('SITE'))
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO SpaceObjects 
-                (norad_id, object_name, intl_designator, object_type, country, 
-                 launch_date, decay_date, rcs_size, launch_site, launch_mission_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                record.get('NORAD_CAT_ID'),
-                safe_strip(record.get('SATNAME')),
-                safe_upper(record.get('INTLDES')),
-                object_type,
-                country,
-                safe_date(record.get('LAUNCH')),
-                safe_date(record.get('DECAY')),
-                rcs_size,
-                launch_site,
-                launch_mission_id
-            ))
-            imported += 1
-        except Exception as e:
-            print(f"⚠️  跳过记录 {record.get('NORAD_CAT_ID')}: {e}")
-    
+    df = pd.DataFrame.from_records(satcat)
+    column = lambda name: get_column(df, name)
+    stats = CleaningStats()
+    
+    # 数据清洗：整列规范化文本与日期字段
+    norad_id = clean_int(column('NORAD_CAT_ID'), 'NORAD_CAT_ID', stats)
+    intl_des = clean_upper(column('INTLDES'), 'INTLDES', stats)
+    # launch_mission_id：国际编号的前8位，如 1998-067
+    launch_mission_id = column('INTLDES').fillna('').astype(str).str.slice(0, 8).to_numpy(dtype=object)
+    keep = np.not_equal(norad_id, None)
+    stats.add('NORAD_CAT_ID', 'row_dropped', (~keep).sum())
+    
+    columns = [
+        norad_id,
+        clean_strip(column('SATNAME'), 'SATNAME', stats),
+        intl_des,
+        clean_upper(column('OBJECT_TYPE'), 'OBJECT_TYPE', stats),
+        clean_upper(column('COUNTRY'), 'COUNTRY', stats),
+        clean_date(column('LAUNCH'), 'LAUNCH', stats),
+        clean_date(column('DECAY'), 'DECAY', stats),
+        clean_upper(column('RCS_SIZE'), 'RCS_SIZE', stats),
+        clean_upper(column('SITE'), 'SITE', stats),
+        launch_mission_id,
+    ]
+    rows = list(zip(*(c[keep].tolist() for c in columns)))
+    
+    conn.executemany("""
+        INSERT OR REPLACE INTO SpaceObjects 
+        (norad_id, object_name, intl_designator, object_type, country, 
+         launch_date, decay_date, rcs_size, launch_site, launch_mission_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
     conn.commit()
-    print(f"✅ 导入 {imported:,} 条 SpaceObjects 记录")
+    print(f"✅ 导入 {len(rows):,} 条 SpaceObjects 记录")
+    stats.report()
 
 # ============================================================
 # 3. 导入 Orbits (GP Data)
@@ -278,11 +287,6 @@ def import_space_objects(conn):
 def import_orbits(conn):
     print_header("导入 Orbits (GP + 碎片数据)")
     
-    cursor = conn.cursor()
-    imported = 0
-    skipped_fk = 0  # 外键约束失败
-    skipped_invalid = 0  # 数据无效
-    
     # 合并所有 GP 数据
     all_gp_data = []
     
@@ -303,46 +307,40 @@ def import_orbits(conn):
     
     print(f"📊 总 GP 记录数: {len(all_gp_data):,}")
     
-    for record in all_gp_data:
-        try:
-            # 必要字段检查
-            if not record.get('NORAD_CAT_ID') or not record.get('EPOCH'):
-                skipped_invalid += 1
-                continue
-            
-            cursor.execute("""
-                INSERT INTO Orbits 
-                (norad_id, epoch, inclination_deg, eccentricity, mean_motion,
-                 ra_of_asc_node, arg_of_pericenter, mean_anomaly, bstar)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                record.get('NORAD_CAT_ID'),
-                record.get('EPOCH'),
-                safe_float(record.get('INCLINATION')),
-                safe_float(record.get('ECCENTRICITY')),
-                safe_float(record.get('MEAN_MOTION')),
-                safe_float(record.get('RA_OF_ASC_NODE')),
-                safe_float(record.get('ARG_OF_PERICENTER')),
-                safe_float(record.get('MEAN_ANOMALY')),
-                safe_float(record.get('BSTAR'))
-            ))
-            imported += 1
-        except sqlite3.IntegrityError as e:
-            # 外键约束失败或唯一性约束失败
-            if 'FOREIGN KEY constraint failed' in str(e):
-                skipped_fk += 1
-            else:
-                skipped_invalid += 1
-        except Exception as e:
-            # 其他数据错误
-            skipped_invalid += 1
-    
+    # 字典列表转为紧凑目录（整列清洗 JSON 字段，缺少编号或历元的记录被剔除），随后释放字典
+    from catalog import Catalog
+    stats = CleaningStats()
+    catalog = Catalog.from_records(all_gp_data, stats, keep_tle=True)
+    skipped_invalid = len(all_gp_data) - len(catalog)
+    del all_gp_data
+    
+    # 根数以 JSON 字段为准（GP JSON 比 TLE 定宽字段多 1 位有效数字，如偏心率 8 位）；
+    # 批量解析 TLE_LINE1 / TLE_LINE2 只用于补齐 JSON 缺失的字段（需校验和通过）
+    from tle_parser import parse_tle_lines, epoch_to_iso, ORBIT_FIELDS
+    tle = parse_tle_lines(catalog.tle_lines[0].tolist(), catalog.tle_lines[1].tolist())
+    filled = 0
+    elements = []
+    for c in ORBIT_FIELDS:
+        fill = np.isnan(catalog[c]) & tle['valid']
+        filled += int(fill.sum())
+        elements.append(to_sql_values(np.where(fill, tle[c], catalog[c])))
+    print(f"   TLE 行解析成功: {tle['valid'].sum():,} 条，补齐 JSON 缺失字段 {filled:,} 个")
+    
+    # 历元沿用 JSON EPOCH（微秒精度，TLE 年积日只有 8 位小数）
+    columns = [catalog['norad_id'], epoch_to_iso(catalog['epoch'])] + elements
+    rows = list(zip(*(c.tolist() for c in columns)))
+    
+    conn.executemany("""
+        INSERT INTO Orbits 
+        (norad_id, epoch, inclination_deg, eccentricity, mean_motion,
+         ra_of_asc_node, arg_of_pericenter, mean_anomaly, bstar)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
     conn.commit()
-    print(f"✅ 导入 {imported:,} 条 Orbits 记录")
-    if skipped_fk > 0:
-        print(f"   ⚠️  跳过 {skipped_fk} 条（外键约束失败）")
+    print(f"✅ 导入 {len(rows):,} 条 Orbits 记录")
     if skipped_invalid > 0:
         print(f"   ⚠️  跳过 {skipped_invalid} 条（数据无效）")
+    stats.report()
 
 # ============================================================
 # 4. 导入 SatelliteDetails (UCS + 分层填充)
@@ -375,7 +373,6 @@ def import_satellite_details(conn):
             actual_col_map[expected_col] = db_col
         else:
             # 尝试模糊匹配（去除非字母数字字符）
-            import re
             pattern = re.sub(r'[^a-z0-9]', '', expected_col.lower())
             
             for actual_col in df.columns:
@@ -390,59 +387,53 @@ def import_satellite_details(conn):
     # 重命名列
     df_clean = df.rename(columns=actual_col_map)
     
-    # 分层中位数填充 Expected Lifetime
-    print("🔧 应用分层中位数填充策略...")
-    def fill_lifetime(row):
-        if pd.isna(row['expected_lifetime_years']):
-            orbit_class = row.get('class_of_orbit', 'LEO')
-            return LIFETIME_MEDIAN.get(orbit_class, 4.0)  # 默认用 LEO
-        return row['expected_lifetime_years']
-    
-    df_clean['expected_lifetime_years'] = df_clean.apply(fill_lifetime, axis=1)
-    
-    # 统计填充效果
-    filled_count = df['Expected Lifetime (yrs.)'].isna().sum()
-    print(f"   填充了 {filled_count} 条缺失的寿命数据")
+    column = lambda name: get_column(df_clean, name)
+    stats = CleaningStats()
     
-    # 插入数据
-    cursor = conn.cursor()
-    imported = 0
-    
-    for _, row in df_clean.iterrows():
-        try:
-            # 数据清洗：规范化所有文本字段
-            class_of_orbit = safe_upper(row.get('class_of_orbit'))
-            purpose = safe_strip(row.get('purpose'))
-            users = safe_strip(row.get('users'))
-            contractor = safe_strip(row.get('contractor'))
-            operator_owner = safe_strip(row.get('operator_owner'))
-            country_operator = safe_upper(row.get('country_operator'))
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO SatelliteDetails
-                (norad_id, launch_mass_kg, dry_mass_kg, power_watts, 
-                 expected_lifetime_years, purpose, users, contractor, 
-                 operator_owner, class_of_orbit, country_operator)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                int(row['norad_id']) if pd.notna(row['norad_id']) else None,
-                safe_float(row.get('launch_mass_kg')),
-                safe_float(row.get('dry_mass_kg')),
-                safe_float(row.get('power_watts')),
-                safe_float(row.get('expected_lifetime_years')),
-                purpose,
-                users,
-                contractor,
-                operator_owner,
-                class_of_orbit,
-                country_operator
-            ))
-            imported += 1
-        except Exception as e:
-            pass  # 跳过外键约束失败的记录
+    # 数据清洗：整列规范化数值与文本字段（Excel 空单元格读入为 NaN，视为缺失）
+    norad_id = clean_int(column('norad_id'), 'norad_id', stats)
+    launch_mass = clean_float(column('launch_mass_kg'), 'launch_mass_kg', stats)
+    dry_mass = clean_float(column('dry_mass_kg'), 'dry_mass_kg', stats)
+    power = clean_float(column('power_watts'), 'power_watts', stats)
+    lifetime = clean_float(column('expected_lifetime_years'), 'expected_lifetime_years', stats)
+    class_of_orbit = clean_upper(column('class_of_orbit'), 'class_of_orbit', stats)
     
+    # 分层中位数填充 Expected Lifetime（按规范化后的轨道类别，未知类别默认用 LEO）
+    print("🔧 应用分层中位数填充策略...")
+    missing = np.isnan(lifetime)
+    median = pd.Series(class_of_orbit, dtype=object).map(LIFETIME_MEDIAN).fillna(LIFETIME_MEDIAN['LEO'])
+    lifetime[missing] = median.to_numpy(dtype=np.float64)[missing]
+    print(f"   填充了 {missing.sum()} 条缺失的寿命数据")
+    
+    # 没有 NORAD 编号的行无法关联到 SpaceObjects，跳过
+    keep = np.not_equal(norad_id, None)
+    stats.add('norad_id', 'row_dropped', (~keep).sum())
+    
+    columns = [
+        norad_id,
+        to_sql_values(launch_mass),
+        to_sql_values(dry_mass),
+        to_sql_values(power),
+        to_sql_values(lifetime),
+        clean_strip(column('purpose'), 'purpose', stats),
+        clean_strip(column('users'), 'users', stats),
+        clean_strip(column('contractor'), 'contractor', stats),
+        clean_strip(column('operator_owner'), 'operator_owner', stats),
+        class_of_orbit,
+        clean_upper(column('country_operator'), 'country_operator', stats),
+    ]
+    rows = list(zip(*(c[keep].tolist() for c in columns)))
+    
+    conn.executemany("""
+        INSERT OR REPLACE INTO SatelliteDetails
+        (norad_id, launch_mass_kg, dry_mass_kg, power_watts, 
+         expected_lifetime_years, purpose, users, contractor, 
+         operator_owner, class_of_orbit, country_operator)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
     conn.commit()
-    print(f"✅ 导入 {imported:,} 条 SatelliteDetails 记录")
+    print(f"✅ 导入 {len(rows):,} 条 SatelliteDetails 记录")
+    stats.report()
 
 # ============================================================
 # 5. 生成 LaunchMissions (聚合查询)
@@ -625,14 +616,14 @@ def main():
     if not precheck_data_files():
         return
     
-    # 删除旧数据库（如果存在）
-    if os.path.exists(DB_NAME):
-        print(f"\n⚠️  删除旧数据库: {DB_NAME}")
-        os.remove(DB_NAME)
+    # 删除上次中断遗留的临时文件（旧数据库在新库构建完成前保持可用）
+    if os.path.exists(DB_BUILD_NAME):
+        print(f"\n⚠️  删除未完成的构建: {DB_BUILD_NAME}")
+        os.remove(DB_BUILD_NAME)
     
     # 创建数据库连接
-    conn = sqlite3.connect(DB_NAME)
-    print(f"\n✅ 创建数据库: {DB_NAME}")
+    conn = sqlite3.connect(DB_BUILD_NAME)
+    print(f"\n✅ 创建数据库: {DB_BUILD_NAME}")
     
     try:
         # 执行导入流程
@@ -643,6 +634,23 @@ def main():
         generate_launch_missions(conn)
         validate_database(conn)
         
+        # 全文检索索引（触发器保证后续写入自动同步）
+        from catalog_search import create_search_index
+        print(f"✅ 检索索引: {create_search_index(conn):,} 个物体")
+        
+        # 汇总表：此后单个物体的增删改只通过触发器更新其所在的组
+        from rollup_tables import install_rollups
+        groups, launches = install_rollups(conn)
+        print(f"✅ 汇总表: {groups:,} 个星座分组, {launches:,} 个发射")
+        
+        # 构建完成，原子替换旧数据库
+        conn.close()
+        os.replace(DB_BUILD_NAME, DB_NAME)
+        
+        # 列式导出（供下游分析加载；pyarrow 未安装时跳过）
+        from export_columnar import export_all
+        export_all(DB_NAME)
+        
         print("\n" + "="*70)
         print("🎉 数据库创建完成!")
         print("="*70)
@@ -652,6 +660,7 @@ def main():
         print("   1. 使用 sqlite3 命令行或 DB Browser 查看数据")
         print("   2. 开始编写 Use Case 查询")
         print("   3. 创建视图和索引优化性能")
+        print("   4. 分析脚本可直接读取 export/ 下的 Parquet / Arrow 文件")
         
     except Exception as e:
         print(f"\n❌ 错误: {e}")
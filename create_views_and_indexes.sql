@@ -6,9 +6,9 @@
 -- ==============================================
 
 -- Indexes on foreign keys (improves JOIN performance)
-CREATE INDEX idx_orbits_norad_id ON Orbits(norad_id);
+CREATE INDEX IF NOT EXISTS idx_orbits_norad_id ON Orbits(norad_id);
 CREATE INDEX idx_satellite_details_norad_id ON SatelliteDetails(norad_id);
-CREATE INDEX idx_launch_missions_launch_id ON SpaceObjects(launch_mission_id);
+CREATE INDEX IF NOT EXISTS idx_launch_missions_launch_id ON SpaceObjects(launch_mission_id);
 
 -- Indexes on commonly filtered columns
 CREATE INDEX idx_space_objects_decay_date ON SpaceObjects(decay_date);
@@ -15,9 +15,15 @@ OrbitalGuard - 核心数据下载脚本 (Final Verified Version)
   3. data_fengyun1c_debris.json : 核心案例碎片
   4. data_cosmos2251_debris.json: 对比案例碎片
   5. data_iridium33_debris.json : 对比案例碎片
+
+可选：历史GP数据 (供 element_archive.py 导入历史根数归档)
+  python download_data.py --history 2024-01-01 2024-02-01
+  → data_gp_history_2024-01-01_2024-02-01.json.gz
 """
 
 import requests
+import argparse
+import gzip
 import json
 import time
 import os
@@ -151,7 +157,14 @@ def download_active_gp(session):
             try:
                 data = response.json()
                 filename = "data_active_gp.json"
-                size_mb = save_json(data, filename)
+                # 先校验并写入临时文件：数据无效时不动当前快照
+                tmp_path = filename + ".tmp"
+                size_mb = save_json(data, tmp_path)
+                # 保留上一版快照，供 catalog_diff.py 比对新增 / 消失 / 机动
+                if os.path.exists(filename):
+                    os.replace(filename, "data_active_gp.previous.json")
+                    print("   📁 上一版快照已保留为 data_active_gp.previous.json")
+                os.replace(tmp_path, filename)
                 duration = time.time() - start_time
                 
                 print(f"✅ 下载成功！({duration:.1f}秒)")
@@ -211,7 +224,8 @@ def download_debris_data(session):
                 try:
                     data = response.json()
                     size_mb = save_json(data, filename)
-                    debris_count = len([d for d in data if 'DEB' in d.get('OBJECT_NAME', '')])
+                    from catalog import Catalog
+                    debris_count = int(Catalog.from_records(data).mask_name_contains('DEB').sum())
                     
                     print(f"✅ 下载成功！")
                     print(f"   🧩 碎片数量: {debris_count}")
@@ -241,11 +255,59 @@ def download_debris_data(session):
         
     return success_count
 
+def download_gp_history(session, start_date, end_date):
+    """历史GP数据（按历元区间），供 element_archive.py 导入
+
+    gp_history 数据量很大，建议按月或按季度分段下载。
+    """
+    print_header(f"历史GP数据 {start_date} ~ {end_date}", 1, 1)
+    url = (f"{BASE_URL}/basicspacedata/query/class/gp_history/"
+           f"EPOCH/{start_date}--{end_date}/orderby/NORAD_CAT_ID asc/format/json")
+    filename = f"data_gp_history_{start_date}_{end_date}.json.gz"
+
+    try:
+        print("📡 请求中... (历史数据量较大，请耐心等待)")
+        start_time = time.time()
+        response = session.get(url, timeout=600)
+        if response.status_code != 200:
+            print(f"❌ 下载失败！状态码: {response.status_code}")
+            return None
+
+        data = response.json()
+        if not isinstance(data, list) or len(data) == 0:
+            print("❌ 数据格式错误: 期望非空 JSON 数组")
+            return None
+
+        with gzip.open(filename, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+        duration = time.time() - start_time
+        size_mb = os.path.getsize(filename) / 1024 / 1024
+        print(f"✅ 下载成功！({duration:.1f}秒)")
+        print(f"   📊 记录总数: {len(data):,}")
+        print(f"   💾 文件大小: {size_mb:.2f} MB (gzip)")
+        print(f"   📁 已保存至: {filename}")
+        print(f"   👉 导入归档: python element_archive.py ingest {filename}")
+        return filename
+    except Exception as e:
+        print(f"❌ 下载出错: {e}")
+        return None
+
 # ============================================================
 # 主函数
 # ============================================================
 
 def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 核心数据下载")
+    parser.add_argument('--history', nargs=2, metavar=('START', 'END'),
+                        help="只下载历元区间内的历史GP数据 (YYYY-MM-DD)，供 element_archive.py ingest 导入")
+    args = parser.parse_args()
+    for value in args.history or []:
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            parser.error(f"日期格式错误: {value} (应为 YYYY-MM-DD)")
+
     print("\n" + "="*70)
     print("🚀 OrbitalGuard - 核心数据下载 (Final Execution)")
     print("="*70)
@@ -253,6 +315,11 @@ def main():
     session = login_spacetrack()
     if not session:
         return
+
+    if args.history:
+        start_date, end_date = args.history
+        download_gp_history(session, start_date, end_date)
+        return
     
     # 1. 下载 SATCAT
     if download_satcat(session):
@@ -0,0 +1,406 @@
+"""
+OrbitalGuard - 历史根数归档 (Historical Element-Set Archive)
+===========================================================
+功能：
+1. 将历史 GP/TLE 批量数据 (Space-Track gp_history 导出、2 行 / 3 行 TLE 文本) 导入按历元年份分区的归档库
+2. 以 (norad_id, epoch) 为聚簇主键，支持时间范围查询与 as-of 查询
+3. 紧凑存储：数值按 TLE 原始精度存为定点整数，SQLite 变长整数编码天然压缩
+
+存储布局：
+    archive/
+    ├── elements_2023.db
+    ├── elements_2024.db
+    └── elements_2025.db
+
+每个分区文件一张表 ElementSets (WITHOUT ROWID)：
+- PRIMARY KEY (norad_id, epoch_us)：同一物体的根数在磁盘上连续存放，
+  范围查询是一次索引定位 + 顺序扫描，与总行数无关
+- 角度 ×1e4、偏心率 ×1e8、平均运动 ×1e8 存为 INTEGER (与 GP JSON 字段精度一致，无损；
+  TLE 偏心率只有 7 位，同样无损)；旧版本按 ×1e7 写入的分区在打开时自动升级
+- 重复的 (norad_id, epoch) 自动去重 (INSERT OR IGNORE)
+
+用法：
+    python download_data.py --history 2024-01-01 2024-02-01   # → data_gp_history_2024-01-01_2024-02-01.json.gz
+    python element_archive.py ingest data_gp_history_2024-01-01_2024-02-01.json.gz data_active_gp.json
+    python element_archive.py ingest tle_2019.txt            # 纯文本 TLE（tle_parser.py 解析）
+    python element_archive.py range 25544 2024-01-01 2024-03-01
+    python element_archive.py asof 25544 2024-06-15T12:00:00
+    python element_archive.py bench --rows 2000000
+"""
+
+import sqlite3
+import argparse
+import glob
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from create_database import print_header
+from tle_parser import read_tle_file, epoch_to_iso
+
+# ============================================================
+# 配置
+# ============================================================
+
+ARCHIVE_DIR = 'archive'
+PARTITION_PATTERN = 'elements_{year}.db'
+
+# 定点缩放系数（与 GP JSON 字段的小数位数一致：角度 4 位，偏心率 / 平均运动 8 位）
+SCALE = {
+    'inclination_deg': 1e4,
+    'ra_of_asc_node': 1e4,
+    'arg_of_pericenter': 1e4,
+    'mean_anomaly': 1e4,
+    'eccentricity': 1e8,
+    'mean_motion': 1e8,
+}
+
+# GP JSON 字段 → 归档列
+GP_FIELDS = {
+    'INCLINATION': 'inclination_deg',
+    'ECCENTRICITY': 'eccentricity',
+    'MEAN_MOTION': 'mean_motion',
+    'RA_OF_ASC_NODE': 'ra_of_asc_node',
+    'ARG_OF_PERICENTER': 'arg_of_pericenter',
+    'MEAN_ANOMALY': 'mean_anomaly',
+    'BSTAR': 'bstar',
+}
+
+# 分区文件格式版本 (PRAGMA user_version)：2 = 偏心率 ×1e8（版本 0 为 ×1e7）
+ARCHIVE_FORMAT = 2
+
+ARCHIVE_COLUMNS = ['norad_id', 'epoch_us'] + [f"{c}_fx" for c in SCALE] + ['bstar']
+
+INGEST_BATCH = 200_000
+
+# 按纯文本 TLE 解析的文件扩展名
+TLE_EXTENSIONS = ('.tle', '.txt', '.tle.gz', '.txt.gz')
+
+# ============================================================
+# 1. 分区文件管理
+# ============================================================
+
+def partition_path(year):
+    return os.path.join(ARCHIVE_DIR, PARTITION_PATTERN.format(year=year))
+
+def list_partition_years():
+    """返回归档中已存在的年份（升序）"""
+    years = []
+    for path in glob.glob(os.path.join(ARCHIVE_DIR, PARTITION_PATTERN.format(year='*'))):
+        stem = os.path.basename(path)[len('elements_'):-len('.db')]
+        if stem.isdigit():
+            years.append(int(stem))
+    return sorted(years)
+
+def open_partition(year, create=False):
+    path = partition_path(year)
+    if not create and not os.path.exists(path):
+        return None
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    fixed_cols = ",\n            ".join(f"{c}_fx INTEGER" for c in SCALE)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS ElementSets (
+            norad_id INTEGER NOT NULL,
+            epoch_us INTEGER NOT NULL,
+            {fixed_cols},
+            bstar REAL,
+            PRIMARY KEY (norad_id, epoch_us)
+        ) WITHOUT ROWID
+    """)
+    if conn.execute("PRAGMA user_version").fetchone()[0] < ARCHIVE_FORMAT:
+        # 旧分区偏心率按 ×1e7 存储，整列放大 10 倍（新建的空分区只是写入版本号）
+        with conn:
+            conn.execute("UPDATE ElementSets SET eccentricity_fx = eccentricity_fx * 10")
+            conn.execute(f"PRAGMA user_version = {ARCHIVE_FORMAT}")
+    return conn
+
+# ============================================================
+# 2. 编码 / 解码
+# ============================================================
+
+def epoch_to_us(values):
+    """ISO 8601 历元字符串 → 自 1970-01-01 起的微秒数 (int64 数组)"""
+    epochs = pd.to_datetime(pd.Series(values), errors='coerce', format='ISO8601')
+    us = epochs.values.astype('datetime64[us]').astype(np.int64)
+    # NaT 转换后为 int64 最小值，标记为无效
+    return np.where(epochs.isna().values, np.iinfo(np.int64).min, us)
+
+def us_to_iso(us):
+    return np.datetime64(int(us), 'us').astype(datetime).isoformat()
+
+def encode_frame(df):
+    """将包含 norad_id / epoch / 6 个根数 / bstar 的 DataFrame 编码为归档行
+
+    Returns:
+        (按年份分组的 DataFrame 字典, 无效记录数)
+    """
+    out = pd.DataFrame({
+        'norad_id': pd.to_numeric(df['norad_id'], errors='coerce'),
+        'epoch_us': epoch_to_us(df['epoch']),
+    })
+    for col, scale in SCALE.items():
+        values = pd.to_numeric(df[col], errors='coerce')
+        out[f"{col}_fx"] = np.round(values * scale)
+    out['bstar'] = pd.to_numeric(df['bstar'], errors='coerce')
+
+    valid = out['norad_id'].notna() & (out['epoch_us'] != np.iinfo(np.int64).min)
+    for col in SCALE:
+        valid &= out[f"{col}_fx"].notna()
+    invalid = int((~valid).sum())
+    out = out[valid]
+
+    out = out.astype({c: np.int64 for c in ARCHIVE_COLUMNS if c != 'bstar'})
+    years = out['epoch_us'].values.astype('datetime64[us]').astype('datetime64[Y]').astype(int) + 1970
+    return {int(y): part for y, part in out.groupby(years)}, invalid
+
+def decode_rows(rows):
+    """归档行 → 与 Orbits 表同名字段的字典列表"""
+    result = []
+    for row in rows:
+        record = {'norad_id': row[0], 'epoch': us_to_iso(row[1])}
+        for i, col in enumerate(SCALE):
+            record[col] = row[2 + i] / SCALE[col]
+        record['bstar'] = row[-1]
+        result.append(record)
+    return result
+
+# ============================================================
+# 3. 导入
+# ============================================================
+
+def load_tle_file(filename):
+    """读取 2 行 / 3 行 TLE 文本（.tle / .txt，'-' 为标准输入），返回与 load_gp_file 相同列的 DataFrame
+
+    校验和或格式无效的记录 norad_id 置空，由 encode_frame 计入无效数
+    """
+    parsed = read_tle_file(filename)
+    df = pd.DataFrame({c: parsed[c] for c in GP_FIELDS.values()})
+    df.insert(0, 'norad_id', np.where(parsed['valid'], parsed['norad_id'], np.nan))
+    df.insert(1, 'epoch', epoch_to_iso(parsed['epoch']))
+    return df
+
+def load_gp_file(filename):
+    """读取 GP JSON 数组文件（支持 .json.gz），返回归档所需列的 DataFrame"""
+    if filename == '-' or filename.endswith(TLE_EXTENSIONS):
+        return load_tle_file(filename)
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rt', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"期望 JSON 数组，收到 {type(data).__name__}")
+
+    df = pd.DataFrame.from_records(data, columns=['NORAD_CAT_ID', 'EPOCH'] + list(GP_FIELDS))
+    df = df.rename(columns={'NORAD_CAT_ID': 'norad_id', 'EPOCH': 'epoch', **GP_FIELDS})
+    return df
+
+def ingest_frame(df):
+    """把 DataFrame 写入对应年份的分区，返回 (新增行数, 无效行数)"""
+    by_year, invalid = encode_frame(df)
+    placeholders = ", ".join("?" * len(ARCHIVE_COLUMNS))
+    inserted = 0
+
+    for year, part in by_year.items():
+        conn = open_partition(year, create=True)
+        try:
+            before = conn.total_changes
+            # 先按主键排序，写入时 B-tree 页顺序追加
+            part = part.sort_values(['norad_id', 'epoch_us'])
+            rows = part[ARCHIVE_COLUMNS].itertuples(index=False, name=None)
+            conn.executemany(
+                f"INSERT OR IGNORE INTO ElementSets ({', '.join(ARCHIVE_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                ((int(r[0]), int(r[1]), *map(int, r[2:-1]),
+                  None if r[-1] != r[-1] else float(r[-1])) for r in rows)
+            )
+            conn.commit()
+            inserted += conn.total_changes - before
+        finally:
+            conn.close()
+
+    return inserted, invalid
+
+def ingest_files(filenames):
+    print_header("导入历史根数")
+
+    total_inserted = 0
+    for filename in filenames:
+        start = time.time()
+        try:
+            df = load_gp_file(filename)
+        except (json.JSONDecodeError, IOError, ValueError) as e:
+            print(f"❌ {filename}: 读取失败 - {e}")
+            continue
+
+        inserted, invalid = 0, 0
+        for offset in range(0, len(df), INGEST_BATCH):
+            n_ins, n_bad = ingest_frame(df.iloc[offset:offset + INGEST_BATCH])
+            inserted += n_ins
+            invalid += n_bad
+
+        total_inserted += inserted
+        duplicates = len(df) - inserted - invalid
+        print(f"✅ {filename}: {len(df):,} 条 → 新增 {inserted:,} "
+              f"(重复 {duplicates:,}, 无效 {invalid:,}) {time.time() - start:.1f}秒")
+
+    print(f"\n📊 本次共新增 {total_inserted:,} 条根数，分区年份: {list_partition_years()}")
+    return total_inserted
+
+# ============================================================
+# 4. 查询
+# ============================================================
+
+SELECT_COLUMNS = ", ".join(ARCHIVE_COLUMNS)
+
+def query_range(norad_id, start, end):
+    """返回 norad_id 在 [start, end] 区间内的全部根数（按历元升序）"""
+    start_us, end_us = epoch_to_us([start, end])
+    start_year = np.datetime64(int(start_us), 'us').astype(datetime).year
+    end_year = np.datetime64(int(end_us), 'us').astype(datetime).year
+
+    rows = []
+    for year in list_partition_years():
+        if year < start_year or year > end_year:
+            continue
+        conn = open_partition(year)
+        try:
+            rows.extend(conn.execute(f"""
+                SELECT {SELECT_COLUMNS} FROM ElementSets
+                WHERE norad_id = ? AND epoch_us BETWEEN ? AND ?
+                ORDER BY epoch_us
+            """, (int(norad_id), int(start_us), int(end_us))).fetchall())
+        finally:
+            conn.close()
+    return decode_rows(rows)
+
+def query_as_of(norad_id, when):
+    """返回 norad_id 在 when 时刻之前（含）最新的一组根数，没有则返回 None
+
+    从 when 所在年份向前逐个分区查找，通常第一个分区即命中。
+    """
+    when_us = int(epoch_to_us([when])[0])
+    when_year = np.datetime64(when_us, 'us').astype(datetime).year
+
+    for year in reversed(list_partition_years()):
+        if year > when_year:
+            continue
+        conn = open_partition(year)
+        try:
+            row = conn.execute(f"""
+                SELECT {SELECT_COLUMNS} FROM ElementSets
+                WHERE norad_id = ? AND epoch_us <= ?
+                ORDER BY epoch_us DESC
+                LIMIT 1
+            """, (int(norad_id), when_us)).fetchone()
+        finally:
+            conn.close()
+        if row:
+            return decode_rows([row])[0]
+    return None
+
+# ============================================================
+# 5. 基准测试
+# ============================================================
+
+def run_benchmark(n_rows, n_objects=30000, n_queries=1000):
+    """生成合成历史数据并测量导入 / 范围查询 / as-of 查询性能"""
+    global ARCHIVE_DIR
+    print_header(f"归档基准测试 ({n_rows:,} 条根数, {n_objects:,} 个物体)")
+
+    saved_dir = ARCHIVE_DIR
+    ARCHIVE_DIR = os.path.join(saved_dir, 'bench')
+    for path in glob.glob(os.path.join(ARCHIVE_DIR, '*.db')):
+        os.remove(path)
+
+    try:
+        rng = np.random.default_rng(42)
+        norad = rng.integers(1, n_objects + 1, n_rows)
+        base = np.datetime64('2022-01-01T00:00:00', 'us').astype(np.int64)
+        span_us = 3 * 365 * 86400 * 10**6
+        epoch_us = base + rng.integers(0, span_us, n_rows)
+        df = pd.DataFrame({
+            'norad_id': norad,
+            'epoch': epoch_us.astype('datetime64[us]').astype(str),
+            'inclination_deg': rng.uniform(0, 180, n_rows).round(4),
+            'eccentricity': rng.uniform(0, 0.1, n_rows).round(7),
+            'mean_motion': rng.uniform(1, 16, n_rows).round(8),
+            'ra_of_asc_node': rng.uniform(0, 360, n_rows).round(4),
+            'arg_of_pericenter': rng.uniform(0, 360, n_rows).round(4),
+            'mean_anomaly': rng.uniform(0, 360, n_rows).round(4),
+            'bstar': rng.normal(0, 1e-4, n_rows),
+        })
+
+        start = time.time()
+        inserted = 0
+        for offset in range(0, n_rows, INGEST_BATCH):
+            inserted += ingest_frame(df.iloc[offset:offset + INGEST_BATCH])[0]
+        duration = time.time() - start
+        size_mb = sum(os.path.getsize(p) for p in glob.glob(os.path.join(ARCHIVE_DIR, '*.db'))) / 1024 / 1024
+        print(f"   导入: {inserted:,} 条, {duration:.1f}秒 ({inserted / duration:,.0f} 条/秒)")
+        print(f"   存储: {size_mb:.1f} MB ({size_mb * 1024 * 1024 / max(inserted, 1):.1f} 字节/条)")
+
+        targets = rng.integers(1, n_objects + 1, n_queries)
+
+        start = time.perf_counter()
+        found = sum(len(query_range(t, '2023-03-01', '2023-06-01')) for t in targets)
+        avg_ms = (time.perf_counter() - start) / n_queries * 1000
+        print(f"   范围查询 (3个月): {avg_ms:.3f} ms/次, 平均返回 {found / n_queries:.1f} 条")
+
+        start = time.perf_counter()
+        hits = sum(query_as_of(t, '2024-06-15T12:00:00') is not None for t in targets)
+        avg_ms = (time.perf_counter() - start) / n_queries * 1000
+        print(f"   as-of 查询:       {avg_ms:.3f} ms/次, 命中 {hits}/{n_queries}")
+    finally:
+        ARCHIVE_DIR = saved_dir
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 历史根数归档")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_ingest = sub.add_parser('ingest', help="导入 GP JSON (.json / .json.gz) 或 TLE 文本 (.tle / .txt)")
+    p_ingest.add_argument('files', nargs='+')
+
+    p_range = sub.add_parser('range', help="查询时间范围内的根数")
+    p_range.add_argument('norad_id', type=int)
+    p_range.add_argument('start')
+    p_range.add_argument('end')
+
+    p_asof = sub.add_parser('asof', help="查询某时刻之前最新的根数")
+    p_asof.add_argument('norad_id', type=int)
+    p_asof.add_argument('when')
+
+    p_bench = sub.add_parser('bench', help="合成数据基准测试")
+    p_bench.add_argument('--rows', type=int, default=2_000_000)
+
+    args = parser.parse_args()
+    # 无效历元在 epoch_to_us 中为 int64 最小值，先在这里报告具体参数
+    for name in ('start', 'end', 'when'):
+        value = getattr(args, name, None)
+        if value is not None and epoch_to_us([value])[0] == np.iinfo(np.int64).min:
+            parser.error(f"{name} 历元格式错误: {value} (应为 ISO 8601，如 2024-01-01 或 2024-06-15T12:00:00)")
+
+    if args.command == 'ingest':
+        ingest_files(args.files)
+    elif args.command == 'range':
+        records = query_range(args.norad_id, args.start, args.end)
+        for r in records:
+            print(json.dumps(r, ensure_ascii=False))
+        print(f"📊 共 {len(records)} 条")
+    elif args.command == 'asof':
+        record = query_as_of(args.norad_id, args.when)
+        print(json.dumps(record, ensure_ascii=False) if record else "⚠️  未找到")
+    elif args.command == 'bench':
+        run_benchmark(args.rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+OrbitalGuard - 长期轨道环境预测 (J2 / Drag Secular Evolution Forecast)
+======================================================================
+功能：
+1. 从 Orbits 在轨目录出发，按大步长（默认 30 天）向量化推进全目录 10–25 年：
+   - J2 长期项：升交点赤经、近地点幅角进动
+   - 大气阻力：由 bstar 换算弹道系数，分段指数大气模型 × 太阳活动周期因子，
+     计算半长轴衰减率；近地点高度保持不变，先圆化再整体下降
+   - 近地点低于再入高度即视为陨落
+2. 在轨卫星在剩余工作寿命内保持轨道（不受阻力影响），寿命结束后按离轨成功率移除，
+   未成功离轨的卫星转为无控物体
+3. 可选注入发射流量：
+   - JSON 发射计划（星座部署：起止日期、年发射量、高度、倾角、寿命、离轨成功率）
+   - 按近 N 年实际发射重放（从 SpaceObjects 发射日期统计，轨道取自这些物体）
+4. 输出按 ALTITUDE_BANDS 高度壳层（与 Query 1.3 / v_orbits_classified 相同）的数量时间序列，
+   可写入 CSV
+5. 基准测试：将目录复制扩充到指定规模，统计 25 年预测耗时
+
+与 Use Case 5.3 (Deorbit Trend & Launch Balance) 的区别：
+- 后者只统计历史发射与陨落日期
+- 本模块向前预测各壳层物体数，支持可持续性报告中的情景对比
+
+模型限制：
+- 平均根数长期演化，不含日月引力、光压、共振与碰撞产生的新碎片
+- 大气密度为静态指数模型 (Vallado 表 8-4)，太阳活动按 11 年正弦周期缩放
+- 目录中各物体历元差异在多年尺度上忽略，统一从最新历元开始推进
+
+发射计划文件格式 (JSON 数组)：
+    [{"name": "LEO constellation", "start": "2027-01-01", "end": "2032-12-31",
+      "per_year": 1200, "altitude_km": 550, "inclination_deg": 53,
+      "operational_years": 5, "disposal_success": 0.9, "bstar": 0.0002}]
+
+用法：
+    python environment_forecast.py --years 25
+    python environment_forecast.py --years 25 --launches launch_plan.json --csv forecast.csv
+    python environment_forecast.py --years 10 --replay-years 3     # 按近 3 年发射量持续发射
+    python environment_forecast.py --bench 30000
+"""
+
+import sqlite3
+import argparse
+import csv
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from create_database import DB_NAME, print_header
+from snapshot import ALTITUDE_BANDS, OTHER_BAND, altitude_band_index
+from breakup_simulator import BSTAR_PER_AREA_TO_MASS
+import orbit_math as om
+
+# ============================================================
+# 配置
+# ============================================================
+
+FORECAST_YEARS = 25
+STEP_DAYS = 30
+SECONDS_PER_YEAR = 365.25 * om.SECONDS_PER_DAY
+
+REENTRY_ALTITUDE_KM = 120.0
+DRAG_COEFFICIENT = 2.2
+# 在轨卫星剩余工作寿命在 [0, PAYLOAD_LIFE_YEARS] 内均匀分布（目录不含发射后的机动历史）
+PAYLOAD_LIFE_YEARS = 5.0
+# 寿命结束后成功离轨的比例（其余转为无控物体）
+DISPOSAL_SUCCESS = 0.9
+# bstar 缺失或为 0 的注入物体使用的默认值 (1/ER)
+DEFAULT_BSTAR = 1e-4
+
+# 太阳活动：密度因子 = 1 + 振幅 × cos(2π (年份 - 极大年) / 周期)
+SOLAR_CYCLE_YEARS = 11.0
+SOLAR_MAX_YEAR = 2025.0
+SOLAR_CYCLE_AMPLITUDE = 0.5
+
+# 分段指数大气 (Vallado, Fundamentals of Astrodynamics, 表 8-4)：基准高度 km、密度 kg/m³、标高 km
+ATMOSPHERE = np.array([
+    (100, 5.297e-7, 5.877), (110, 9.661e-8, 7.263), (120, 2.438e-8, 9.473),
+    (130, 8.484e-9, 12.636), (140, 3.845e-9, 16.149), (150, 2.070e-9, 22.523),
+    (180, 5.464e-10, 29.740), (200, 2.789e-10, 37.105), (250, 7.248e-11, 45.546),
+    (300, 2.418e-11, 53.628), (350, 9.518e-12, 53.298), (400, 3.725e-12, 58.515),
+    (450, 1.585e-12, 60.828), (500, 6.967e-13, 63.822), (600, 1.454e-13, 71.835),
+    (700, 3.614e-14, 88.667), (800, 1.170e-14, 124.64), (900, 5.245e-15, 181.05),
+    (1000, 3.019e-15, 268.00),
+])
+
+STATE_FIELDS = ('a', 'e', 'inc', 'raan', 'argp', 'ballistic', 'maintained_until', 'disposal')
+
+BENCH_YEARS = 25
+
+# ============================================================
+# 1. 物理模型
+# ============================================================
+
+def atmospheric_density(altitude_km):
+    """分段指数大气密度 (kg/m³)；低于 100 km 沿用首段，高于 1000 km 沿用末段"""
+    base, rho0, scale = ATMOSPHERE.T
+    k = np.clip(np.searchsorted(base, altitude_km, side='right') - 1, 0, len(base) - 1)
+    return rho0[k] * np.exp(-(altitude_km - base[k]) / scale[k])
+
+def solar_activity_factor(t):
+    year = 1970.0 + t / SECONDS_PER_YEAR
+    return 1.0 + SOLAR_CYCLE_AMPLITUDE * np.cos(2 * np.pi * (year - SOLAR_MAX_YEAR) / SOLAR_CYCLE_YEARS)
+
+def ballistic_coefficient(bstar):
+    """B* (1/ER) → Cd·A/m (m²/kg)，与 breakup_simulator 的 B* 换算一致"""
+    return DRAG_COEFFICIENT * np.abs(bstar) / BSTAR_PER_AREA_TO_MASS
+
+def sma_decay_rate(a, e, ballistic, density_factor):
+    """半长轴衰减率 da/dt (km/s，负值)
+
+    圆轨道 da/dt = -ρ·(Cd·A/m)·√(μa)；偏心轨道阻力集中在近地点，
+    密度取近地点以上半个标高处的值。
+    """
+    perigee = a * (1 - e) - om.R_EARTH
+    base, _, scale = ATMOSPHERE.T
+    k = np.clip(np.searchsorted(base, perigee, side='right') - 1, 0, len(base) - 1)
+    effective = np.where(e > 0.001, perigee + 0.5 * scale[k], a - om.R_EARTH)
+    rho = atmospheric_density(effective) * density_factor
+    # ρ (kg/m³) × Cd·A/m (m²/kg) → 1/m，× 1000 → 1/km
+    return -rho * ballistic * 1000.0 * np.sqrt(om.MU_EARTH * a)
+
+# ============================================================
+# 2. 物体集合
+# ============================================================
+
+def empty_state():
+    return {f: np.empty(0, dtype=bool if f == 'disposal' else np.float64) for f in STATE_FIELDS}
+
+def concat_state(a, b):
+    return {f: np.concatenate([a[f], b[f]]) for f in STATE_FIELDS}
+
+def state_from_elements(elements, start, payload_life_years=PAYLOAD_LIFE_YEARS,
+                        disposal_success=DISPOSAL_SUCCESS, seed=0):
+    """目录根数 → 预测状态；PAYLOAD 在随机剩余寿命内保持轨道"""
+    rng = np.random.default_rng(seed)
+    n = len(elements['norad_id'])
+    payload = elements['object_type'] == 'PAYLOAD'
+    remaining = rng.uniform(0, payload_life_years, n) * SECONDS_PER_YEAR
+    return {
+        'a': om.mean_motion_to_sma(elements['mean_motion']),
+        'e': elements['eccentricity'].astype(np.float64),
+        'inc': np.radians(elements['inclination_deg']),
+        'raan': np.radians(elements['ra_of_asc_node']),
+        'argp': np.radians(elements['arg_of_pericenter']),
+        'ballistic': ballistic_coefficient(elements['bstar']),
+        'maintained_until': np.where(payload, start + remaining, -np.inf),
+        'disposal': np.where(payload, rng.random(n) < disposal_success, False),
+    }
+
+class LaunchCampaign:
+    """一项发射计划：在 [start, end) 内按年发射量均匀注入，轨道取自模板"""
+
+    def __init__(self, name, start, end, per_year, templates, operational_years, disposal_success):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.per_year = per_year
+        self.templates = templates          # 根数字典（与 state_from_elements 输入相同的键）
+        self.operational_years = operational_years
+        self.disposal_success = disposal_success
+        self.pending = 0.0                  # 累计的小数发射量，保证长期发射总数准确
+        self.launched = 0
+
+    def launches(self, t0, t1, rng):
+        """[t0, t1) 内发射的物体 → 预测状态"""
+        overlap = min(t1, self.end) - max(t0, self.start)
+        if overlap <= 0:
+            return empty_state()
+        self.pending += self.per_year * overlap / SECONDS_PER_YEAR
+        count = int(self.pending)
+        self.pending -= count
+        if count == 0:
+            return empty_state()
+        self.launched += count
+        pick = rng.integers(0, len(self.templates['mean_motion']), count)
+        chosen = {k: v[pick] for k, v in self.templates.items()}
+        state = state_from_elements(chosen, t1, 0.0, self.disposal_success, seed=rng.integers(1 << 31))
+        # 新发射的物体工作寿命完整
+        state['maintained_until'] = np.where(chosen['object_type'] == 'PAYLOAD',
+                                             t1 + self.operational_years * SECONDS_PER_YEAR, -np.inf)
+        return state
+
+def _to_unix(date):
+    return float(om.epoch_to_unix([date])[0])
+
+def load_launch_plan(path):
+    """JSON 发射计划 → [LaunchCampaign, ...]"""
+    with open(path, 'r') as f:
+        plan = json.load(f)
+    campaigns = []
+    for item in plan:
+        altitude = float(item['altitude_km'])
+        a = om.R_EARTH + altitude
+        mean_motion = np.sqrt(om.MU_EARTH / a**3) * om.SECONDS_PER_DAY / om.TWO_PI
+        templates = {
+            'norad_id': np.zeros(1, dtype=np.int64),
+            'mean_motion': np.array([mean_motion]),
+            'eccentricity': np.array([float(item.get('eccentricity', 0.0))]),
+            'inclination_deg': np.array([float(item['inclination_deg'])]),
+            'ra_of_asc_node': np.array([0.0]),
+            'arg_of_pericenter': np.array([0.0]),
+            'bstar': np.array([float(item.get('bstar', DEFAULT_BSTAR))]),
+            'object_type': np.array(['PAYLOAD'], dtype=object),
+        }
+        campaigns.append(LaunchCampaign(
+            item.get('name', f"{altitude:.0f} km"), _to_unix(item['start']), _to_unix(item['end']),
+            float(item['per_year']), templates, float(item.get('operational_years', PAYLOAD_LIFE_YEARS)),
+            float(item.get('disposal_success', DISPOSAL_SUCCESS))))
+    return campaigns
+
+def replay_campaign(conn, elements, start, years, horizon_years):
+    """近 years 年实际发射的在轨物体作为模板，按同样的年发射量持续发射"""
+    launched = pd.read_sql_query("SELECT norad_id, launch_date FROM SpaceObjects", conn)
+    launch_time = om.epoch_to_unix(launched['launch_date'])
+    recent = launched['norad_id'].to_numpy()[launch_time >= start - years * SECONDS_PER_YEAR]
+    rows = np.flatnonzero(np.isin(elements['norad_id'], recent))
+    if len(rows) == 0:
+        return None
+    templates = om.subset(elements, rows)
+    templates['bstar'] = np.where(templates['bstar'] == 0, DEFAULT_BSTAR, templates['bstar'])
+    return LaunchCampaign(f"重放近 {years:g} 年发射", start, start + horizon_years * SECONDS_PER_YEAR,
+                          len(rows) / years, templates, PAYLOAD_LIFE_YEARS, DISPOSAL_SUCCESS)
+
+# ============================================================
+# 3. 长期推进
+# ============================================================
+
+def advance(state, t, dt):
+    """推进 dt 秒（中点法积分半长轴），返回 (新状态, 本步再入数, 本步离轨数)"""
+    a, e = state['a'], state['e']
+    maintained = state['maintained_until'] > t
+    drag = ~maintained & (state['ballistic'] > 0)
+
+    factor = solar_activity_factor(t + dt / 2)
+    rate = sma_decay_rate(a, e, state['ballistic'], factor)
+    a_mid = a + 0.5 * dt * rate
+    e_mid = np.maximum(1 - a * (1 - e) / np.maximum(a_mid, 1.0), 0.0)
+    rate = sma_decay_rate(np.maximum(a_mid, om.R_EARTH), e_mid, state['ballistic'], factor)
+
+    # 近地点半径保持不变（阻力先降低远地点），圆化后整体下降
+    perigee_radius = a * (1 - e)
+    a_new = np.where(drag, np.maximum(a + dt * rate, om.R_EARTH), a)
+    e_new = np.where(drag, np.maximum(1 - perigee_radius / a_new, 0.0), e)
+    state['a'], state['e'] = a_new, e_new
+
+    raan_dot, argp_dot = om.j2_secular_rates(a_new, e_new, state['inc'])
+    state['raan'] = (state['raan'] + raan_dot * dt) % om.TWO_PI
+    state['argp'] = (state['argp'] + argp_dot * dt) % om.TWO_PI
+
+    # 本步结束工作寿命：成功离轨的移除，其余转为无控
+    retiring = maintained & (state['maintained_until'] <= t + dt)
+    disposed = retiring & state['disposal']
+    reentered = a_new * (1 - e_new) - om.R_EARTH < REENTRY_ALTITUDE_KM
+    keep = ~(reentered | disposed)
+    return {f: v[keep] for f, v in state.items()}, int((reentered & ~disposed).sum()), int(disposed.sum())
+
+def band_counts(state):
+    n = np.sqrt(om.MU_EARTH / state['a']**3) * om.SECONDS_PER_DAY / om.TWO_PI
+    return np.bincount(altitude_band_index(n), minlength=len(ALTITUDE_BANDS) + 1)
+
+def forecast(state, start, years=FORECAST_YEARS, step_days=STEP_DAYS, campaigns=(), seed=0):
+    """推进整个目录并记录每步的壳层数量
+
+    Returns:
+        {'time': (T,), 'bands': (T, 壳层数), 'reentered' / 'disposed' / 'launched': (T,) 累计值}
+    """
+    rng = np.random.default_rng(seed)
+    dt = step_days * om.SECONDS_PER_DAY
+    n_steps = int(np.ceil(years * SECONDS_PER_YEAR / dt))
+    times = start + dt * np.arange(n_steps + 1)
+    bands = np.zeros((n_steps + 1, len(ALTITUDE_BANDS) + 1), dtype=np.int64)
+    reentered = np.zeros(n_steps + 1, dtype=np.int64)
+    disposed = np.zeros(n_steps + 1, dtype=np.int64)
+    launched = np.zeros(n_steps + 1, dtype=np.int64)
+    bands[0] = band_counts(state)
+
+    for k in range(n_steps):
+        t = times[k]
+        state, n_reentered, n_disposed = advance(state, t, dt)
+        for campaign in campaigns:
+            new = campaign.launches(t, t + dt, rng)
+            launched[k + 1] += len(new['a'])
+            state = concat_state(state, new)
+        reentered[k + 1] = reentered[k] + n_reentered
+        disposed[k + 1] = disposed[k] + n_disposed
+        launched[k + 1] += launched[k]
+        bands[k + 1] = band_counts(state)
+
+    return {'time': times, 'bands': bands, 'reentered': reentered, 'disposed': disposed,
+            'launched': launched}
+
+# ============================================================
+# 4. 输出
+# ============================================================
+
+def _labels():
+    return [label for _, label in ALTITUDE_BANDS] + [OTHER_BAND]
+
+def print_series(result, every_years=1.0):
+    """按年打印各壳层数量（只列出出现过物体的壳层）"""
+    labels = _labels()
+    shown = np.flatnonzero(result['bands'].max(axis=0) > 0)
+    years = (result['time'] - result['time'][0]) / SECONDS_PER_YEAR
+    rows = np.unique(np.searchsorted(years, np.arange(0, years[-1] + 1e-9, every_years)))
+    rows = rows[rows < len(years)]
+
+    header = ''.join(f"{labels[b][:12]:>13s}" for b in shown)
+    print(f"   {'年份':6s}{header}{'总数':>9s}{'再入':>8s}{'离轨':>8s}{'发射':>8s}")
+    for r in rows:
+        year = om.unix_to_iso(result['time'][r])[:7]
+        cells = ''.join(f"{result['bands'][r, b]:>13,}" for b in shown)
+        print(f"   {year:8s}{cells}{result['bands'][r].sum():>9,}{result['reentered'][r]:>8,}"
+              f"{result['disposed'][r]:>8,}{result['launched'][r]:>8,}")
+
+def write_csv(result, path):
+    labels = _labels()
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date'] + labels + ['total', 'reentered', 'disposed', 'launched'])
+        for k, t in enumerate(result['time']):
+            writer.writerow([om.unix_to_iso(t)[:10]] + result['bands'][k].tolist()
+                            + [int(result['bands'][k].sum()), int(result['reentered'][k]),
+                               int(result['disposed'][k]), int(result['launched'][k])])
+
+# ============================================================
+# 5. 基准测试
+# ============================================================
+
+def run_benchmark(elements, start, n_objects, years=BENCH_YEARS, step_days=STEP_DAYS, seed=1):
+    """目录按需复制扩充到 n_objects 个物体（升交点 / 平近点角随机化），统计预测耗时"""
+    print_header(f"基准测试: {n_objects:,} 个物体 × {years} 年 (步长 {step_days} 天)")
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(elements['norad_id']), n_objects)
+    scaled = om.subset(elements, rows)
+    scaled['ra_of_asc_node'] = rng.uniform(0, 360, n_objects)
+    scaled['mean_motion'] = scaled['mean_motion'] * (1 + rng.normal(0, 1e-3, n_objects))
+
+    t = time.perf_counter()
+    state = state_from_elements(scaled, start)
+    result = forecast(state, start, years, step_days)
+    elapsed = time.perf_counter() - t
+    steps = len(result['time']) - 1
+    print(f"   {steps} 步, 耗时 {elapsed:.2f} 秒 ({elapsed / steps * 1000:.1f} ms/步, "
+          f"{n_objects * steps / elapsed / 1e6:.1f} M 物体·步/秒)")
+    print(f"   {years} 年后在轨 {result['bands'][-1].sum():,} 个, 再入 {result['reentered'][-1]:,}, "
+          f"离轨 {result['disposed'][-1]:,}")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 长期轨道环境预测")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--years', type=float, default=FORECAST_YEARS, help="预测年数")
+    parser.add_argument('--step', type=float, default=STEP_DAYS, help="步长 (天)")
+    parser.add_argument('--launches', metavar='FILE', help="JSON 发射计划")
+    parser.add_argument('--replay-years', type=float, help="按近 N 年的实际发射量持续发射")
+    parser.add_argument('--payload-life', type=float, default=PAYLOAD_LIFE_YEARS,
+                        help="在轨卫星剩余工作寿命上限 (年)")
+    parser.add_argument('--csv', metavar='FILE', help="每步壳层数量写入 CSV")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bench', type=int, metavar='OBJECTS', help="扩充到指定物体数并计时")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 长期轨道环境预测")
+    print("="*70)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        elements = om.load_elements(conn, extra_columns=('object_type',))
+        start = float(elements['epoch'].max())
+        print(f"📊 在轨物体: {len(elements['norad_id']):,} 个, 起点 {om.unix_to_iso(start)[:10]}")
+
+        if args.bench:
+            run_benchmark(elements, start, args.bench, step_days=args.step)
+            return
+
+        campaigns = load_launch_plan(args.launches) if args.launches else []
+        if args.replay_years:
+            replay = replay_campaign(conn, elements, start, args.replay_years, args.years)
+            if replay is None:
+                print(f"⚠️  近 {args.replay_years:g} 年没有在轨的新发射物体，跳过重放")
+            else:
+                campaigns.append(replay)
+    finally:
+        conn.close()
+
+    for c in campaigns:
+        print(f"🚀 发射计划: {c.name}, {c.per_year:,.0f} 个/年, "
+              f"{om.unix_to_iso(c.start)[:10]} ~ {om.unix_to_iso(min(c.end, start + args.years * SECONDS_PER_YEAR))[:10]}")
+
+    print_header(f"预测 {args.years:g} 年 (步长 {args.step:g} 天)")
+    t = time.perf_counter()
+    state = state_from_elements(elements, start, args.payload_life, seed=args.seed)
+    result = forecast(state, start, args.years, args.step, campaigns, args.seed)
+    print(f"✅ 完成 ({time.perf_counter() - t:.2f}秒)\n")
+    print_series(result)
+
+    if args.csv:
+        write_csv(result, args.csv)
+        print(f"\n📁 时间序列已写入: {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+OrbitalGuard - 星历缓存 (Chebyshev Ephemeris Cache)
+==================================================
+功能：
+1. 对 Orbits 中每个在轨物体，在预报时间窗口内按分段切比雪夫多项式拟合 x / y / z
+2. 系数存为 .npy 文件，以 memory-map 方式只读加载，按 (norad_id, 段号) 定位
+3. 任意时刻的位置 / 速度由切比雪夫插值得到，批量查询全部向量化，无需重新传播
+4. 新历元到达时，只重新拟合该物体新历元之后的分段（之前的分段保留）
+5. 插值精度与查询吞吐量基准测试
+
+存储布局：
+    ephemeris/
+    ├── meta.json              # 当前代次、时间窗口、多项式阶数（原子替换，作为提交点）
+    ├── index_<代次>.npy        # 结构化数组，按 norad_id 升序：历元、段长、段数、系数起始行
+    └── coefficients_<代次>.npy # (总段数, 3, 阶数+1) float64
+
+分段规则：
+- 每个物体的段长 = 轨道周期 / 每圈段数；偏心率越大每圈段数越多（近地点附近变化快）
+- 物体 i 的第 k 段覆盖 [t0 + k·段长, t0 + (k+1)·段长)，系数位于 offset_i + k 行
+- 刷新时写入新代次文件，最后替换 meta.json；正在读取的进程继续使用旧代次文件
+
+用法：
+    python ephemeris_cache.py build --hours 24    # 从目录最新历元起建立 24 小时星历
+    python ephemeris_cache.py refresh             # Orbits 更新后失效并重拟合受影响的分段
+    python ephemeris_cache.py bench               # 插值精度与查询吞吐量
+"""
+
+import sqlite3
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+from create_database import DB_NAME, print_header
+import orbit_math as om
+
+# ============================================================
+# 配置
+# ============================================================
+
+CACHE_DIR = 'ephemeris'
+META_FILE = 'meta.json'
+
+HORIZON_HOURS = 24
+DEGREE = 12
+# 近圆轨道每圈 2 段；偏心率每增加 0.1 每圈多 2 段
+SEGMENTS_PER_REV = 2
+ECCENTRICITY_SEGMENT_FACTOR = 10
+# 一次拟合的 (物体, 段) 数量，控制内存占用
+FIT_BATCH = 100_000
+
+INDEX_DTYPE = np.dtype([
+    ('norad_id', np.int64),
+    ('epoch', np.float64),           # 拟合所用根数的历元 (UNIX 秒)
+    ('segment_seconds', np.float64),
+    ('n_segments', np.int32),
+    ('offset', np.int64),            # 系数数组中的起始行
+])
+
+# ============================================================
+# 1. 切比雪夫基础
+# ============================================================
+
+def chebyshev_nodes(degree=DEGREE):
+    """第一类切比雪夫节点 x_k ∈ (-1, 1) 与节点值 → 系数的变换矩阵"""
+    n = degree + 1
+    k = np.arange(n)
+    x = np.cos(np.pi * (k + 0.5) / n)
+    # c_j = (2/n) Σ_k f(x_k) T_j(x_k)，c_0 再减半
+    transform = 2.0 / n * np.cos(np.outer(k, np.pi * (k + 0.5) / n))
+    transform[0] /= 2.0
+    return x, transform
+
+def chebyshev_eval(coefficients, x, derivative=False):
+    """在 x ∈ [-1, 1] 处求值
+
+    Args:
+        coefficients: (Q, 3, n)
+        x: (Q,)
+
+    Returns:
+        (Q, 3) 函数值；derivative=True 时同时返回对 x 的导数
+    """
+    n = coefficients.shape[-1]
+    T = np.empty((n, len(x)))
+    T[0] = 1.0
+    if n > 1:
+        T[1] = x
+    for j in range(2, n):
+        T[j] = 2.0 * x * T[j - 1] - T[j - 2]
+    value = np.einsum('qdj,jq->qd', coefficients, T)
+    if not derivative:
+        return value
+
+    # T'_{j} = 2 T_{j-1} + 2x T'_{j-1} - T'_{j-2}
+    dT = np.zeros((n, len(x)))
+    if n > 1:
+        dT[1] = 1.0
+    for j in range(2, n):
+        dT[j] = 2.0 * T[j - 1] + 2.0 * x * dT[j - 1] - dT[j - 2]
+    return value, np.einsum('qdj,jq->qd', coefficients, dT)
+
+def segment_seconds(elements):
+    """每个物体的段长 (秒)"""
+    period = om.SECONDS_PER_DAY / elements['mean_motion']
+    per_rev = np.ceil(SEGMENTS_PER_REV * (1 + ECCENTRICITY_SEGMENT_FACTOR * elements['eccentricity']))
+    return period / per_rev
+
+def fit_segments(elements, obj, seg, t0, seg_seconds, degree=DEGREE):
+    """拟合指定的 (物体, 段号) 列表
+
+    Args:
+        elements: 根数列数组字典
+        obj, seg: 等长数组，物体下标与段号
+        t0: 窗口起点 (UNIX 秒)
+        seg_seconds: 每个物体的段长 (按 elements 下标)
+
+    Returns:
+        (len(obj), 3, degree+1) 系数
+    """
+    x, transform = chebyshev_nodes(degree)
+    out = np.empty((len(obj), 3, degree + 1))
+    for start in range(0, len(obj), FIT_BATCH):
+        o = obj[start:start + FIT_BATCH]
+        length = seg_seconds[o]
+        # 节点时刻 (n, P)：段中点 + 半段长 × x_k
+        mid = t0 + (seg[start:start + FIT_BATCH] + 0.5) * length
+        times = mid[None, :] + 0.5 * length[None, :] * x[:, None]
+        r, _ = om.propagate(om.subset(elements, o), times)
+        out[start:start + FIT_BATCH] = np.einsum('jk,kpd->pdj', transform, r)
+    return out
+
+# ============================================================
+# 2. 缓存文件
+# ============================================================
+
+def _meta_path(cache_dir):
+    return os.path.join(cache_dir, META_FILE)
+
+def write_generation(cache_dir, index, coefficients, t0, t_end, degree):
+    """写入新代次文件，最后原子替换 meta.json，并清理旧代次"""
+    os.makedirs(cache_dir, exist_ok=True)
+    old = read_meta(cache_dir)
+    generation = (old['generation'] + 1) if old else 1
+
+    index_file = f"index_{generation}.npy"
+    coef_file = f"coefficients_{generation}.npy"
+    np.save(os.path.join(cache_dir, index_file), index)
+    np.save(os.path.join(cache_dir, coef_file), coefficients)
+
+    meta = {
+        'generation': generation,
+        'index_file': index_file,
+        'coefficients_file': coef_file,
+        't0': t0,
+        't_end': t_end,
+        'degree': degree,
+        'objects': int(len(index)),
+        'segments': int(len(coefficients)),
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    tmp = _meta_path(cache_dir) + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, _meta_path(cache_dir))
+
+    # 删除两代以前的文件（上一代保留给仍在读取的进程）
+    for path in glob.glob(os.path.join(cache_dir, '*_*.npy')):
+        stem = os.path.basename(path).rsplit('_', 1)[-1][:-len('.npy')]
+        if stem.isdigit() and int(stem) < generation - 1:
+            os.remove(path)
+    return meta
+
+def read_meta(cache_dir):
+    path = _meta_path(cache_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+class EphemerisCache:
+    """只读星历缓存（系数文件 memory-map 加载）
+
+    Attributes:
+        norad_ids: 已缓存物体（升序）
+        t0, t_end: 覆盖时间窗口 (UNIX 秒)
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.meta = read_meta(cache_dir)
+        if self.meta is None:
+            raise FileNotFoundError(f"{cache_dir} 中没有星历缓存，先运行 build")
+        # 索引很小，整体读入内存；系数按需分页
+        self.index = np.load(os.path.join(cache_dir, self.meta['index_file']))
+        self.coefficients = np.load(os.path.join(cache_dir, self.meta['coefficients_file']), mmap_mode='r')
+        self.t0 = self.meta['t0']
+        self.t_end = self.meta['t_end']
+        self.norad_ids = self.index['norad_id']
+
+    def rows(self, norad_ids):
+        """norad_id 数组 → 索引行号（-1 表示未缓存）"""
+        norad_ids = np.asarray(norad_ids)
+        idx = np.clip(np.searchsorted(self.norad_ids, norad_ids), 0, len(self.norad_ids) - 1)
+        return np.where(self.norad_ids[idx] == norad_ids, idx, -1)
+
+    def state(self, norad_ids, t, velocity=False):
+        """批量插值
+
+        Args:
+            norad_ids, t: 可相互广播的数组（展开为一维查询列表）
+
+        Returns:
+            (r, valid) 或 (r, v, valid)；r / v 形状 (Q, 3)，
+            valid 为 False 的查询（物体未缓存或时刻超出窗口）结果为 NaN
+        """
+        norad_ids, t = np.broadcast_arrays(np.asarray(norad_ids), np.asarray(t, dtype=np.float64))
+        norad_ids, t = norad_ids.ravel(), t.ravel()
+        row = self.rows(norad_ids)
+        valid = (row >= 0) & (t >= self.t0) & (t <= self.t_end)
+
+        entry = self.index[np.where(valid, row, 0)]
+        length = entry['segment_seconds']
+        offset_t = t - self.t0
+        seg = np.clip(np.floor(offset_t / length).astype(np.int64), 0, entry['n_segments'] - 1)
+        x = np.clip(2.0 * (offset_t - seg * length) / length - 1.0, -1.0, 1.0)
+        coefficients = self.coefficients[entry['offset'] + seg]
+
+        if velocity:
+            r, dr = chebyshev_eval(coefficients, x, derivative=True)
+            v = dr * (2.0 / length)[:, None]
+            r[~valid] = np.nan
+            v[~valid] = np.nan
+            return r, v, valid
+        r = chebyshev_eval(coefficients, x)
+        r[~valid] = np.nan
+        return r, valid
+
+    def positions_at(self, t, velocity=False):
+        """全部缓存物体在时刻 t 的位置（与 norad_ids 对齐）"""
+        return self.state(self.norad_ids, t, velocity)
+
+# ============================================================
+# 3. 建立 / 刷新
+# ============================================================
+
+def build_cache(db_path=DB_NAME, hours=HORIZON_HOURS, start=None, cache_dir=CACHE_DIR, degree=DEGREE):
+    print_header(f"建立星历缓存 ({hours:g} 小时, {degree} 阶)")
+    conn = sqlite3.connect(db_path)
+    try:
+        elements = om.load_elements(conn)
+    finally:
+        conn.close()
+
+    t0 = float(elements['epoch'].max()) if start is None else float(start)
+    t_end = t0 + hours * 3600
+    n = len(elements['norad_id'])
+
+    seg_seconds = segment_seconds(elements)
+    n_segments = np.ceil((t_end - t0) / seg_seconds).astype(np.int64)
+    index = np.zeros(n, dtype=INDEX_DTYPE)
+    index['norad_id'] = elements['norad_id']
+    index['epoch'] = elements['epoch']
+    index['segment_seconds'] = seg_seconds
+    index['n_segments'] = n_segments
+    index['offset'] = np.cumsum(n_segments) - n_segments
+
+    start_time = time.time()
+    obj = np.repeat(np.arange(n), n_segments)
+    seg = np.arange(len(obj)) - np.repeat(index['offset'], n_segments)
+    coefficients = fit_segments(elements, obj, seg, t0, seg_seconds, degree)
+
+    meta = write_generation(cache_dir, index, coefficients, t0, t_end, degree)
+    size_mb = coefficients.nbytes / 1024 / 1024
+    print(f"✅ {n:,} 个物体, {len(obj):,} 段, {size_mb:.1f} MB ({time.time() - start_time:.1f}秒)")
+    print(f"   窗口: {om.unix_to_iso(t0)[:19]} → {om.unix_to_iso(t_end)[:19]}  代次 {meta['generation']}")
+    return meta
+
+def refresh_cache(db_path=DB_NAME, cache_dir=CACHE_DIR):
+    """根据 Orbits 最新历元失效并重拟合分段
+
+    - 历元未变的物体：系数原样复制
+    - 历元更新的物体：新历元所在段及之后的段重新拟合，之前的段保留
+    - 新出现的物体：全部分段拟合；已再入 / 消失的物体：移除
+    """
+    print_header("刷新星历缓存")
+    cache = EphemerisCache(cache_dir)
+    conn = sqlite3.connect(db_path)
+    try:
+        elements = om.load_elements(conn)
+    finally:
+        conn.close()
+
+    t0, t_end, degree = cache.t0, cache.t_end, cache.meta['degree']
+    n = len(elements['norad_id'])
+    old_row = cache.rows(elements['norad_id'])
+    old = cache.index[np.maximum(old_row, 0)]
+    known = old_row >= 0
+    updated = known & (elements['epoch'] > old['epoch'])
+    added = ~known
+
+    # 已知物体沿用原分段几何，新物体按自身周期分段
+    seg_seconds = np.where(known, old['segment_seconds'], segment_seconds(elements))
+    n_segments = np.where(known, old['n_segments'],
+                          np.ceil((t_end - t0) / seg_seconds)).astype(np.int64)
+    first_stale = np.where(updated, np.floor((elements['epoch'] - t0) / seg_seconds), n_segments)
+    first_stale = np.where(added, 0, np.clip(first_stale, 0, n_segments)).astype(np.int64)
+
+    index = np.zeros(n, dtype=INDEX_DTYPE)
+    index['norad_id'] = elements['norad_id']
+    index['epoch'] = np.where(known & ~updated, old['epoch'], elements['epoch'])
+    index['segment_seconds'] = seg_seconds
+    index['n_segments'] = n_segments
+    index['offset'] = np.cumsum(n_segments) - n_segments
+
+    obj = np.repeat(np.arange(n), n_segments)
+    seg = np.arange(len(obj)) - np.repeat(index['offset'], n_segments)
+    stale = seg >= first_stale[obj]
+
+    coefficients = np.empty((len(obj), 3, degree + 1))
+    keep = ~stale
+    coefficients[keep] = cache.coefficients[old['offset'][obj[keep]] + seg[keep]]
+    start_time = time.time()
+    coefficients[stale] = fit_segments(elements, obj[stale], seg[stale], t0, seg_seconds, degree)
+
+    removed = len(cache.norad_ids) - int(known.sum())
+    meta = write_generation(cache_dir, index, coefficients, t0, t_end, degree)
+    print(f"✅ 历元更新 {int(updated.sum()):,} 个, 新增 {int(added.sum()):,} 个, 移除 {removed:,} 个")
+    print(f"   重新拟合 {int(stale.sum()):,} / {len(obj):,} 段 ({time.time() - start_time:.2f}秒)  代次 {meta['generation']}")
+    return meta
+
+# ============================================================
+# 4. 基准测试
+# ============================================================
+
+def run_benchmark(db_path=DB_NAME, cache_dir=CACHE_DIR, n_queries=1_000_000):
+    cache = EphemerisCache(cache_dir)
+    conn = sqlite3.connect(db_path)
+    try:
+        elements = om.load_elements(conn)
+    finally:
+        conn.close()
+    rows = cache.rows(elements['norad_id'])
+    elements = om.subset(elements, rows >= 0)
+    elements = om.subset(elements, cache.index['epoch'][cache.rows(elements['norad_id'])] == elements['epoch'])
+
+    rng = np.random.default_rng(3)
+    pick = rng.integers(0, len(elements['norad_id']), n_queries)
+    sub = om.subset(elements, pick)
+    # 刷新过的物体，新历元所在段之前的段仍由旧根数拟合，只在之后的时间上比较
+    length = cache.index['segment_seconds'][cache.rows(sub['norad_id'])]
+    fit_from = cache.t0 + np.maximum(np.floor((sub['epoch'] - cache.t0) / length), 0) * length
+    t = fit_from + rng.random(n_queries) * (cache.t_end - fit_from)
+
+    print_header(f"插值精度 ({n_queries:,} 个随机 (物体, 时刻))")
+    r_cache, v_cache, _ = cache.state(sub['norad_id'], t, velocity=True)
+    r_ref, _ = om.propagate(sub, t)
+    # 参考速度取位置的中心差分：propagate 的速度不含 J2 引起的轨道面转动项
+    v_ref = (om.propagate(sub, t + 0.5)[0] - om.propagate(sub, t - 0.5)[0])
+    err = np.linalg.norm(r_cache - r_ref, axis=1) * 1000
+    verr = np.linalg.norm(v_cache - v_ref, axis=1) * 1000
+    ecc = sub['eccentricity']
+    print(f"   位置误差: 中位数 {np.median(err):.2e} m, 99% {np.percentile(err, 99):.2e} m, 最大 {err.max():.2e} m")
+    print(f"   速度误差: 中位数 {np.median(verr):.2e} m/s, 最大 {verr.max():.2e} m/s")
+    if (ecc > 0.1).any():
+        print(f"   高偏心率 (e > 0.1) 最大位置误差: {err[ecc > 0.1].max():.2e} m")
+
+    print_header("查询吞吐量")
+    start = time.perf_counter()
+    cache.state(sub['norad_id'], t)
+    t_cache = time.perf_counter() - start
+    start = time.perf_counter()
+    om.propagate(sub, t)
+    t_prop = time.perf_counter() - start
+    print(f"   切比雪夫插值: {n_queries / t_cache:>14,.0f} 次/秒 ({t_cache * 1000:.0f} ms)")
+    print(f"   直接传播:     {n_queries / t_prop:>14,.0f} 次/秒 ({t_prop * 1000:.0f} ms)")
+    print(f"   加速比:       {t_prop / t_cache:>14.1f}×")
+
+    # 全目录单时刻快照（筛选 / 覆盖计算的典型访问模式）
+    times = np.linspace(cache.t0, cache.t_end, 200)
+    start = time.perf_counter()
+    for tk in times:
+        cache.positions_at(tk)
+    t_snap = (time.perf_counter() - start) / len(times)
+    start = time.perf_counter()
+    for tk in times:
+        om.propagate(elements, tk)
+    t_snap_prop = (time.perf_counter() - start) / len(times)
+    print(f"   全目录快照 ({len(cache.norad_ids):,} 个): 插值 {t_snap * 1000:.2f} ms, 传播 {t_snap_prop * 1000:.2f} ms")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 切比雪夫星历缓存")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--dir', default=CACHE_DIR, help="缓存目录")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="建立星历缓存")
+    p_build.add_argument('--hours', type=float, default=HORIZON_HOURS)
+    p_build.add_argument('--degree', type=int, default=DEGREE)
+    p_build.add_argument('--start', type=float, help="窗口起点 (UNIX 秒，默认目录最新历元)")
+
+    sub.add_parser('refresh', help="失效并重拟合有新历元的物体")
+
+    p_bench = sub.add_parser('bench', help="精度与吞吐量测试")
+    p_bench.add_argument('--queries', type=int, default=1_000_000)
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_cache(args.db, args.hours, args.start, args.dir, args.degree)
+    elif args.command == 'refresh':
+        refresh_cache(args.db, args.dir)
+    elif args.command == 'bench':
+        run_benchmark(args.db, args.dir, args.queries)
+
+if __name__ == "__main__":
+    main()
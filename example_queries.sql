@@ -42,7 +42,8 @@ SELECT
     COUNT(*) as debris_count
 FROM Orbits o
 INNER JOIN SpaceObjects s ON o.norad_id = s.norad_id
-WHERE s.object_name LIKE '%FENGYUN 1C%'
+-- CatalogSearch 为 trigram 全文索引 (catalog_search.py)，子串匹配不再全表扫描
+WHERE s.norad_id IN (SELECT rowid FROM CatalogSearch WHERE object_name LIKE '%FENGYUN 1C%')
 GROUP BY altitude_range
 ORDER BY altitude_range;
 
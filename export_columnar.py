@@ -0,0 +1,307 @@
+"""
+OrbitalGuard - 列式导出 (Arrow / Parquet Columnar Export)
+========================================================
+功能：
+1. 将 4 个核心表导出为带类型的列式文件，供下游分析直接加载
+2. Parquet (zstd 压缩)：体积小，适合归档与传输
+3. Arrow IPC (未压缩)：可 memory-map，按列零拷贝读取
+4. SpaceObjects 按 object_type 分区，Orbits 按轨道区域 (regime) 分区
+
+输出布局 (hive 分区)：
+    export/
+    ├── parquet/
+    │   ├── SpaceObjects/object_type=DEBRIS/part-0.parquet
+    │   ├── Orbits/regime=LEO/part-0.parquet
+    │   ├── SatelliteDetails/part-0.parquet
+    │   └── LaunchMissions/part-0.parquet
+    └── ipc/
+        └── ... (同上，扩展名 .arrow)
+
+下游读取示例：
+    from export_columnar import load_table
+    orbits = load_table('Orbits', columns=['norad_id', 'mean_motion'], partitions=['LEO'])
+    df = orbits.to_pandas()   # 数值列可零拷贝转换
+
+依赖：pyarrow（可选；未安装时 create_database.py 跳过导出阶段）
+"""
+
+import sqlite3
+import argparse
+import glob
+import os
+import shutil
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    pa = None
+    HAVE_PYARROW = False
+
+from create_database import DB_NAME, print_header
+from partition_storage import LEO_MIN_MEAN_MOTION
+
+# ============================================================
+# 配置
+# ============================================================
+
+EXPORT_DIR = 'export'
+EXPORT_FORMATS = ['parquet', 'ipc']
+PARQUET_COMPRESSION = 'zstd'
+BATCH_SIZE = 100_000
+
+# 列类型：'int' / 'float' / 'str' / 'dict' (低基数字符串，字典编码) / 'date' / 'timestamp'
+TABLE_COLUMNS = {
+    'SpaceObjects': [
+        ('norad_id', 'int'), ('object_name', 'str'), ('intl_designator', 'str'),
+        ('object_type', 'dict'), ('country', 'dict'), ('launch_date', 'date'),
+        ('decay_date', 'date'), ('rcs_size', 'dict'), ('launch_site', 'dict'),
+        ('launch_mission_id', 'str'),
+    ],
+    'Orbits': [
+        ('orbit_id', 'int'), ('norad_id', 'int'), ('epoch', 'timestamp'),
+        ('inclination_deg', 'float'), ('eccentricity', 'float'), ('mean_motion', 'float'),
+        ('ra_of_asc_node', 'float'), ('arg_of_pericenter', 'float'),
+        ('mean_anomaly', 'float'), ('bstar', 'float'),
+    ],
+    'SatelliteDetails': [
+        ('norad_id', 'int'), ('launch_mass_kg', 'float'), ('dry_mass_kg', 'float'),
+        ('power_watts', 'float'), ('expected_lifetime_years', 'float'), ('purpose', 'dict'),
+        ('users', 'dict'), ('contractor', 'str'), ('operator_owner', 'str'),
+        ('class_of_orbit', 'dict'), ('country_operator', 'dict'),
+    ],
+    'LaunchMissions': [
+        ('launch_mission_id', 'str'), ('launch_date', 'date'), ('country', 'dict'),
+        ('launch_site', 'dict'), ('payload_count', 'int'),
+    ],
+}
+
+# 分区列：(列名, 生成该列的 SQL 表达式)
+REGIME_SQL = f"""
+    CASE
+        WHEN mean_motion IS NULL THEN 'UNKNOWN'
+        WHEN mean_motion > {LEO_MIN_MEAN_MOTION} THEN 'LEO'
+        WHEN eccentricity >= 0.25 THEN 'HEO'
+        WHEN mean_motion BETWEEN 0.9 AND 1.1 THEN 'GEO'
+        ELSE 'MEO'
+    END
+"""
+PARTITION_BY = {
+    'SpaceObjects': ('object_type', "COALESCE(object_type, 'UNKNOWN')"),
+    'Orbits': ('regime', REGIME_SQL),
+}
+# 导出过程中携带分区值的临时列（写文件前删除，分区值体现在目录名中）
+PARTITION_FIELD = '__partition'
+
+# ============================================================
+# 1. 类型映射
+# ============================================================
+
+def _arrow_type(kind):
+    return {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'str': pa.string(),
+        'dict': pa.dictionary(pa.int32(), pa.string()),
+        'date': pa.date32(),
+        'timestamp': pa.timestamp('us'),
+    }[kind]
+
+def _to_arrow(values, kind):
+    """SQLite 列值 → 指定类型的 Arrow 数组；无法解析的日期/时间记为 null"""
+    if kind in ('int', 'float', 'str'):
+        return pa.array(values, type=_arrow_type(kind))
+    if kind == 'dict':
+        return pa.array(values, type=pa.string()).dictionary_encode()
+
+    strings = pa.array(values, type=pa.string())
+    if kind == 'date':
+        parsed = pc.strptime(strings, format='%Y-%m-%d', unit='s', error_is_null=True)
+        return parsed.cast(pa.date32())
+
+    # Orbits.epoch 形如 2025-11-26T11:32:55.972032，直接 cast 可保留微秒；
+    # 含非法值时退回逐秒解析，非法值记为 null
+    try:
+        return pc.cast(strings, pa.timestamp('us'))
+    except pa.ArrowInvalid:
+        return pc.strptime(pc.utf8_slice_codeunits(strings, 0, 19), format='%Y-%m-%dT%H:%M:%S',
+                           unit='us', error_is_null=True)
+
+# ============================================================
+# 2. 导出
+# ============================================================
+
+def _read_batches(conn, table):
+    """按批读取 SQLite 表，逐列转换为 Arrow RecordBatch（不经过 pandas 行对象）"""
+    columns = TABLE_COLUMNS[table]
+    names = [name for name, _ in columns]
+    select = ", ".join(names)
+    partition = PARTITION_BY.get(table)
+    if partition:
+        select += f", {partition[1]} AS {PARTITION_FIELD}"
+
+    cursor = conn.execute(f"SELECT {select} FROM {table}")
+    while True:
+        rows = cursor.fetchmany(BATCH_SIZE)
+        if not rows:
+            break
+        values = list(zip(*rows))
+        arrays = [_to_arrow(list(values[i]), kind) for i, (_, kind) in enumerate(columns)]
+        fields = list(names)
+        if partition:
+            arrays.append(pa.array(values[-1], type=pa.string()))
+            fields.append(PARTITION_FIELD)
+        yield pa.RecordBatch.from_arrays(arrays, names=fields)
+
+def _write_table(table_data, target_dir, fmt):
+    """写出一个分区（或未分区表）的数据文件"""
+    os.makedirs(target_dir, exist_ok=True)
+    if fmt == 'parquet':
+        path = os.path.join(target_dir, 'part-0.parquet')
+        pq.write_table(table_data, path, compression=PARQUET_COMPRESSION)
+    else:
+        # IPC 不压缩：压缩后的 buffer 无法 memory-map 零拷贝读取
+        path = os.path.join(target_dir, 'part-0.arrow')
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table_data.schema) as writer:
+                writer.write_table(table_data)
+    return path
+
+def _unify_dictionaries(table_data):
+    """各批次独立编码的字典列合并为统一字典，便于按分区写出单一文件"""
+    return table_data.unify_dictionaries().combine_chunks()
+
+def export_table(conn, table, formats=EXPORT_FORMATS, export_dir=EXPORT_DIR):
+    batches = list(_read_batches(conn, table))
+    if not batches:
+        return 0, []
+    data = _unify_dictionaries(pa.Table.from_batches(batches))
+
+    partition = PARTITION_BY.get(table)
+    written = []
+    for fmt in formats:
+        table_dir = os.path.join(export_dir, fmt, table)
+        if os.path.exists(table_dir):
+            shutil.rmtree(table_dir)
+
+        if partition is None:
+            written.append(_write_table(data, table_dir, fmt))
+            continue
+
+        key = partition[0]
+        for value in pc.unique(data[PARTITION_FIELD]).to_pylist():
+            part = data.filter(pc.equal(data[PARTITION_FIELD], value)).drop_columns([PARTITION_FIELD])
+            written.append(_write_table(part, os.path.join(table_dir, f"{key}={value}"), fmt))
+
+    return data.num_rows, written
+
+def export_all(db_path=DB_NAME, formats=EXPORT_FORMATS, export_dir=EXPORT_DIR):
+    print_header("列式导出 (Arrow / Parquet)")
+
+    if not HAVE_PYARROW:
+        print("⚠️  未安装 pyarrow，跳过列式导出 (pip install pyarrow)")
+        return False
+
+    conn = sqlite3.connect(db_path)
+    try:
+        for table in TABLE_COLUMNS:
+            start = time.time()
+            rows, files = export_table(conn, table, formats, export_dir)
+            sizes = {}
+            for path in files:
+                fmt = os.path.relpath(path, export_dir).split(os.sep)[0]
+                sizes[fmt] = sizes.get(fmt, 0) + os.path.getsize(path)
+            size_info = ", ".join(f"{fmt} {size / 1024 / 1024:.2f} MB" for fmt, size in sizes.items())
+            n_parts = len(files) // max(len(formats), 1)
+            print(f"✅ {table:18s}: {rows:>8,} 行 → {n_parts} 个分区 ({size_info}) "
+                  f"{time.time() - start:.2f}秒")
+    finally:
+        conn.close()
+
+    print(f"📁 导出目录: {export_dir}/")
+    return True
+
+# ============================================================
+# 3. 读取
+# ============================================================
+
+def load_table(table, columns=None, partitions=None, fmt='ipc', export_dir=EXPORT_DIR):
+    """读取导出的表，只加载需要的列
+
+    Args:
+        table: 表名
+        columns: 需要的列，None 表示全部
+        partitions: 分区值列表（如 ['LEO'] / ['DEBRIS']），None 表示全部。
+                    object_type 为空的物体位于 'UNKNOWN' 分区
+        fmt: 'ipc' 使用 memory-map 零拷贝读取；'parquet' 只解压所选列
+
+    Returns:
+        pyarrow.Table，分区表额外包含分区列
+    """
+    table_dir = os.path.join(export_dir, fmt, table)
+    partition = PARTITION_BY.get(table)
+    ext = 'arrow' if fmt == 'ipc' else 'parquet'
+
+    if partition is None:
+        paths = [(None, os.path.join(table_dir, f'part-0.{ext}'))]
+    else:
+        key = partition[0]
+        paths = []
+        for path in sorted(glob.glob(os.path.join(table_dir, f'{key}=*', f'part-0.{ext}'))):
+            value = os.path.basename(os.path.dirname(path)).split('=', 1)[1]
+            if partitions is None or value in partitions:
+                paths.append((value, path))
+
+    pieces = []
+    for value, path in paths:
+        if fmt == 'ipc':
+            # memory_map + IPC 读取：列 buffer 直接指向映射的文件页
+            data = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+            if columns:
+                data = data.select(columns)
+        else:
+            data = pq.read_table(path, columns=columns)
+        # SpaceObjects 的分区列本身就是数据列；Orbits 的 regime 需从目录名补回
+        if value is not None and partition[0] not in data.column_names:
+            data = data.append_column(partition[0], pa.array([value] * data.num_rows, pa.string()))
+        pieces.append(data)
+
+    if not pieces:
+        raise FileNotFoundError(f"未找到导出文件: {table_dir}")
+    return pa.concat_tables(pieces, promote_options='permissive')
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 列式导出")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--out', default=EXPORT_DIR)
+    parser.add_argument('--format', choices=EXPORT_FORMATS, action='append',
+                        help="导出格式，可重复指定；默认 parquet + ipc")
+    args = parser.parse_args()
+
+    if not export_all(args.db, args.format or EXPORT_FORMATS, args.out):
+        return
+
+    if 'ipc' in (args.format or EXPORT_FORMATS):
+        print_header("读取对比: SELECT * vs memory-map 列读取")
+        conn = sqlite3.connect(args.db)
+        start = time.perf_counter()
+        rows = conn.execute("SELECT * FROM Orbits").fetchall()
+        sql_ms = (time.perf_counter() - start) * 1000
+        conn.close()
+
+        start = time.perf_counter()
+        data = load_table('Orbits', columns=['norad_id', 'mean_motion'], export_dir=args.out)
+        mean_motion = data['mean_motion'].to_numpy()
+        ipc_ms = (time.perf_counter() - start) * 1000
+        print(f"   SELECT * FROM Orbits:       {sql_ms:8.2f} ms ({len(rows):,} 行)")
+        print(f"   IPC 读取 2 列 (memory-map): {ipc_ms:8.2f} ms ({len(mean_motion):,} 行)")
+
+if __name__ == "__main__":
+    main()
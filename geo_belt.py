@@ -0,0 +1,442 @@
+"""
+OrbitalGuard - GEO 带经度槽位索引 (GEO Belt Longitude-Slot Index)
+=================================================================
+功能：
+1. 从 Orbits 在轨目录选出 GEO 物体：平均运动 0.9–1.1 圈/天，且偏心率 ≤ 0.1
+   或 SatelliteDetails.class_of_orbit = 'GEO'
+2. 计算每个物体在参考时刻的星下点平经度 (Ω + ω + M − GMST) 与经度漂移率
+   （平均运动 + J2 进动 − 地球自转，度/天），以及半长轴
+3. GeoSlotIndex 按经度排序保存全部物体：
+   - within(经度, 容差)：二分查找回答"经度 X ± 0.1° 内有哪些物体"，处理 0°/360° 回绕
+   - at(时刻)：按漂移率推进经度后重新排序，得到另一时刻的索引
+4. 扫描线近距检测 O(N log N + K)：
+   - 每个物体在预测窗口内扫过的经度区间 [λ, λ + λ̇·T] 两端各扩展半个阈值
+   - 先按半长轴分箱（箱宽 = 径向容差），只在相邻两箱内按区间起点排序，
+     二分查找得到区间重叠的候选对；跨 360° 的区间以平移 360° 的副本参与
+   - 候选对再按线性相对漂移解析求窗口内的最小经度差与进入阈值的时刻
+   - 现在已在阈值内为 CO-LOCATED，窗口内将进入阈值为 ENCROACHING
+5. 可写入 GeoSlots 表（经度列带索引），SQL 查询也能按经度范围取物体
+6. 基准测试：合成 GEO 带（驻留 / 共位 / 漂移物体），与全部物体两两比较的结果对照并计时
+
+与 v_orbits_classified / Query 1.3 的区别：
+- 后者把 GEO 物体全部归入 '>2000 km (GEO)' 一档，两两比较只能走二次方的自连接
+- 本模块按经度槽位组织 GEO 带，近距检测与经度查询都不需要两两比较
+
+模型限制：
+- 经度为平经度，不含倾角 / 偏心率引起的日周期摆动
+- 漂移率视为常数，不含地球非球形 (J22) 引起的经度加速度与东西位保机动
+
+用法：
+    python geo_belt.py                          # 近距 / 漂移入侵对 (阈值 0.1°, 窗口 30 天)
+    python geo_belt.py --lon 75.0 --tol 0.1      # 经度 75.0° ± 0.1° 内的物体
+    python geo_belt.py --horizon 7 --radial 50 --write
+    python geo_belt.py --bench 20000
+"""
+
+import sqlite3
+import argparse
+import time
+
+import numpy as np
+
+from create_database import DB_NAME, print_header
+from catalog import GEO_MEAN_MOTION
+import orbit_math as om
+
+# ============================================================
+# 配置
+# ============================================================
+
+GEO_MAX_ECCENTRICITY = 0.1
+# 经度近距阈值 (度)；0.1° 约对应 GEO 轨道上 74 km
+SLOT_TOLERANCE_DEG = 0.1
+# 半长轴差超过该值的两个物体不视为近距（如坟墓轨道上的物体漂移经过工作槽位）
+RADIAL_TOLERANCE_KM = 75.0
+HORIZON_DAYS = 30.0
+
+LIST_LIMIT = 20
+BENCH_OBJECTS = 20_000
+NAIVE_CHUNK = 2_000
+
+STATUS_COLOCATED = 'CO-LOCATED'
+STATUS_ENCROACHING = 'ENCROACHING'
+
+CREATE_GEO_SLOTS = """
+CREATE TABLE IF NOT EXISTS GeoSlots (
+    norad_id INTEGER PRIMARY KEY,
+    longitude_deg REAL NOT NULL,
+    drift_deg_per_day REAL NOT NULL,
+    sma_km REAL NOT NULL,
+    reference_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_geo_slots_longitude ON GeoSlots(longitude_deg);
+"""
+
+# ============================================================
+# 1. GEO 物体与经度 / 漂移率
+# ============================================================
+
+def select_geo(conn, elements):
+    """在轨根数中的 GEO 物体掩码"""
+    n = elements['mean_motion']
+    geo = (n >= GEO_MEAN_MOTION[0]) & (n <= GEO_MEAN_MOTION[1])
+    labelled = np.zeros(len(n), dtype=bool)
+    table = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'SatelliteDetails'").fetchone()
+    if table:
+        ids = np.array([r[0] for r in conn.execute(
+            "SELECT norad_id FROM SatelliteDetails WHERE class_of_orbit = 'GEO'")], dtype=np.int64)
+        labelled = np.isin(elements['norad_id'], ids)
+    return geo & ((elements['eccentricity'] <= GEO_MAX_ECCENTRICITY) | labelled)
+
+def longitude_and_drift(elements, t):
+    """时刻 t 的星下点平经度 [0, 360) 与漂移率 (度/天)，以及半长轴 (km)"""
+    a = om.mean_motion_to_sma(elements['mean_motion'])
+    inc = np.radians(elements['inclination_deg'])
+    raan_dot, argp_dot = om.j2_secular_rates(a, elements['eccentricity'], inc)
+    n = elements['mean_motion'] * om.TWO_PI / om.SECONDS_PER_DAY
+
+    dt = t - elements['epoch']
+    mean_longitude = (np.radians(elements['ra_of_asc_node'] + elements['arg_of_pericenter']
+                                 + elements['mean_anomaly'])
+                      + (raan_dot + argp_dot + n) * dt)
+    longitude = np.degrees(np.mod(mean_longitude - om.gmst(t), om.TWO_PI))
+    drift = np.degrees((n + raan_dot + argp_dot - om.OMEGA_EARTH) * om.SECONDS_PER_DAY)
+    return longitude, drift, a
+
+def wrap_degrees(delta):
+    """经度差 → (-180, 180]"""
+    return 180.0 - np.mod(180.0 - delta, 360.0)
+
+# ============================================================
+# 2. 经度槽位索引
+# ============================================================
+
+class GeoSlotIndex:
+    """按经度排序的 GEO 物体索引（参考时刻 t 的快照）"""
+
+    def __init__(self, norad_id, longitude, drift, sma, t):
+        order = np.argsort(longitude, kind='stable')
+        self.norad_id = np.asarray(norad_id)[order]
+        self.longitude = np.asarray(longitude, dtype=np.float64)[order]
+        self.drift = np.asarray(drift, dtype=np.float64)[order]
+        self.sma = np.asarray(sma, dtype=np.float64)[order]
+        self.t = float(t)
+
+    @classmethod
+    def from_elements(cls, elements, t):
+        longitude, drift, sma = longitude_and_drift(elements, t)
+        return cls(elements['norad_id'], longitude, drift, sma, t)
+
+    def __len__(self):
+        return len(self.norad_id)
+
+    def at(self, t):
+        """按漂移率推进到时刻 t 并重新排序"""
+        days = (t - self.t) / om.SECONDS_PER_DAY
+        longitude = np.mod(self.longitude + self.drift * days, 360.0)
+        return GeoSlotIndex(self.norad_id, longitude, self.drift, self.sma, t)
+
+    def range_rows(self, longitude, tolerance=SLOT_TOLERANCE_DEG):
+        """经度 ± tolerance 内的行号（按经度升序，跨 0° 时先西后东）"""
+        if tolerance >= 180.0:
+            return np.arange(len(self))
+        lo = (longitude - tolerance) % 360.0
+        hi = (longitude + tolerance) % 360.0
+        i = np.searchsorted(self.longitude, lo, side='left')
+        j = np.searchsorted(self.longitude, hi, side='right')
+        if lo <= hi:
+            return np.arange(i, j)
+        return np.concatenate([np.arange(i, len(self)), np.arange(0, j)])
+
+    def within(self, longitude, tolerance=SLOT_TOLERANCE_DEG):
+        """经度 ± tolerance 内的 NORAD 编号"""
+        return self.norad_id[self.range_rows(longitude, tolerance)]
+
+    def close_pairs(self, threshold=SLOT_TOLERANCE_DEG, horizon_days=HORIZON_DAYS,
+                    radial_km=RADIAL_TOLERANCE_KM):
+        """扫描线近距检测，返回 evaluate_pairs() 格式的结果（只含窗口内进入阈值的对）"""
+        i, j = sweep_candidates(self.longitude, self.drift, self.sma,
+                                threshold, horizon_days, radial_km)
+        return evaluate_pairs(self, i, j, threshold, horizon_days, radial_km)
+
+# ============================================================
+# 3. 扫描线候选与解析判定
+# ============================================================
+
+def _sweep_intervals(lo, hi):
+    """区间按起点排序后二分查找重叠对：start_j ≤ end_i (i 在 j 之前)
+
+    Returns:
+        (i, j) 输入区间下标；同一对可能出现两次（由调用方去重）
+    """
+    order = np.argsort(lo, kind='stable')
+    start, end = lo[order], hi[order]
+    stop = np.searchsorted(start, end, side='right')
+    counts = np.maximum(stop - np.arange(len(start)) - 1, 0)
+    first = np.repeat(np.arange(len(start)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return order[first], order[first + 1 + offset]
+
+def sweep_candidates(longitude, drift, sma, threshold, horizon_days, radial_km):
+    """窗口内经度区间重叠、半长轴相近的候选对 (i < j)"""
+    n = len(longitude)
+    if n < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    swept = drift * horizon_days
+    lo = np.mod(longitude + np.minimum(swept, 0.0) - threshold / 2, 360.0)
+    length = np.abs(swept) + threshold
+    hi = lo + length
+
+    # 半长轴分箱：箱宽不小于径向容差，径向相近的对只会落在同箱或相邻箱
+    width = max(radial_km, 1e-6)
+    bins = np.floor((sma - sma.min()) / width).astype(np.int64)
+    bin_order = np.argsort(bins, kind='stable')
+    bin_values, bin_start = np.unique(bins[bin_order], return_index=True)
+    bin_stop = np.append(bin_start[1:], n)
+
+    pieces_i, pieces_j = [], []
+    for k, b in enumerate(bin_values):
+        members = bin_order[bin_start[k]:bin_stop[k]]
+        # 与下一箱（若相邻）合并扫描；两者都在下一箱的对留给下一轮
+        if k + 1 < len(bin_values) and bin_values[k + 1] == b + 1:
+            members = np.concatenate([members, bin_order[bin_start[k + 1]:bin_stop[k + 1]]])
+        if len(members) < 2:
+            continue
+        m_lo, m_hi = lo[members], hi[members]
+        # 跨 360° 的回绕：起点平移 360° 的副本只可能与末端超过 360° 的区间重叠
+        wrap = np.flatnonzero(m_lo + 360.0 <= m_hi.max())
+        idx = np.concatenate([np.arange(len(members)), wrap])
+        a, c = _sweep_intervals(np.concatenate([m_lo, m_lo[wrap] + 360.0]),
+                                np.concatenate([m_hi, m_hi[wrap] + 360.0]))
+        a, c = members[idx[a]], members[idx[c]]
+        keep = (a != c) & ((bins[a] == b) | (bins[c] == b))
+        pieces_i.append(np.minimum(a, c)[keep])
+        pieces_j.append(np.maximum(a, c)[keep])
+
+    if not pieces_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # 分箱扫描不会重复产生同一对，只有回绕副本两端都重叠时才会，排序后去重
+    keys = np.sort(np.concatenate(pieces_i).astype(np.int64) * n + np.concatenate(pieces_j))
+    keys = keys[np.append(True, keys[1:] != keys[:-1])]
+    return keys // n, keys % n
+
+def evaluate_pairs(index, i, j, threshold=SLOT_TOLERANCE_DEG, horizon_days=HORIZON_DAYS,
+                   radial_km=RADIAL_TOLERANCE_KM):
+    """候选对的解析判定：线性相对漂移下窗口内的最小经度差与进入阈值的时刻
+
+    Returns:
+        列数组字典：i, j（索引行号）、separation_deg（当前）、min_separation_deg、
+        closest_days、enter_days、radial_km、status；按 enter_days、min_separation_deg 排序
+    """
+    delta0 = wrap_degrees(index.longitude[j] - index.longitude[i])
+    rate = index.drift[j] - index.drift[i]
+    radial = np.abs(index.sma[j] - index.sma[i])
+
+    # 相对经度 Δ(t) = Δ0 + r·t 第一次穿过 0 (mod 360) 的时刻
+    moving = rate != 0
+    safe_rate = np.where(moving, rate, 1.0)
+    target = np.where(rate > 0, np.where(delta0 <= 0, 0.0, 360.0), np.where(delta0 >= 0, 0.0, -360.0))
+    cross = np.where(moving, (target - delta0) / safe_rate, np.inf)
+    crosses = cross <= horizon_days
+
+    end_separation = np.abs(wrap_degrees(delta0 + rate * horizon_days))
+    now = np.abs(delta0)
+    min_separation = np.where(crosses, 0.0, np.minimum(now, end_separation))
+    closest = np.where(crosses, cross, np.where(end_separation < now, horizon_days, 0.0))
+    enter = np.where(now <= threshold, 0.0,
+                     np.maximum(cross - threshold / np.abs(safe_rate), 0.0))
+
+    hit = (min_separation <= threshold) & (radial <= radial_km)
+    order = np.lexsort((min_separation[hit], enter[hit]))
+    i, j = np.asarray(i)[hit][order], np.asarray(j)[hit][order]
+    enter = enter[hit][order]
+    return {
+        'i': i, 'j': j,
+        'separation_deg': now[hit][order],
+        'min_separation_deg': min_separation[hit][order],
+        'closest_days': closest[hit][order],
+        'enter_days': enter,
+        'radial_km': radial[hit][order],
+        'status': np.where(enter == 0.0, STATUS_COLOCATED, STATUS_ENCROACHING),
+    }
+
+def naive_pairs(index, threshold=SLOT_TOLERANCE_DEG, horizon_days=HORIZON_DAYS,
+                radial_km=RADIAL_TOLERANCE_KM, chunk=NAIVE_CHUNK):
+    """全部物体两两比较（分块向量化），作为扫描线结果的对照"""
+    n = len(index)
+    results = []
+    for start in range(0, n, chunk):
+        rows = np.arange(start, min(start + chunk, n))
+        i = np.repeat(rows, n)
+        j = np.tile(np.arange(n), len(rows))
+        keep = i < j
+        results.append(evaluate_pairs(index, i[keep], j[keep], threshold, horizon_days, radial_km))
+    pairs = {k: np.concatenate([r[k] for r in results]) for k in results[0]}
+    order = np.lexsort((pairs['min_separation_deg'], pairs['enter_days']))
+    return {k: v[order] for k, v in pairs.items()}
+
+# ============================================================
+# 4. 输出与写库
+# ============================================================
+
+def print_pairs(index, pairs, limit=LIST_LIMIT):
+    counts = {s: int((pairs['status'] == s).sum()) for s in (STATUS_COLOCATED, STATUS_ENCROACHING)}
+    print(f"   共位 {counts[STATUS_COLOCATED]:,} 对, 漂移入侵 {counts[STATUS_ENCROACHING]:,} 对")
+    if not len(pairs['i']) or limit <= 0:
+        return
+    print(f"\n   {'NORAD A':>8s} {'NORAD B':>8s} {'经度 A':>8s} {'当前间隔':>8s} "
+          f"{'最小间隔':>8s} {'进入(天)':>8s} {'径向(km)':>8s}  状态")
+    for k in range(min(limit, len(pairs['i']))):
+        a, b = pairs['i'][k], pairs['j'][k]
+        print(f"   {index.norad_id[a]:>8d} {index.norad_id[b]:>8d} {index.longitude[a]:8.3f} "
+              f"{pairs['separation_deg'][k]:8.3f} {pairs['min_separation_deg'][k]:8.3f} "
+              f"{pairs['enter_days'][k]:8.1f} {pairs['radial_km'][k]:8.1f}  {pairs['status'][k]}")
+    if len(pairs['i']) > limit:
+        print(f"   ... 其余 {len(pairs['i']) - limit:,} 对省略")
+
+def print_query(index, longitude, tolerance):
+    rows = index.range_rows(longitude, tolerance)
+    print(f"   经度 {longitude:.3f}° ± {tolerance:g}° 内: {len(rows):,} 个物体")
+    for r in rows[:LIST_LIMIT]:
+        print(f"   {index.norad_id[r]:>8d}  经度 {index.longitude[r]:8.3f}°  "
+              f"漂移 {index.drift[r]:+8.4f}°/天  半长轴 {index.sma[r]:10.1f} km")
+
+def write_geo_slots(conn, index):
+    """以当前索引整体替换 GeoSlots 表"""
+    conn.executescript(CREATE_GEO_SLOTS)
+    reference = om.unix_to_iso(index.t)
+    with conn:
+        conn.execute("DELETE FROM GeoSlots")
+        conn.executemany(
+            "INSERT INTO GeoSlots (norad_id, longitude_deg, drift_deg_per_day, sma_km, reference_time) "
+            "VALUES (?, ?, ?, ?, ?)",
+            zip(index.norad_id.tolist(), index.longitude.tolist(), index.drift.tolist(),
+                index.sma.tolist(), [reference] * len(index)))
+
+# ============================================================
+# 5. 基准测试
+# ============================================================
+
+def synthetic_belt(n_objects, t, seed=7):
+    """合成 GEO 带根数：约 50% 位保卫星（其中部分多星共位）、30% 在工作轨道附近
+    缓慢漂移的失效物体、20% 坟墓轨道物体（高于 GEO 250–400 km，每天向西漂移数度）"""
+    rng = np.random.default_rng(seed)
+    kind = rng.choice(3, n_objects, p=[0.5, 0.3, 0.2])
+    kept = kind == 0
+    slots = rng.uniform(0, 360, max(n_objects // 3, 1))
+    longitude = np.where(kept, slots[rng.integers(0, len(slots), n_objects)]
+                         + rng.normal(0, 0.02, n_objects), rng.uniform(0, 360, n_objects))
+    # 漂移率由半长轴偏离 GEO 的量经平均运动体现
+    offset = np.select([kept, kind == 1],
+                       [rng.normal(0, 2, n_objects), rng.normal(0, 8, n_objects)],
+                       rng.uniform(250, 400, n_objects))
+    a = om.mean_motion_to_sma(np.array([1.0027379])) + offset
+    mean_motion = np.sqrt(om.MU_EARTH / a**3) * om.SECONDS_PER_DAY / om.TWO_PI
+    inclination = np.where(kept, rng.uniform(0, 0.1, n_objects), rng.uniform(0, 15, n_objects))
+    raan = rng.uniform(0, 360, n_objects)
+    argp = rng.uniform(0, 360, n_objects)
+    mean_anomaly = np.mod(longitude + np.degrees(om.gmst(t)) - raan - argp, 360.0)
+    return {
+        'norad_id': np.arange(90_000, 90_000 + n_objects, dtype=np.int64),
+        'epoch': np.full(n_objects, float(t)),
+        'inclination_deg': inclination,
+        'eccentricity': rng.uniform(0, 0.001, n_objects),
+        'mean_motion': mean_motion,
+        'ra_of_asc_node': raan,
+        'arg_of_pericenter': argp,
+        'mean_anomaly': mean_anomaly,
+        'bstar': np.zeros(n_objects),
+    }
+
+def _pair_keys(index, pairs):
+    a, b = index.norad_id[pairs['i']], index.norad_id[pairs['j']]
+    return set(zip(np.minimum(a, b).tolist(), np.maximum(a, b).tolist()))
+
+def run_benchmark(n_objects, t, threshold, horizon_days, radial_km, naive_limit=BENCH_OBJECTS):
+    print_header(f"基准测试: 合成 GEO 带 {n_objects:,} 个物体 (阈值 {threshold:g}°, 窗口 {horizon_days:g} 天)")
+    elements = synthetic_belt(n_objects, t)
+
+    start = time.perf_counter()
+    index = GeoSlotIndex.from_elements(elements, t)
+    t_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairs = index.close_pairs(threshold, horizon_days, radial_km)
+    t_sweep = time.perf_counter() - start
+    print(f"   建索引 {t_build * 1000:8.1f} ms, 扫描线 {t_sweep * 1000:8.1f} ms")
+    print_pairs(index, pairs, limit=0)
+
+    queries = np.random.default_rng(1).uniform(0, 360, 100_000)
+    start = time.perf_counter()
+    found = sum(len(index.range_rows(q, SLOT_TOLERANCE_DEG)) for q in queries)
+    t_query = time.perf_counter() - start
+    print(f"   经度查询 {len(queries):,} 次 (± {SLOT_TOLERANCE_DEG:g}°): {t_query * 1000:.1f} ms, "
+          f"{t_query / len(queries) * 1e6:.1f} µs/次, 平均命中 {found / len(queries):.1f} 个")
+
+    if n_objects > naive_limit:
+        print(f"   两两比较对照: 物体数超过 {naive_limit:,}，跳过")
+        return
+    start = time.perf_counter()
+    naive = naive_pairs(index, threshold, horizon_days, radial_km)
+    t_naive = time.perf_counter() - start
+    same = _pair_keys(index, pairs) == _pair_keys(index, naive)
+    print(f"   两两比较 {n_objects * (n_objects - 1) // 2:,} 对: {t_naive * 1000:8.1f} ms "
+          f"(扫描线快 {t_naive / t_sweep:.1f}×), 结果{'一致' if same else '不一致'}")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard GEO 带经度槽位索引")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--at', help="参考时刻 (ISO 8601)，默认目录最新历元")
+    parser.add_argument('--lon', type=float, help="查询经度 (度，东经为正)")
+    parser.add_argument('--tol', type=float, default=SLOT_TOLERANCE_DEG, help="查询经度容差 (度)")
+    parser.add_argument('--threshold', type=float, default=SLOT_TOLERANCE_DEG, help="近距经度阈值 (度)")
+    parser.add_argument('--horizon', type=float, default=HORIZON_DAYS, help="漂移预测窗口 (天)")
+    parser.add_argument('--radial', type=float, default=RADIAL_TOLERANCE_KM, help="半长轴差上限 (km)")
+    parser.add_argument('--limit', type=int, default=LIST_LIMIT, help="列出的物体对数")
+    parser.add_argument('--write', action='store_true', help="写入 GeoSlots 表")
+    parser.add_argument('--bench', type=int, metavar='OBJECTS', help="合成 GEO 带并与两两比较对照")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - GEO 带经度槽位索引")
+    print("="*70)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        elements = om.load_elements(conn)
+        t = float(om.epoch_to_unix([args.at])[0]) if args.at else float(elements['epoch'].max())
+        if args.bench:
+            run_benchmark(args.bench, t, args.threshold, args.horizon, args.radial)
+            return
+
+        geo = om.subset(elements, np.flatnonzero(select_geo(conn, elements)))
+        print(f"📊 在轨物体 {len(elements['norad_id']):,} 个, 其中 GEO {len(geo['norad_id']):,} 个, "
+              f"参考时刻 {om.unix_to_iso(t)}")
+        if not len(geo['norad_id']):
+            print("⚠️  目录中没有 GEO 物体")
+            return
+
+        index = GeoSlotIndex.from_elements(geo, t)
+        if args.lon is not None:
+            print_header(f"经度查询 {args.lon:g}° ± {args.tol:g}°")
+            print_query(index, args.lon % 360.0, args.tol)
+
+        print_header(f"近距检测 (阈值 {args.threshold:g}°, 窗口 {args.horizon:g} 天, 径向 ≤ {args.radial:g} km)")
+        start = time.perf_counter()
+        pairs = index.close_pairs(args.threshold, args.horizon, args.radial)
+        print(f"✅ 完成 ({time.perf_counter() - start:.3f}秒)")
+        print_pairs(index, pairs, args.limit)
+
+        if args.write:
+            write_geo_slots(conn, index)
+            print(f"\n💾 GeoSlots 表已更新: {len(index):,} 个物体")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""
+OrbitalGuard - 太阳位置与光照 / 地影计算 (Batched Solar Position & Eclipse)
+==========================================================================
+功能：
+1. 太阳位置：天文年历低精度公式（约 0.01°），对整个时间网格向量化计算惯性系方向与距离
+2. 地影判定，两种模型：
+   - cylindrical：地球阴影为半径 R_E 的圆柱
+   - conical：本影 / 半影圆锥（考虑太阳视半径），区分 SUNLIT / PENUMBRA / UMBRA
+   连续的"阴影函数"（正值为受照）：网格上按符号找出入影的相邻网格点，
+   只对这些点迭代求零点（Illinois 试位法），120 秒网格 + 5 次迭代边界误差约毫秒级
+3. build：对全部在轨物体按 UTC 日逐日计算受照区间（不在本影内即视为受照），
+   物体分块处理控制内存，写入 SunlitIntervals 表（按日替换）
+4. observe：给定观测者经纬度，求当晚观测者处于黑暗（太阳高度 < −6°）的时段，
+   与缓存的受照区间连接（按物体编号 + 时刻二分查找，无需重新计算地影），
+   统计每颗卫星"受照 + 观测者黑暗 + 仰角 ≥ 10°"的可观测时长
+5. bench：全目录（可复制扩充）物体·步吞吐量，并与 1 秒网格的参考解比较出入影时刻误差与漏检
+
+与 v_visibility_london / Query 4.1–4.3 的区别：
+- 旧查询只用"倾角 ≥ 纬度"判断能否过顶，不考虑卫星是否受照、观测者是否处于黑暗
+- 光学可见需要两者同时满足；受照区间缓存后，过境预测与覆盖统计可直接连接：
+
+    SELECT v.norad_id, v.object_name, v.visibility_status, ROUND(si.sunlit_seconds / 60.0, 1) AS sunlit_minutes
+    FROM v_visibility_london v
+    JOIN (SELECT norad_id, SUM(end_unix - start_unix) AS sunlit_seconds
+          FROM SunlitIntervals WHERE day = '2025-11-27' GROUP BY norad_id) si ON si.norad_id = v.norad_id
+    ORDER BY sunlit_minutes DESC;
+
+模型限制：
+- 球形地球、不含大气折射与地球扁率对阴影的影响
+- 半影按受照处理；卫星亮度（相位角、尺寸）不在本模块范围内
+
+用法：
+    python illumination.py build --days 1                        # 最新历元所在 UTC 日起 1 天
+    python illumination.py build --days 3 --model cylindrical --step 60
+    python illumination.py observe --lat 51.5 --lon -0.13        # 伦敦当晚可观测卫星
+    python illumination.py bench --objects 30000
+"""
+
+import sqlite3
+import argparse
+import time
+
+import numpy as np
+
+from create_database import DB_NAME, print_header
+import orbit_math as om
+
+# ============================================================
+# 配置
+# ============================================================
+
+AU_KM = 149597870.7
+R_SUN = 696000.0  # km
+
+MODELS = ('conical', 'cylindrical')
+DEFAULT_MODEL = 'conical'
+STATUS_SUNLIT, STATUS_PENUMBRA, STATUS_UMBRA = 0, 1, 2
+
+STEP_SECONDS = 120
+# 出入影时刻的迭代次数（每次只传播跨越边界的物体）
+REFINE_ITERATIONS = 5
+DAYS = 1
+# 每块物体数：一天 120 秒步长时约 720 × 2000 个样本
+OBJECT_CHUNK = 2000
+
+# 观测者处于黑暗：太阳高度低于民用晨昏蒙影
+DARK_SUN_ELEVATION_DEG = -6.0
+MIN_ELEVATION_DEG = 10.0
+LIST_LIMIT = 20
+
+BENCH_REFERENCE_STEP = 1.0
+BENCH_REFERENCE_OBJECTS = 200
+
+CREATE_SUNLIT_INTERVALS = """
+CREATE TABLE IF NOT EXISTS SunlitIntervals (
+    norad_id INTEGER NOT NULL,
+    day TEXT NOT NULL,               -- UTC 日期 YYYY-MM-DD
+    start_time TEXT NOT NULL,        -- ISO 8601，区间被截断在当日 00:00–24:00 内
+    end_time TEXT NOT NULL,
+    start_unix REAL NOT NULL,
+    end_unix REAL NOT NULL,
+    shadow_model TEXT NOT NULL,
+    PRIMARY KEY (norad_id, day, start_unix)
+);
+CREATE INDEX IF NOT EXISTS idx_sunlit_intervals_day ON SunlitIntervals(day, norad_id);
+"""
+
+# ============================================================
+# 1. 太阳位置与阴影函数
+# ============================================================
+
+def sun_position(t):
+    """UNIX 秒 → 太阳惯性系位置 (km)，形状 t.shape + (3,)
+
+    天文年历低精度公式：平黄经 L、平近点角 g、黄经 λ、黄赤交角 ε、日地距离 R (AU)
+    """
+    n = np.asarray(t, dtype=np.float64) / om.SECONDS_PER_DAY + 2440587.5 - 2451545.0
+    L = np.radians(280.460 + 0.9856474 * n)
+    g = np.radians(357.528 + 0.9856003 * n)
+    lam = L + np.radians(1.915) * np.sin(g) + np.radians(0.020) * np.sin(2 * g)
+    eps = np.radians(23.439 - 4e-7 * n)
+    R = (1.00014 - 0.01671 * np.cos(g) - 0.00014 * np.cos(2 * g)) * AU_KM
+    return np.stack([R * np.cos(lam), R * np.cos(eps) * np.sin(lam), R * np.sin(eps) * np.sin(lam)], axis=-1)
+
+def shadow_functions(r, sun, model=DEFAULT_MODEL):
+    """阴影函数 (本影, 半影)，单位 km；≤ 0 表示处于对应阴影内
+
+    g = max(r·ŝ, ρ − 阴影半径)：卫星在地球向阳一侧 (r·ŝ > 0) 或离阴影轴的距离 ρ
+    大于该处阴影半径时为正。两者在入影前后连续变化，可线性插值求边界。
+
+    Args:
+        r: (..., 3) 卫星位置；sun: 可与 r 广播的太阳位置
+    """
+    distance = np.linalg.norm(sun, axis=-1)
+    s_hat = sun / distance[..., None]
+    along = np.einsum('...k,...k->...', r, s_hat)
+    rho = np.linalg.norm(r - along[..., None] * s_hat, axis=-1)
+    if model == 'cylindrical':
+        umbra = np.maximum(along, rho - om.R_EARTH)
+        return umbra, umbra
+    # 本影锥收敛、半影锥发散，半张角由太阳与地球半径之差 / 和决定
+    depth = np.maximum(-along, 0.0)
+    tan_umbra = np.tan(np.arcsin((R_SUN - om.R_EARTH) / distance))
+    tan_penumbra = np.tan(np.arcsin((R_SUN + om.R_EARTH) / distance))
+    umbra = np.maximum(along, rho - (om.R_EARTH - depth * tan_umbra))
+    penumbra = np.maximum(along, rho - (om.R_EARTH + depth * tan_penumbra))
+    return umbra, penumbra
+
+def shadow_status(r, sun, model=DEFAULT_MODEL):
+    """STATUS_SUNLIT / STATUS_PENUMBRA / STATUS_UMBRA 数组"""
+    umbra, penumbra = shadow_functions(r, sun, model)
+    return np.where(umbra <= 0, STATUS_UMBRA,
+                    np.where(penumbra <= 0, STATUS_PENUMBRA, STATUS_SUNLIT)).astype(np.int8)
+
+def observer_vectors(lat_deg, lon_deg, t):
+    """观测者惯性系位置 (球形地球) 与天顶单位向量，形状 t.shape + (3,)"""
+    lat = np.radians(lat_deg)
+    theta = np.radians(lon_deg) + om.gmst(t)
+    up = np.stack([np.cos(lat) * np.cos(theta), np.cos(lat) * np.sin(theta),
+                   np.broadcast_to(np.sin(lat), np.shape(theta))], axis=-1)
+    return om.R_EARTH * up, up
+
+def sun_elevation(lat_deg, lon_deg, t):
+    """观测者处的太阳高度角 (度)"""
+    _, up = observer_vectors(lat_deg, lon_deg, t)
+    sun = sun_position(t)
+    s_hat = sun / np.linalg.norm(sun, axis=-1, keepdims=True)
+    return np.degrees(np.arcsin(np.clip(np.einsum('...k,...k->...', up, s_hat), -1.0, 1.0)))
+
+# ============================================================
+# 2. 受照区间
+# ============================================================
+
+def time_grid(start, end, step=STEP_SECONDS):
+    """[start, end] 的时间网格，末点恰为 end"""
+    n = int(np.ceil((end - start) / step))
+    return np.append(start + np.arange(n) * step, end)
+
+def _umbra_function(elements, rows, t, model):
+    """物体 rows[i] 在时刻 t[i] 的本影函数值"""
+    r, _ = om.propagate(om.subset(elements, rows), t)
+    return shadow_functions(r, sun_position(t), model)[0]
+
+def refine_crossings(elements, rows, ta, tb, ga, gb, model=DEFAULT_MODEL, iterations=REFINE_ITERATIONS):
+    """在 [ta, tb] 内求本影函数零点（Illinois 修正的试位法），ga、gb 异号"""
+    ta, tb, ga, gb = (np.array(x, dtype=np.float64) for x in (ta, tb, ga, gb))
+    tc = ta + (tb - ta) * ga / (ga - gb)
+    previous = np.zeros(len(tc), dtype=bool)
+    for k in range(iterations):
+        if not len(rows):
+            break
+        gc = _umbra_function(elements, rows, tc, model)
+        same = np.sign(gc) == np.sign(ga)
+        # 与 a 端同号则替换 a 端，否则替换 b 端；同一端连续两次被替换时，
+        # 保留端的函数值减半，避免试位法一端长期不动
+        repeat = (same == previous) & (k > 0)
+        ga = np.where(same, gc, np.where(repeat, ga * 0.5, ga))
+        gb = np.where(same, np.where(repeat, gb * 0.5, gb), gc)
+        ta, tb = np.where(same, tc, ta), np.where(same, tb, tc)
+        previous = same
+        tc = ta + (tb - ta) * ga / (ga - gb)
+    return tc
+
+def sunlit_intervals(elements, t, model=DEFAULT_MODEL, chunk=OBJECT_CHUNK, iterations=REFINE_ITERATIONS):
+    """时间网格 t 上每个物体的受照区间（不在本影内）
+
+    网格上按本影函数符号找出入影的相邻网格点，再在其间迭代求零点；
+    区间截断在 [t[0], t[-1]] 内。短于网格步长的掠影可能漏检。
+
+    Returns:
+        (obj, start, end)：物体下标（对应 elements 行）与区间端点 (UNIX 秒)，
+        按物体、起点排序
+    """
+    sun = sun_position(t)[:, None, :]
+    objs, starts, ends = [], [], []
+    n = len(elements['norad_id'])
+    for first in range(0, n, chunk):
+        rows = np.arange(first, min(first + chunk, n))
+        r, _ = om.propagate(om.subset(elements, rows), t[:, None])
+        g = shadow_functions(r, sun, model)[0].T          # (物体, 时间)
+        lit = g > 0
+        edge = np.diff(lit.astype(np.int8), axis=1)
+        c_obj, c_k = np.nonzero(edge)                      # c_k 与 c_k + 1 之间出入影
+        entering = edge[c_obj, c_k] == 1
+        crossing = refine_crossings(elements, rows[c_obj], t[c_k], t[c_k + 1],
+                                    g[c_obj, c_k], g[c_obj, c_k + 1], model, iterations)
+
+        begin_obj = np.flatnonzero(lit[:, 0])
+        end_obj = np.flatnonzero(lit[:, -1])
+        start_obj = np.concatenate([begin_obj, c_obj[entering]])
+        start_t = np.concatenate([np.full(len(begin_obj), t[0]), crossing[entering]])
+        stop_obj = np.concatenate([c_obj[~entering], end_obj])
+        stop_t = np.concatenate([crossing[~entering], np.full(len(end_obj), t[-1])])
+        # 同一物体内起点 / 终点交替出现，分别排序后一一对应
+        s_order = np.lexsort((start_t, start_obj))
+        e_order = np.lexsort((stop_t, stop_obj))
+        objs.append(rows[start_obj[s_order]])
+        starts.append(start_t[s_order])
+        ends.append(stop_t[e_order])
+    if not objs:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    return np.concatenate(objs), np.concatenate(starts), np.concatenate(ends)
+
+def interval_lookup(obj, start, end, query_obj, query_t, span):
+    """(物体, 时刻) 是否落在某个受照区间内：物体编号 × span + 时刻 合成单调键后二分查找
+
+    Args:
+        obj, start, end: 按物体、起点排序的区间
+        span: 大于时间范围的偏移量，保证不同物体的键不重叠
+        query_t: 相对同一基准的时刻
+    """
+    base = obj.astype(np.float64) * span
+    key = query_obj.astype(np.float64) * span + query_t
+    k = np.searchsorted(base + start, key, side='right') - 1
+    valid = k >= 0
+    k = np.maximum(k, 0)
+    return valid & (obj[k] == query_obj) & (key <= base[k] + end[k])
+
+def day_start(t):
+    return float(np.floor(t / om.SECONDS_PER_DAY) * om.SECONDS_PER_DAY)
+
+# ============================================================
+# 3. 写入缓存 / 读取
+# ============================================================
+
+def build_intervals(conn, elements, first_day, days=DAYS, step=STEP_SECONDS, model=DEFAULT_MODEL):
+    """逐日计算受照区间并写入 SunlitIntervals（当日已有行整体替换）"""
+    conn.executescript(CREATE_SUNLIT_INTERVALS)
+    n = len(elements['norad_id'])
+    for d in range(days):
+        t0 = first_day + d * om.SECONDS_PER_DAY
+        day = om.unix_to_iso(t0)[:10]
+        start_time = time.time()
+        obj, start, end = sunlit_intervals(elements, time_grid(t0, t0 + om.SECONDS_PER_DAY, step), model)
+        elapsed = time.time() - start_time
+
+        norad = elements['norad_id'][obj]
+        with conn:
+            conn.execute("DELETE FROM SunlitIntervals WHERE day = ?", (day,))
+            conn.executemany(
+                "INSERT INTO SunlitIntervals (norad_id, day, start_time, end_time, start_unix, end_unix, shadow_model) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((int(o), day, om.unix_to_iso(s)[:19], om.unix_to_iso(e)[:19], float(s), float(e), model)
+                 for o, s, e in zip(norad, start, end)))
+
+        lit = np.bincount(obj, weights=end - start, minlength=n) / om.SECONDS_PER_DAY
+        counts = np.bincount(obj, minlength=n)
+        never = int((lit >= 1.0 - 1e-9).sum())
+        samples = n * (len(time_grid(t0, t0 + om.SECONDS_PER_DAY, step)))
+        print(f"   {day}: {len(obj):,} 个区间, 平均受照 {lit.mean() * 100:.1f}%, "
+              f"全天受照 {never:,} 个, 单物体最多 {counts.max() if n else 0} 段  "
+              f"({elapsed:.2f}秒, {samples / elapsed / 1e6:.1f} M 物体·步/秒)")
+
+def load_intervals(conn, day, norad_ids):
+    """读取某日缓存的受照区间 → (obj, start, end)，obj 为 norad_ids 中的下标；未缓存返回 None"""
+    table = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'SunlitIntervals'").fetchone()
+    if not table:
+        return None
+    rows = conn.execute("""
+        SELECT norad_id, start_unix, end_unix FROM SunlitIntervals
+        WHERE day = ? ORDER BY norad_id, start_unix
+    """, (day,)).fetchall()
+    if not rows:
+        return None
+    norad, start, end = (np.array(c) for c in zip(*rows))
+    idx = np.clip(np.searchsorted(norad_ids, norad), 0, len(norad_ids) - 1)
+    known = norad_ids[idx] == norad
+    return idx[known], start[known].astype(np.float64), end[known].astype(np.float64)
+
+# ============================================================
+# 4. 观测者可见性
+# ============================================================
+
+def dark_windows(lat_deg, lon_deg, t):
+    """网格上观测者处于黑暗的掩码"""
+    return sun_elevation(lat_deg, lon_deg, t) < DARK_SUN_ELEVATION_DEG
+
+def observable_minutes(elements, intervals, lat_deg, lon_deg, t, min_elevation=MIN_ELEVATION_DEG,
+                       chunk=OBJECT_CHUNK):
+    """每个物体在网格 t 上"受照 + 观测者黑暗 + 仰角 ≥ min_elevation"的时长 (分钟)
+
+    受照判定取自缓存区间（interval_lookup），只对观测者黑暗的时间步传播轨道
+    """
+    n = len(elements['norad_id'])
+    minutes = np.zeros(n)
+    dark = np.flatnonzero(dark_windows(lat_deg, lon_deg, t))
+    if not len(dark) or not n:
+        return minutes
+    step = np.diff(t, append=t[-1])[dark] / 60.0
+    td = t[dark]
+    observer, up = observer_vectors(lat_deg, lon_deg, td)
+    obj, start, end = intervals
+    origin = t[0]
+    span = 2 * (t[-1] - t[0]) + om.SECONDS_PER_DAY
+    for first in range(0, n, chunk):
+        rows = np.arange(first, min(first + chunk, n))
+        r, _ = om.propagate(om.subset(elements, rows), td[:, None])
+        rel = r - observer[:, None, :]
+        sin_el = np.einsum('tnk,tk->tn', rel, up) / np.linalg.norm(rel, axis=-1)
+        above = sin_el >= np.sin(np.radians(min_elevation))
+        q_obj = np.broadcast_to(rows, above.shape)
+        q_t = np.broadcast_to((td - origin)[:, None], above.shape)
+        lit = interval_lookup(obj, start - origin, end - origin, q_obj.ravel(), q_t.ravel(), span)
+        visible = above & lit.reshape(above.shape)
+        minutes[rows] = (visible * step[:, None]).sum(axis=0)
+    return minutes
+
+def _windows(mask, t):
+    """布尔掩码 → 连续为真的 [起, 止] 网格时刻列表"""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    first, last = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+    return [(t[a], t[b]) for a, b in zip(first, last)]
+
+# ============================================================
+# 5. 基准测试
+# ============================================================
+
+def run_benchmark(elements, t0, n_objects=None, step=STEP_SECONDS, model=DEFAULT_MODEL, seed=1):
+    """全目录（或复制扩充到 n_objects）一天的受照区间吞吐量，以及与 1 秒步长参考解的边界误差"""
+    if n_objects:
+        rng = np.random.default_rng(seed)
+        rows = rng.integers(0, len(elements['norad_id']), n_objects)
+        elements = om.subset(elements, rows)
+        elements['norad_id'] = np.arange(len(rows), dtype=np.int64)
+        elements['ra_of_asc_node'] = rng.uniform(0, 360, len(rows))
+        elements['mean_anomaly'] = rng.uniform(0, 360, len(rows))
+    n = len(elements['norad_id'])
+    t = time_grid(t0, t0 + om.SECONDS_PER_DAY, step)
+    print_header(f"基准测试: {n:,} 个物体 × {len(t):,} 步 ({step:g} 秒, {model})")
+
+    sun_start = time.perf_counter()
+    sun_position(t)
+    t_sun = time.perf_counter() - sun_start
+    start_time = time.perf_counter()
+    obj, start, end = sunlit_intervals(elements, t, model)
+    elapsed = time.perf_counter() - start_time
+    print(f"   太阳位置 {len(t):,} 个时刻: {t_sun * 1000:.2f} ms")
+    print(f"   受照区间: {elapsed:.2f} 秒, {n * len(t) / elapsed / 1e6:.1f} M 物体·步/秒, "
+          f"{len(obj):,} 个区间")
+
+    # 参考解：均匀抽取部分物体，在 1 秒网格上求区间，按 (物体, 时刻) 就近匹配边界
+    subset = np.linspace(0, n - 1, min(BENCH_REFERENCE_OBJECTS, n)).astype(np.int64)
+    ref_elements = om.subset(elements, subset)
+    ref = sunlit_intervals(ref_elements, time_grid(t0, t0 + om.SECONDS_PER_DAY, BENCH_REFERENCE_STEP),
+                           model, chunk=20)
+    coarse = sunlit_intervals(ref_elements, t, model)
+    span = 4 * om.SECONDS_PER_DAY
+    ref_keys = np.sort(np.concatenate([ref[0] * span + ref[1] - t0, ref[0] * span + ref[2] - t0]))
+    keys = np.concatenate([coarse[0] * span + coarse[1] - t0, coarse[0] * span + coarse[2] - t0])
+    k = np.clip(np.searchsorted(ref_keys, keys), 1, len(ref_keys) - 1)
+    error = np.minimum(np.abs(keys - ref_keys[k - 1]), np.abs(keys - ref_keys[k]))
+    print(f"   与 {BENCH_REFERENCE_STEP:g} 秒网格参考解比较 ({len(subset)} 个物体, {len(ref[0]):,} 个区间): "
+          f"边界误差 中位 {np.median(error) * 1000:.2f} ms, 最大 {error.max() * 1000:.2f} ms")
+    missed = len(ref[0]) - len(coarse[0])
+    if missed:
+        print(f"   ⚠️  漏检 {missed} 个短于网格步长的掠影区间")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 太阳位置与光照 / 地影计算")
+    parser.add_argument('--db', default=DB_NAME)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="计算受照区间并写入 SunlitIntervals")
+    p_build.add_argument('--days', type=int, default=DAYS)
+    p_build.add_argument('--start', help="起始 UTC 日期 YYYY-MM-DD（默认目录最新历元所在日）")
+    p_build.add_argument('--step', type=float, default=STEP_SECONDS, help="网格步长 (秒)")
+    p_build.add_argument('--model', choices=MODELS, default=DEFAULT_MODEL)
+
+    p_observe = sub.add_parser('observe', help="观测者当晚可观测的受照卫星")
+    p_observe.add_argument('--lat', type=float, default=51.5, help="纬度 (度，默认伦敦)")
+    p_observe.add_argument('--lon', type=float, default=-0.13, help="经度 (度，东经为正)")
+    p_observe.add_argument('--day', help="UTC 日期 YYYY-MM-DD（默认目录最新历元所在日）")
+    p_observe.add_argument('--step', type=float, default=STEP_SECONDS)
+    p_observe.add_argument('--min-elevation', type=float, default=MIN_ELEVATION_DEG)
+    p_observe.add_argument('--limit', type=int, default=LIST_LIMIT)
+
+    p_bench = sub.add_parser('bench', help="吞吐量与边界精度")
+    p_bench.add_argument('--objects', type=int, help="复制扩充到的物体数（默认全部在轨物体）")
+    p_bench.add_argument('--step', type=float, default=STEP_SECONDS)
+    p_bench.add_argument('--model', choices=MODELS, default=DEFAULT_MODEL)
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 太阳位置与光照 / 地影计算")
+    print("="*70)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        elements = om.load_elements(conn, extra_columns=('object_name',))
+        latest = float(elements['epoch'].max())
+        print(f"📊 在轨物体: {len(elements['norad_id']):,} 个, 最新历元 {om.unix_to_iso(latest)[:19]}")
+
+        if args.command == 'bench':
+            run_benchmark(elements, day_start(latest), args.objects, args.step, args.model)
+            return
+
+        day_arg = args.start if args.command == 'build' else args.day
+        first_day = day_start(float(om.epoch_to_unix([day_arg])[0])) if day_arg else day_start(latest)
+
+        if args.command == 'build':
+            print_header(f"受照区间 ({args.days} 天, 步长 {args.step:g} 秒, {args.model})")
+            build_intervals(conn, elements, first_day, args.days, args.step, args.model)
+            return
+
+        day = om.unix_to_iso(first_day)[:10]
+        intervals = load_intervals(conn, day, elements['norad_id'])
+        if intervals is None:
+            print(f"💡 {day} 没有缓存的受照区间，先计算并写入")
+            build_intervals(conn, elements, first_day, 1, args.step)
+            intervals = load_intervals(conn, day, elements['norad_id'])
+
+        print_header(f"观测者 ({args.lat:g}°, {args.lon:g}°) {day} 可观测卫星")
+        t = time_grid(first_day, first_day + om.SECONDS_PER_DAY, args.step)
+        for a, b in _windows(dark_windows(args.lat, args.lon, t), t):
+            print(f"   🌙 黑暗时段 {om.unix_to_iso(a)[11:16]} – {om.unix_to_iso(b)[11:16]} UTC")
+        start_time = time.time()
+        minutes = observable_minutes(elements, intervals, args.lat, args.lon, t, args.min_elevation)
+        visible = np.flatnonzero(minutes > 0)
+        print(f"✅ {len(visible):,} / {len(minutes):,} 个物体可观测 ({time.time() - start_time:.2f}秒)\n")
+        for k in visible[np.argsort(-minutes[visible], kind='stable')][:args.limit]:
+            print(f"   {elements['norad_id'][k]:>6d}  {str(elements['object_name'][k])[:28]:28s} "
+                  f"{minutes[k]:6.1f} 分钟")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+OrbitalGuard - 按轨道区域分区存储 (Regime-Partitioned Storage)
+==============================================================
+功能：
+1. 将 orbitalguard.db 按轨道区域拆分为 3 个独立的 SQLite 分区文件
+2. 通过 ATTACH 挂载分区，并用 TEMP VIEW 提供与原库同名的统一视图
+3. 支持只重建热点 LEO 分区（刷新时无需重写 MEO/GEO 与历史数据，只同步归属变化）
+
+分区规则：
+- leo      ← 在轨 (decay_date IS NULL) 且最新 mean_motion > 11.25 (周期 < 128 分钟)
+- meo_geo  ← 在轨的其他物体 (MEO / GEO / 大椭圆 / 无轨道数据)
+- decayed  ← 已陨落物体 (decay_date IS NOT NULL)，只追加的历史分区
+- core     ← LaunchMissions (体积小，不按区域拆分)
+
+查询方式：
+- 统一视图: SpaceObjects / Orbits / SatelliteDetails (UNION ALL 三个分区)
+- 在轨视图: ActiveSpaceObjects / ActiveOrbits (只扫描 leo + meo_geo)
+- 单分区:   leo.Orbits, meo_geo.SpaceObjects ... (只触达一个文件)
+
+用法：
+    python partition_storage.py                 # 从 orbitalguard.db 构建全部分区
+    python partition_storage.py --refresh leo   # 只重建 LEO 分区
+"""
+
+import sqlite3
+import argparse
+import os
+import re
+import time
+from datetime import datetime
+
+from create_database import DB_NAME, create_tables, print_header
+
+# ============================================================
+# 配置
+# ============================================================
+
+PARTITION_FILES = {
+    'leo': 'orbitalguard_leo.db',
+    'meo_geo': 'orbitalguard_meo_geo.db',
+    'decayed': 'orbitalguard_decayed.db',
+}
+CORE_FILE = 'orbitalguard_core.db'
+
+# mean_motion > 11.25 rev/day 即周期 < 128 分钟，对应 LEO 上界 (~2000 km)
+LEO_MIN_MEAN_MOTION = 11.25
+
+# 按分区拆分的表（LaunchMissions 放在 core）
+PARTITIONED_TABLES = ['SpaceObjects', 'Orbits', 'SatelliteDetails']
+
+# 每个分区内建立的索引（与 create_views_and_indexes.sql 中的常用过滤列一致）
+PARTITION_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_orbits_norad_id ON Orbits(norad_id)",
+    "CREATE INDEX IF NOT EXISTS idx_orbits_mean_motion ON Orbits(mean_motion)",
+    "CREATE INDEX IF NOT EXISTS idx_orbits_inclination_motion ON Orbits(inclination_deg, mean_motion)",
+    "CREATE INDEX IF NOT EXISTS idx_space_objects_decay_date ON SpaceObjects(decay_date)",
+    "CREATE INDEX IF NOT EXISTS idx_space_objects_object_type ON SpaceObjects(object_type)",
+    "CREATE INDEX IF NOT EXISTS idx_satellite_details_operator_owner ON SatelliteDetails(operator_owner)",
+]
+
+VIEWS_SQL_FILE = 'create_views_and_indexes.sql'
+
+# ============================================================
+# 1. 分区归属计算
+# ============================================================
+
+def build_partition_map(conn):
+    """在连接上创建 TEMP 表 partition_map(norad_id, partition)
+
+    源库需以 'src' 名称 ATTACH。每个物体按其最新历元的 mean_motion 归类，
+    同一物体的所有 Orbits 记录进入同一个分区。
+    """
+    conn.execute("DROP TABLE IF EXISTS temp.partition_map")
+    conn.execute(f"""
+        CREATE TEMP TABLE partition_map AS
+        SELECT
+            s.norad_id,
+            CASE
+                WHEN s.decay_date IS NOT NULL THEN 'decayed'
+                WHEN o.mean_motion > {LEO_MIN_MEAN_MOTION} THEN 'leo'
+                ELSE 'meo_geo'
+            END AS partition
+        FROM src.SpaceObjects s
+        LEFT JOIN (
+            SELECT norad_id, mean_motion, MAX(epoch) AS epoch
+            FROM src.Orbits
+            GROUP BY norad_id
+        ) o ON s.norad_id = o.norad_id
+    """)
+    conn.execute("CREATE INDEX temp.idx_partition_map ON partition_map(partition, norad_id)")
+
+# ============================================================
+# 2. 构建分区文件
+# ============================================================
+
+def _copy_partition_rows(conn, name, mode='INSERT'):
+    """把 partition_map 中属于 name 的行从 src 复制到当前 main 库"""
+    counts = {}
+    for table in PARTITIONED_TABLES:
+        cursor = conn.execute(f"""
+            {mode} INTO main.{table}
+            SELECT t.* FROM src.{table} t
+            WHERE t.norad_id IN (
+                SELECT norad_id FROM temp.partition_map WHERE partition = ?
+            )
+        """, (name,))
+        counts[table] = cursor.rowcount
+    return counts
+
+def build_partition(name, source_db=DB_NAME):
+    """重建单个分区文件：先写入临时文件，完成后原子替换"""
+    target = PARTITION_FILES[name]
+    tmp_path = target + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("ATTACH DATABASE ? AS src", (source_db,))
+        create_tables(conn)
+        build_partition_map(conn)
+        counts = _copy_partition_rows(conn, name)
+        for sql in PARTITION_INDEXES:
+            conn.execute(sql)
+        conn.commit()
+        conn.execute("DETACH DATABASE src")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, target)
+    return counts
+
+def build_core(source_db=DB_NAME):
+    """core 文件只保存 LaunchMissions"""
+    tmp_path = CORE_FILE + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS src", (source_db,))
+        conn.execute("CREATE TABLE LaunchMissions AS SELECT * FROM src.LaunchMissions WHERE 0")
+        conn.execute("INSERT INTO LaunchMissions SELECT * FROM src.LaunchMissions")
+        conn.commit()
+        count = conn.execute("SELECT COUNT(*) FROM LaunchMissions").fetchone()[0]
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, CORE_FILE)
+    return count
+
+def build_all_partitions(source_db=DB_NAME):
+    print_header("构建分区存储")
+
+    if not os.path.exists(source_db):
+        print(f"❌ 源数据库不存在: {source_db}")
+        return False
+
+    for name in PARTITION_FILES:
+        start = time.time()
+        counts = build_partition(name, source_db)
+        size_mb = os.path.getsize(PARTITION_FILES[name]) / 1024 / 1024
+        print(f"✅ {name:8s} → {PARTITION_FILES[name]} "
+              f"({counts['SpaceObjects']:,} 物体, {counts['Orbits']:,} 轨道, "
+              f"{size_mb:.2f} MB, {time.time() - start:.2f}秒)")
+
+    count = build_core(source_db)
+    print(f"✅ core     → {CORE_FILE} ({count:,} 条 LaunchMissions)")
+    return True
+
+def _sync_partition(name, source_db=DB_NAME, remove_moved=True):
+    """按最新归属增量同步分区：移出归属已改变的物体，追加新归属的物体
+
+    Returns:
+        (移出物体数, 追加物体数)
+    """
+    conn = sqlite3.connect(PARTITION_FILES[name])
+    try:
+        conn.execute("ATTACH DATABASE ? AS src", (source_db,))
+        build_partition_map(conn)
+        removed = 0
+        if remove_moved:
+            for table in PARTITIONED_TABLES:
+                cursor = conn.execute(f"""
+                    DELETE FROM main.{table}
+                    WHERE norad_id NOT IN (
+                        SELECT norad_id FROM temp.partition_map WHERE partition = ?
+                    )
+                """, (name,))
+                if table == 'SpaceObjects':
+                    removed = cursor.rowcount
+        # 只追加尚未在分区中的物体
+        conn.execute("""
+            DELETE FROM temp.partition_map
+            WHERE norad_id IN (SELECT norad_id FROM main.SpaceObjects)
+        """)
+        appended = _copy_partition_rows(conn, name, mode='INSERT OR IGNORE')
+        conn.commit()
+    finally:
+        conn.close()
+    return removed, appended['SpaceObjects']
+
+def refresh_leo(source_db=DB_NAME):
+    """只重建热点 LEO 分区
+
+    decayed 是只追加的历史分区：刷新时把新陨落的物体追加进去，
+    无需重写整个历史文件。meo_geo 不整体重写，只同步归属变化：
+    移出已陨落或进入 LEO 的物体，追加新出现或离开 LEO 的物体，
+    保证每个物体只属于一个分区。
+    """
+    print_header("刷新 LEO 分区")
+
+    start = time.time()
+    counts = build_partition('leo', source_db)
+    print(f"✅ leo 重建完成: {counts['SpaceObjects']:,} 物体, "
+          f"{counts['Orbits']:,} 轨道 ({time.time() - start:.2f}秒)")
+
+    _, appended = _sync_partition('decayed', source_db, remove_moved=False)
+    print(f"✅ decayed 追加 {appended:,} 个新陨落物体")
+
+    removed, appended = _sync_partition('meo_geo', source_db)
+    print(f"✅ meo_geo 同步归属: 移出 {removed:,} 个, 追加 {appended:,} 个")
+
+# ============================================================
+# 3. 统一视图层
+# ============================================================
+
+def _load_view_statements():
+    """读取 create_views_and_indexes.sql 中的 CREATE VIEW 语句，改写为 TEMP VIEW
+
+    引用 ATTACH 库的视图必须是 TEMP 视图；索引已在各分区内建立，这里跳过。
+    """
+    if not os.path.exists(VIEWS_SQL_FILE):
+        return []
+    with open(VIEWS_SQL_FILE, 'r', encoding='utf-8') as f:
+        sql = f.read()
+    sql = re.sub(r'--[^\n]*', '', sql)
+    statements = []
+    for stmt in sql.split(';'):
+        stmt = stmt.strip()
+        if stmt.upper().startswith('CREATE VIEW'):
+            statements.append(re.sub(r'^CREATE VIEW', 'CREATE TEMP VIEW', stmt, flags=re.I))
+    return statements
+
+def connect_partitioned(partitions=None, create_views=True):
+    """打开分区存储的统一连接
+
+    Args:
+        partitions: 需要挂载的分区列表，默认全部。只分析在轨物体时传入
+                    ['leo', 'meo_geo'] 可以完全不打开历史分区文件。
+        create_views: 是否同时创建 create_views_and_indexes.sql 中的视图
+
+    Returns:
+        sqlite3.Connection，SpaceObjects / Orbits / SatelliteDetails /
+        LaunchMissions 均可按原名查询，原有 SQL 无需修改。
+    """
+    partitions = list(partitions or PARTITION_FILES.keys())
+
+    conn = sqlite3.connect(CORE_FILE)
+    for name in partitions:
+        conn.execute("ATTACH DATABASE ? AS " + name, (PARTITION_FILES[name],))
+
+    active = [p for p in partitions if p != 'decayed']
+    for table in PARTITIONED_TABLES:
+        union_all = "\nUNION ALL\n".join(f"SELECT * FROM {p}.{table}" for p in partitions)
+        conn.execute(f"CREATE TEMP VIEW {table} AS {union_all}")
+        if active:
+            union_active = "\nUNION ALL\n".join(f"SELECT * FROM {p}.{table}" for p in active)
+            conn.execute(f"CREATE TEMP VIEW Active{table} AS {union_active}")
+
+    if create_views:
+        for stmt in _load_view_statements():
+            conn.execute(stmt)
+
+    return conn
+
+# ============================================================
+# 4. 分区效果对比
+# ============================================================
+
+def compare_with_monolithic(source_db=DB_NAME):
+    print_header("单库 vs 分区 查询耗时对比")
+
+    queries = [
+        ("物体总数",
+         "SELECT COUNT(*) FROM SpaceObjects",
+         "SELECT COUNT(*) FROM SpaceObjects"),
+        ("在轨物体计数",
+         "SELECT COUNT(*) FROM SpaceObjects WHERE decay_date IS NULL",
+         "SELECT COUNT(*) FROM ActiveSpaceObjects WHERE decay_date IS NULL"),
+        ("在轨 LEO 轨道",
+         f"""SELECT COUNT(*) FROM Orbits o JOIN SpaceObjects s ON o.norad_id = s.norad_id
+            WHERE s.decay_date IS NULL AND o.mean_motion > {LEO_MIN_MEAN_MOTION}""",
+         "SELECT COUNT(*) FROM leo.Orbits"),
+        # 同一物体的全部记录位于同一分区，JOIN 可在分区内完成后再汇总
+        ("在轨碎片 × 轨道",
+         """SELECT COUNT(*) FROM Orbits o JOIN SpaceObjects s ON o.norad_id = s.norad_id
+            WHERE s.object_type = 'DEBRIS' AND s.decay_date IS NULL""",
+         """SELECT SUM(n) FROM (
+                SELECT COUNT(*) AS n FROM leo.Orbits o JOIN leo.SpaceObjects s
+                    ON o.norad_id = s.norad_id WHERE s.object_type = 'DEBRIS'
+                UNION ALL
+                SELECT COUNT(*) FROM meo_geo.Orbits o JOIN meo_geo.SpaceObjects s
+                    ON o.norad_id = s.norad_id WHERE s.object_type = 'DEBRIS'
+            )"""),
+    ]
+
+    mono = sqlite3.connect(source_db)
+    part = connect_partitioned()
+    try:
+        # 每个物体只能属于一个分区，否则统一视图会重复返回
+        duplicates = part.execute("""
+            SELECT COUNT(*) FROM (SELECT norad_id FROM SpaceObjects GROUP BY norad_id HAVING COUNT(*) > 1)
+        """).fetchone()[0]
+        status = "✅" if duplicates == 0 else "⚠️ "
+        print(f"   {status} 跨分区重复物体: {duplicates:,} 个")
+
+        for label, mono_sql, part_sql in queries:
+            timings = []
+            results = []
+            for conn, sql in ((mono, mono_sql), (part, part_sql)):
+                start = time.perf_counter()
+                for _ in range(5):
+                    result = conn.execute(sql).fetchone()[0]
+                timings.append((time.perf_counter() - start) / 5 * 1000)
+                results.append(result)
+            status = "✅" if results[0] == results[1] else "⚠️ "
+            print(f"   {status} {label:16s} 单库 {timings[0]:8.2f} ms | "
+                  f"分区 {timings[1]:8.2f} ms | 结果 {results[0]:,} / {results[1]:,}")
+    finally:
+        mono.close()
+        part.close()
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 分区存储")
+    parser.add_argument('--source', default=DB_NAME, help="源数据库文件")
+    parser.add_argument('--refresh', choices=['leo'], help="只重建指定的热点分区")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 按轨道区域分区存储")
+    print("="*70)
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    if args.refresh == 'leo':
+        refresh_leo(args.source)
+    elif not build_all_partitions(args.source):
+        return
+
+    compare_with_monolithic(args.source)
+
+if __name__ == "__main__":
+    main()
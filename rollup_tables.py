@@ -0,0 +1,333 @@
+"""
+OrbitalGuard - 增量维护的汇总表 (Incrementally Maintained Rollups)
+==================================================================
+功能：
+1. ConstellationRollup：按 (operator_owner, object_type, class_of_orbit) 保存可加的计数与求和，
+   视图 v_constellations_rollup 由此给出与 v_constellations 相同的列，查询不再做三表连接 + GROUP BY
+2. LaunchMissions：建库时仍由 generate_launch_missions 一次性聚合，之后由触发器逐组维护
+3. 触发器只重算受影响物体所在的组：
+   - ConstellationRollup：变更前减去该 norad_id 的贡献，变更后再加回（UPSERT，计数归零的组删除）
+   - LaunchMissions：MIN / MAX 不可减，变更后按 launch_mission_id 重算该发射一组；
+     INSERT OR REPLACE 替换旧行时不触发 DELETE 触发器，由 BEFORE INSERT 触发器先重算旧行所在的发射
+4. 一致性检查：与全量重算结果逐组比较
+5. 基准测试：全量聚合 vs 读取汇总表，以及单颗卫星新增 / 陨落的维护开销
+
+用法：
+    python rollup_tables.py install      # 建表、全量初始化、安装触发器（建库时自动执行）
+    python rollup_tables.py check        # 与全量重算比较
+    python rollup_tables.py bench
+"""
+
+import sqlite3
+import argparse
+import time
+
+from create_database import DB_NAME, print_header
+
+# ============================================================
+# 配置
+# ============================================================
+
+GROUP_COLUMNS = ('operator_owner', 'object_type', 'class_of_orbit')
+# 可加聚合列 → 源表达式；AVG 拆成非空计数 (_n) 与求和 (_sum)
+SUM_COLUMNS = {
+    'inclination': 'o.inclination_deg',
+    'mean_motion': 'o.mean_motion',
+    'mass': 'sd.launch_mass_kg',
+    'lifetime': 'sd.expected_lifetime_years',
+}
+ROLLUP_COLUMNS = (GROUP_COLUMNS + ('satellite_count', 'active_count')
+                  + tuple(f"{name}_{part}" for name in SUM_COLUMNS for part in ('n', 'sum')))
+
+# 各源表上影响汇总的列（UPDATE OF 只在这些列变化时触发）
+CONSTELLATION_SOURCES = {
+    'SpaceObjects': ('norad_id', 'object_type', 'decay_date'),
+    'Orbits': ('norad_id', 'inclination_deg', 'mean_motion'),
+    'SatelliteDetails': ('norad_id', 'operator_owner', 'class_of_orbit',
+                         'launch_mass_kg', 'expected_lifetime_years'),
+}
+LAUNCH_SOURCE_COLUMNS = ('launch_mission_id', 'launch_date', 'country', 'launch_site')
+
+FLOAT_TOLERANCE = 1e-6
+BENCH_REPEAT = 20
+
+# ============================================================
+# 1. SQL 模板
+# ============================================================
+
+def _contribution_select(sign='', norad_key=None, condition=None):
+    """某个 norad_id（或全部物体）对各组的贡献；分组键中的 NULL 存为 ''，使 UPSERT 冲突检测生效"""
+    aggregates = [f"{sign}COUNT(*)", f"{sign}COUNT(CASE WHEN s.decay_date IS NULL THEN 1 END)"]
+    for expr in SUM_COLUMNS.values():
+        aggregates += [f"{sign}COUNT({expr})", f"{sign}TOTAL({expr})"]
+    where = "sd.operator_owner IS NOT NULL"
+    if norad_key is not None:
+        where = f"s.norad_id = {norad_key} AND " + where
+    if condition:
+        where = f"{condition} AND " + where
+    return f"""
+        SELECT sd.operator_owner, COALESCE(s.object_type, ''), COALESCE(sd.class_of_orbit, ''),
+               {', '.join(aggregates)}
+        FROM SpaceObjects s
+        INNER JOIN Orbits o ON s.norad_id = o.norad_id
+        INNER JOIN SatelliteDetails sd ON s.norad_id = sd.norad_id
+        WHERE {where}
+        GROUP BY 1, 2, 3"""
+
+def _apply_contribution(sign, norad_key, condition=None):
+    updates = ', '.join(f"{c} = {c} + excluded.{c}" for c in ROLLUP_COLUMNS[len(GROUP_COLUMNS):])
+    return (f"INSERT INTO ConstellationRollup ({', '.join(ROLLUP_COLUMNS)})"
+            f"{_contribution_select(sign, norad_key, condition)}\n"
+            f"        ON CONFLICT ({', '.join(GROUP_COLUMNS)}) DO UPDATE SET {updates};")
+
+_LAUNCH_SELECT = """
+        SELECT launch_mission_id, MIN(launch_date), MAX(UPPER(country)), MAX(UPPER(launch_site)), COUNT(*)
+        FROM SpaceObjects
+        WHERE {where}
+        GROUP BY launch_mission_id"""
+
+def _recompute_launch(key, exclude=None):
+    # 与 create_database.generate_launch_missions 的聚合规则一致，只作用于一个发射
+    where = f"launch_mission_id = {key} AND launch_mission_id != ''"
+    if exclude is not None:
+        where += f" AND norad_id != {exclude}"
+    return (f"DELETE FROM LaunchMissions WHERE launch_mission_id = {key};\n"
+            f"        INSERT INTO LaunchMissions (launch_mission_id, launch_date, country, launch_site, payload_count)"
+            + _LAUNCH_SELECT.format(where=where) + ";")
+
+def _trigger_definitions():
+    """生成 {触发器名: (时机, 触发体)}"""
+    triggers = {}
+    cleanup = "DELETE FROM ConstellationRollup WHERE satellite_count = 0;"
+    for table, columns in CONSTELLATION_SOURCES.items():
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            keys = {'INSERT': ['new.norad_id'], 'DELETE': ['old.norad_id'],
+                    'UPDATE': ['old.norad_id', 'new.norad_id']}[event]
+            spec = f"UPDATE OF {', '.join(columns)}" if event == 'UPDATE' else event
+            subtract, add = [], []
+            for k, key in enumerate(keys):
+                # norad_id 未变化时 old / new 指向同一物体，只处理一次
+                condition = "old.norad_id != new.norad_id" if k == 1 else None
+                subtract.append(_apply_contribution('-', key, condition))
+                add.append(_apply_contribution('', key, condition))
+            name = f"trg_rollup_{table.lower()}_{event.lower()}"
+            triggers[name + '_before'] = (f"BEFORE {spec} ON {table}", '\n        '.join(subtract))
+            triggers[name + '_after'] = (f"AFTER {spec} ON {table}", '\n        '.join(add + [cleanup]))
+
+    # INSERT OR REPLACE 删除旧行时不触发 DELETE 触发器（未开启 recursive_triggers），
+    # 插入前先按"去掉同 norad_id 旧行"重算旧行所在的发射
+    replaced = "(SELECT launch_mission_id FROM SpaceObjects WHERE norad_id = new.norad_id)"
+    triggers['trg_launch_replace'] = ("BEFORE INSERT ON SpaceObjects",
+                                      _recompute_launch(replaced, exclude='new.norad_id'))
+    triggers['trg_launch_insert'] = ("AFTER INSERT ON SpaceObjects", _recompute_launch('new.launch_mission_id'))
+    triggers['trg_launch_delete'] = ("AFTER DELETE ON SpaceObjects", _recompute_launch('old.launch_mission_id'))
+    triggers['trg_launch_update'] = (f"AFTER UPDATE OF {', '.join(LAUNCH_SOURCE_COLUMNS)} ON SpaceObjects",
+                                     _recompute_launch('old.launch_mission_id') + "\n        "
+                                     + _recompute_launch('new.launch_mission_id'))
+    return triggers
+
+# ============================================================
+# 2. 安装与全量初始化
+# ============================================================
+
+def create_rollup_tables(conn):
+    group_defs = ',\n            '.join(f"{c} TEXT NOT NULL" for c in GROUP_COLUMNS)
+    value_defs = ',\n            '.join(
+        f"{c} {'REAL' if c.endswith('_sum') else 'INTEGER'} NOT NULL DEFAULT 0"
+        for c in ROLLUP_COLUMNS[len(GROUP_COLUMNS):])
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS ConstellationRollup (
+            {group_defs},
+            {value_defs},
+            PRIMARY KEY ({', '.join(GROUP_COLUMNS)})
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rollup_empty ON ConstellationRollup(satellite_count)")
+    # 触发器按 norad_id / launch_mission_id 定位单个物体或单个发射
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orbits_norad_id ON Orbits(norad_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_launch_missions_launch_id ON SpaceObjects(launch_mission_id)")
+
+    averages = ',\n               '.join(
+        f"ROUND({name}_sum / NULLIF({name}_n, 0), {digits}) AS {alias}"
+        for name, digits, alias in (('inclination', 2, 'avg_inclination'),
+                                    ('mean_motion', 4, 'avg_mean_motion'),
+                                    ('mass', 0, 'avg_mass_kg'),
+                                    ('lifetime', 2, 'avg_lifetime_years')))
+    conn.execute("DROP VIEW IF EXISTS v_constellations_rollup")
+    conn.execute(f"""
+        CREATE VIEW v_constellations_rollup AS
+        SELECT operator_owner,
+               NULLIF(object_type, '') AS object_type,
+               NULLIF(class_of_orbit, '') AS class_of_orbit,
+               satellite_count,
+               {averages},
+               active_count
+        FROM ConstellationRollup
+    """)
+
+def rebuild_rollups(conn):
+    """全量重算两张汇总表（安装时或一致性检查失败后使用）"""
+    conn.execute("DELETE FROM ConstellationRollup")
+    conn.execute(f"INSERT INTO ConstellationRollup ({', '.join(ROLLUP_COLUMNS)}){_contribution_select()}")
+    conn.execute("DELETE FROM LaunchMissions")
+    conn.execute("INSERT INTO LaunchMissions (launch_mission_id, launch_date, country, launch_site, payload_count)"
+                 + _LAUNCH_SELECT.format(where="launch_mission_id IS NOT NULL AND launch_mission_id != ''"))
+
+def install_rollups(conn, rebuild=True):
+    """建表、安装触发器；rebuild=True 时先全量初始化"""
+    create_rollup_tables(conn)
+    if rebuild:
+        rebuild_rollups(conn)
+    for name, (timing, body) in _trigger_definitions().items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(f"""
+        CREATE TRIGGER {name} {timing}
+        BEGIN
+        {body}
+        END
+        """)
+    conn.commit()
+    groups = conn.execute("SELECT COUNT(*) FROM ConstellationRollup").fetchone()[0]
+    launches = conn.execute("SELECT COUNT(*) FROM LaunchMissions").fetchone()[0]
+    return groups, launches
+
+# ============================================================
+# 3. 一致性检查
+# ============================================================
+
+def _compare(maintained, recomputed, n_keys):
+    maintained = {row[:n_keys]: row[n_keys:] for row in maintained}
+    recomputed = {row[:n_keys]: row[n_keys:] for row in recomputed}
+    missing = [k for k in recomputed if k not in maintained]
+    extra = [k for k in maintained if k not in recomputed]
+    mismatched = []
+    for key in recomputed.keys() & maintained.keys():
+        for a, b in zip(maintained[key], recomputed[key]):
+            if isinstance(a, float) or isinstance(b, float):
+                same = a is not None and b is not None and abs(a - b) <= FLOAT_TOLERANCE * max(1.0, abs(b))
+            else:
+                same = a == b
+            if not same:
+                mismatched.append(key)
+                break
+    return missing, extra, mismatched
+
+def check_consistency(conn, verbose=True):
+    """汇总表与全量重算逐组比较，返回是否一致"""
+    results = {}
+    results['ConstellationRollup'] = _compare(
+        conn.execute(f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM ConstellationRollup").fetchall(),
+        conn.execute(_contribution_select()).fetchall(),
+        len(GROUP_COLUMNS))
+    results['LaunchMissions'] = _compare(
+        conn.execute("SELECT launch_mission_id, launch_date, country, launch_site, payload_count "
+                     "FROM LaunchMissions").fetchall(),
+        conn.execute(_LAUNCH_SELECT.format(
+            where="launch_mission_id IS NOT NULL AND launch_mission_id != ''")).fetchall(),
+        1)
+
+    ok = True
+    for table, (missing, extra, mismatched) in results.items():
+        good = not (missing or extra or mismatched)
+        ok &= good
+        if verbose:
+            status = '✅ 一致' if good else '❌ 不一致'
+            print(f"   {table:20s} {status}  缺失 {len(missing)} 组, 多余 {len(extra)} 组, 数值不符 {len(mismatched)} 组")
+            for key in (missing + extra + mismatched)[:5]:
+                print(f"      {key}")
+    return ok
+
+# ============================================================
+# 4. 基准测试
+# ============================================================
+
+def _time_ms(conn, sql, repeat=BENCH_REPEAT):
+    t = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql).fetchall()
+    return (time.perf_counter() - t) / repeat * 1000
+
+def run_benchmark(conn):
+    print_header("基准测试: 全量聚合 vs 汇总表")
+    full = _time_ms(conn, _contribution_select())
+    rollup = _time_ms(conn, "SELECT * FROM v_constellations_rollup")
+    print(f"   星座汇总: 全量聚合 {full:.2f} ms, 汇总表 {rollup:.3f} ms ({full / rollup:.0f}×)")
+    full = _time_ms(conn, _LAUNCH_SELECT.format(where="launch_mission_id IS NOT NULL AND launch_mission_id != ''"))
+    rollup = _time_ms(conn, "SELECT * FROM LaunchMissions")
+    print(f"   发射汇总: 全量聚合 {full:.2f} ms, 汇总表 {rollup:.3f} ms ({full / rollup:.0f}×)")
+
+    # 单颗卫星：在已有星座与发射中新增一颗，再标记陨落，最后回滚
+    row = conn.execute("""
+        SELECT s.norad_id, s.launch_mission_id FROM SpaceObjects s
+        JOIN SatelliteDetails sd ON sd.norad_id = s.norad_id
+        JOIN Orbits o ON o.norad_id = s.norad_id
+        WHERE sd.operator_owner IS NOT NULL AND s.launch_mission_id IS NOT NULL LIMIT 1
+    """).fetchone()
+    if row is None:
+        print("   ⚠️ 没有同时具备 SatelliteDetails 与 Orbits 的物体，跳过单星维护测试")
+        return
+    source, launch = row
+    new_id = conn.execute("SELECT MAX(norad_id) + 1 FROM SpaceObjects").fetchone()[0]
+    timings = {'新增': 0.0, '陨落': 0.0}
+    for k in range(BENCH_REPEAT):
+        norad = new_id + k
+        t = time.perf_counter()
+        conn.execute("""INSERT INTO SpaceObjects (norad_id, object_name, object_type, launch_date,
+                            country, launch_site, launch_mission_id)
+                        SELECT ?, object_name, object_type, launch_date, country, launch_site, launch_mission_id
+                        FROM SpaceObjects WHERE norad_id = ?""", (norad, source))
+        conn.execute("""INSERT INTO SatelliteDetails SELECT ?, launch_mass_kg, dry_mass_kg, power_watts,
+                            expected_lifetime_years, purpose, users, contractor, operator_owner,
+                            class_of_orbit, country_operator
+                        FROM SatelliteDetails WHERE norad_id = ?""", (norad, source))
+        conn.execute("""INSERT INTO Orbits (norad_id, epoch, inclination_deg, eccentricity, mean_motion,
+                            ra_of_asc_node, arg_of_pericenter, mean_anomaly, bstar)
+                        SELECT ?, epoch, inclination_deg, eccentricity, mean_motion, ra_of_asc_node,
+                            arg_of_pericenter, mean_anomaly, bstar
+                        FROM Orbits WHERE norad_id = ? LIMIT 1""", (norad, source))
+        timings['新增'] += time.perf_counter() - t
+        t = time.perf_counter()
+        conn.execute("UPDATE SpaceObjects SET decay_date = '2030-01-01' WHERE norad_id = ?", (norad,))
+        timings['陨落'] += time.perf_counter() - t
+
+    for label, total in timings.items():
+        print(f"   单星{label}（含触发器维护）: {total / BENCH_REPEAT * 1000:.3f} ms")
+    print(f"   发射 {launch} 内新增 {BENCH_REPEAT} 颗卫星后一致性:")
+    check_consistency(conn)
+    conn.rollback()
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 增量维护汇总表")
+    parser.add_argument('command', choices=['install', 'check', 'bench'])
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--repair', action='store_true', help="check 不一致时全量重算")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 增量维护汇总表")
+    print("="*70)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == 'install':
+            t = time.time()
+            groups, launches = install_rollups(conn)
+            print(f"✅ ConstellationRollup {groups:,} 组, LaunchMissions {launches:,} 个发射, "
+                  f"触发器 {len(_trigger_definitions())} 个 ({time.time() - t:.2f}秒)")
+        elif args.command == 'check':
+            print_header("一致性检查")
+            if not check_consistency(conn) and args.repair:
+                rebuild_rollups(conn)
+                conn.commit()
+                print("🔧 已全量重算")
+        else:
+            run_benchmark(conn)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
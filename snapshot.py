@@ -0,0 +1,410 @@
+"""
+OrbitalGuard - 内存快照模式 (In-Memory Snapshot)
+===============================================
+功能：
+1. 使用 sqlite3 backup API 将 orbitalguard.db 整库复制到内存数据库
+2. 为 Orbits 和 SpaceObjects 构建 NumPy 列数组
+3. 在快照上运行分析：轨道密度、星座汇总、合规统计
+4. 新数据库构建完成后原子切换到新快照（读取方始终看到完整快照）
+5. 磁盘 / 内存 SQL / NumPy 三种方式的延迟对比
+
+原子刷新机制：
+- create_database.py 先写入 orbitalguard.db.building，完成后 os.replace 到 orbitalguard.db
+- SnapshotManager 检测文件标识 (inode, mtime, size) 变化后，在后台加载新快照，
+  完全加载成功后才替换引用；加载过程中读取方继续使用旧快照
+
+用法：
+    python snapshot.py             # 加载快照并输出延迟对比
+    python snapshot.py --watch 30  # 每 30 秒检查一次新构建并自动刷新
+"""
+
+import sqlite3
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from create_database import DB_NAME, print_header
+
+# ============================================================
+# 配置
+# ============================================================
+
+ORBIT_COLUMNS = ['norad_id', 'inclination_deg', 'eccentricity', 'mean_motion',
+                 'ra_of_asc_node', 'arg_of_pericenter', 'mean_anomaly', 'bstar']
+
+# 与 Query 1.3 / v_orbits_classified 相同的高度分档（按 mean_motion 下界）
+ALTITUDE_BANDS = [
+    (15.5, '400-600 km'),
+    (14.5, '600-800 km'),
+    (13.5, '800-1000 km'),
+    (12.5, '1000-1200 km'),
+    (11.5, '1200-1400 km'),
+    (10.5, '1400-1600 km'),
+    (9.5, '1600-1800 km'),
+    (8.5, '1800-2000 km'),
+    (3.0, '>2000 km (GEO)'),
+]
+OTHER_BAND = 'Other'
+
+# 与 v_compliance_objects 相同的阈值
+IADC_LIMIT_YEARS = 25
+APPROACHING_LIMIT_YEARS = 20
+
+# ============================================================
+# 1. 快照
+# ============================================================
+
+class Snapshot:
+    """一次完整的内存快照（创建后只读）
+
+    Attributes:
+        conn: 内存 SQLite 连接，表与视图与磁盘库完全一致
+        orbits: Orbits 列数组字典 (float64 / int64)
+        objects: SpaceObjects 列数组字典，分类字段为整数编码 + categories
+        source_id: 源文件标识 (inode, mtime_ns, size)
+        loaded_at: 加载完成时间
+    """
+
+    def __init__(self, db_path=DB_NAME):
+        start = time.perf_counter()
+        self.source_id = file_identity(db_path)
+
+        # sqlite3 backup API：逐页复制整库（含索引与视图）
+        src = sqlite3.connect(db_path)
+        self.conn = sqlite3.connect(':memory:', check_same_thread=False)
+        try:
+            src.backup(self.conn)
+        finally:
+            src.close()
+
+        self.orbits = self._load_orbits()
+        self.objects = self._load_objects()
+        self.load_seconds = time.perf_counter() - start
+        self.loaded_at = datetime.now()
+
+    def _load_orbits(self):
+        df = pd.read_sql_query(f"SELECT {', '.join(ORBIT_COLUMNS)} FROM Orbits", self.conn)
+        columns = {c: df[c].to_numpy(dtype=np.float64) for c in ORBIT_COLUMNS[1:]}
+        columns['norad_id'] = df['norad_id'].to_numpy(dtype=np.int64)
+        return columns
+
+    def _load_objects(self):
+        df = pd.read_sql_query("""
+            SELECT s.norad_id, s.object_type, s.launch_date, s.decay_date,
+                   sd.operator_owner, sd.expected_lifetime_years
+            FROM SpaceObjects s
+            LEFT JOIN SatelliteDetails sd ON s.norad_id = sd.norad_id
+            ORDER BY s.norad_id
+        """, self.conn)
+
+        object_type = pd.Categorical(df['object_type'])
+        operator = pd.Categorical(df['operator_owner'])
+        launch = pd.to_datetime(df['launch_date'], errors='coerce')
+
+        return {
+            'norad_id': df['norad_id'].to_numpy(dtype=np.int64),
+            'object_type': object_type.codes.astype(np.int16),
+            'object_type_categories': np.asarray(object_type.categories, dtype=object),
+            'operator': operator.codes.astype(np.int32),
+            'operator_categories': np.asarray(operator.categories, dtype=object),
+            'is_active': df['decay_date'].isna().to_numpy(),
+            # 自 1970-01-01 起的天数，与 JULIANDAY 差值等价
+            'launch_day': ((launch - pd.Timestamp('1970-01-01')).dt.total_seconds() / 86400).to_numpy(dtype=np.float64),
+            'expected_lifetime_years': df['expected_lifetime_years'].to_numpy(dtype=np.float64),
+        }
+
+    def object_rows(self, norad_ids):
+        """norad_id 数组 → SpaceObjects 列数组中的行号（-1 表示不存在）"""
+        keys = self.objects['norad_id']
+        idx = np.searchsorted(keys, norad_ids)
+        idx = np.clip(idx, 0, len(keys) - 1)
+        return np.where(keys[idx] == norad_ids, idx, -1)
+
+    def type_code(self, object_type):
+        categories = list(self.objects['object_type_categories'])
+        return categories.index(object_type) if object_type in categories else -2
+
+    def close(self):
+        self.conn.close()
+
+def file_identity(path):
+    st = os.stat(path)
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+# ============================================================
+# 2. 原子刷新
+# ============================================================
+
+class SnapshotManager:
+    """持有当前快照，检测到新构建时原子切换
+
+    读取方通过 manager.current 获取快照引用并在整个分析过程中使用它；
+    刷新只替换引用，不修改旧快照，因此正在进行的分析不受影响。
+    """
+
+    def __init__(self, db_path=DB_NAME):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._current = Snapshot(db_path)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def current(self):
+        return self._current
+
+    def refresh_if_changed(self):
+        """源文件已被新构建替换时加载新快照，返回是否发生了切换"""
+        try:
+            identity = file_identity(self.db_path)
+        except FileNotFoundError:
+            return False
+        if identity == self._current.source_id:
+            return False
+
+        with self._lock:
+            if identity == self._current.source_id:
+                return False
+            new_snapshot = Snapshot(self.db_path)
+            old_snapshot, self._current = self._current, new_snapshot
+        # 旧快照不主动关闭：仍在使用它的读取方结束后由垃圾回收释放
+        del old_snapshot
+        return True
+
+    def start_watch(self, interval=30):
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    if self.refresh_if_changed():
+                        snap = self._current
+                        print(f"🔄 快照已刷新 ({snap.loaded_at.strftime('%H:%M:%S')}, "
+                              f"加载 {snap.load_seconds:.2f}秒)")
+                except sqlite3.Error as e:
+                    print(f"⚠️  快照刷新失败，继续使用旧快照: {e}")
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop_watch(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+# ============================================================
+# 3. 快照分析
+# ============================================================
+
+def altitude_band_index(mean_motion):
+    """mean_motion 数组 → ALTITUDE_BANDS 下标（len(ALTITUDE_BANDS) 表示 'Other'）"""
+    thresholds = np.array([t for t, _ in ALTITUDE_BANDS])
+    # 阈值降序，统计 mean_motion 不大于多少个阈值即得到分档下标
+    index = (mean_motion[:, None] <= thresholds[None, :]).sum(axis=1)
+    # NULL mean_motion 在 SQL 中落入 ELSE 'Other'
+    return np.where(np.isnan(mean_motion), len(ALTITUDE_BANDS), index)
+
+def orbital_density(snapshot):
+    """Query 1.3 轨道密度热力图的 NumPy 实现"""
+    orbits = snapshot.orbits
+    rows = snapshot.object_rows(orbits['norad_id'])
+    rows_ok = rows >= 0
+    active = np.zeros(len(rows), dtype=bool)
+    active[rows_ok] = snapshot.objects['is_active'][rows[rows_ok]]
+
+    object_type = np.full(len(rows), -1, dtype=np.int16)
+    object_type[rows_ok] = snapshot.objects['object_type'][rows[rows_ok]]
+
+    band = altitude_band_index(orbits['mean_motion'])[active]
+    object_type = object_type[active]
+    n_bands = len(ALTITUDE_BANDS) + 1
+
+    total = np.bincount(band, minlength=n_bands)
+    debris = np.bincount(band[object_type == snapshot.type_code('DEBRIS')], minlength=n_bands)
+    payload = np.bincount(band[object_type == snapshot.type_code('PAYLOAD')], minlength=n_bands)
+
+    labels = [label for _, label in ALTITUDE_BANDS] + [OTHER_BAND]
+    result = []
+    for i in np.argsort(-total, kind='stable'):
+        if total[i] == 0:
+            continue
+        result.append({
+            'altitude_range': labels[i],
+            'total_objects': int(total[i]),
+            'debris_count': int(debris[i]),
+            'payload_count': int(payload[i]),
+            'debris_percentage': round(float(debris[i]) * 100.0 / total[i], 2),
+        })
+    return result
+
+def constellation_rollup(snapshot, min_satellites=5):
+    """Query 4.3 星座规模汇总：在轨 PAYLOAD 按 operator 计数"""
+    objects = snapshot.objects
+    mask = (objects['is_active']
+            & (objects['object_type'] == snapshot.type_code('PAYLOAD'))
+            & (objects['operator'] >= 0))
+    counts = np.bincount(objects['operator'][mask], minlength=len(objects['operator_categories']))
+
+    order = np.argsort(-counts, kind='stable')
+    return [(objects['operator_categories'][i], int(counts[i]))
+            for i in order if counts[i] >= min_satellites]
+
+def compliance_summary(snapshot, now=None):
+    """v_compliance_objects 合规状态统计（在轨物体按入轨年限分类）
+
+    now 为 UNIX 时间戳（秒），默认当前时间。
+    """
+    now_day = (now if now is not None else time.time()) / 86400
+
+    objects = snapshot.objects
+    years = np.floor((now_day - objects['launch_day'][objects['is_active']]) / 365.25)
+    return {
+        'VIOLATES_IADC': int((years > IADC_LIMIT_YEARS).sum()),
+        'APPROACHING_LIMIT': int(((years > APPROACHING_LIMIT_YEARS) & (years <= IADC_LIMIT_YEARS)).sum()),
+        # launch_date 缺失时 SQL 视图同样归入 COMPLIANT
+        'COMPLIANT': int((~(years > APPROACHING_LIMIT_YEARS)).sum()),
+    }
+
+# ============================================================
+# 4. 延迟对比
+# ============================================================
+
+DENSITY_SQL = """
+    SELECT
+        CASE
+            WHEN mean_motion > 15.5 THEN '400-600 km'
+            WHEN mean_motion > 14.5 THEN '600-800 km'
+            WHEN mean_motion > 13.5 THEN '800-1000 km'
+            WHEN mean_motion > 12.5 THEN '1000-1200 km'
+            WHEN mean_motion > 11.5 THEN '1200-1400 km'
+            WHEN mean_motion > 10.5 THEN '1400-1600 km'
+            WHEN mean_motion > 9.5 THEN '1600-1800 km'
+            WHEN mean_motion > 8.5 THEN '1800-2000 km'
+            WHEN mean_motion > 3.0 THEN '>2000 km (GEO)'
+            ELSE 'Other'
+        END as altitude_range,
+        COUNT(*) as total_objects,
+        COUNT(CASE WHEN s.object_type = 'DEBRIS' THEN 1 END) as debris_count,
+        COUNT(CASE WHEN s.object_type = 'PAYLOAD' THEN 1 END) as payload_count
+    FROM Orbits o
+    INNER JOIN SpaceObjects s ON o.norad_id = s.norad_id
+    WHERE s.decay_date IS NULL
+    GROUP BY altitude_range
+"""
+
+CONSTELLATION_SQL = """
+    SELECT sd.operator_owner, COUNT(*)
+    FROM SpaceObjects s
+    INNER JOIN SatelliteDetails sd ON s.norad_id = sd.norad_id
+    WHERE s.decay_date IS NULL AND s.object_type = 'PAYLOAD'
+      AND sd.operator_owner IS NOT NULL
+    GROUP BY sd.operator_owner
+    HAVING COUNT(*) >= 5
+"""
+
+COMPLIANCE_SQL = """
+    SELECT
+        CASE
+            WHEN CAST((JULIANDAY('now') - JULIANDAY(launch_date)) / 365.25 AS INTEGER) > 25 THEN 'VIOLATES_IADC'
+            WHEN CAST((JULIANDAY('now') - JULIANDAY(launch_date)) / 365.25 AS INTEGER) > 20 THEN 'APPROACHING_LIMIT'
+            ELSE 'COMPLIANT'
+        END as compliance_status,
+        COUNT(*)
+    FROM SpaceObjects
+    WHERE decay_date IS NULL
+    GROUP BY compliance_status
+"""
+
+def _time_ms(func, repeat):
+    func()  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def compare_latency(snapshot, db_path=DB_NAME, repeat=20):
+    print_header("磁盘 vs 内存 延迟对比")
+
+    disk = sqlite3.connect(db_path)
+    try:
+        cases = [
+            ("轨道密度 (Query 1.3)", DENSITY_SQL, orbital_density),
+            ("星座汇总 (Query 4.3)", CONSTELLATION_SQL, constellation_rollup),
+            ("合规统计 (View 6)", COMPLIANCE_SQL, compliance_summary),
+        ]
+        print(f"   {'分析':22s} {'磁盘 SQL':>12s} {'内存 SQL':>12s} {'NumPy':>12s}")
+        for label, sql, func in cases:
+            disk_ms = _time_ms(lambda: disk.execute(sql).fetchall(), repeat)
+            mem_ms = _time_ms(lambda: snapshot.conn.execute(sql).fetchall(), repeat)
+            np_ms = _time_ms(lambda: func(snapshot), repeat)
+            print(f"   {label:22s} {disk_ms:9.3f} ms {mem_ms:9.3f} ms {np_ms:9.3f} ms")
+
+        # 单点查询：磁盘连接每次新建（模拟脚本/服务按需打开），内存快照常驻
+        sample = snapshot.objects['norad_id'][::max(1, len(snapshot.objects['norad_id']) // 200)]
+        point_sql = "SELECT * FROM SpaceObjects WHERE norad_id = ?"
+
+        def disk_point():
+            for nid in sample:
+                conn = sqlite3.connect(db_path)
+                conn.execute(point_sql, (int(nid),)).fetchone()
+                conn.close()
+
+        def mem_point():
+            for nid in sample:
+                snapshot.conn.execute(point_sql, (int(nid),)).fetchone()
+
+        disk_ms = _time_ms(disk_point, 3) / len(sample)
+        mem_ms = _time_ms(mem_point, 3) / len(sample)
+        print(f"   {'单点查询 (norad_id)':22s} {disk_ms:9.3f} ms {mem_ms:9.3f} ms {'-':>12s}")
+    finally:
+        disk.close()
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 内存快照")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--watch', type=int, metavar='SECONDS', help="持续监测新构建并自动刷新")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 内存快照模式")
+    print("="*70)
+
+    if not os.path.exists(args.db):
+        print(f"❌ 数据库不存在: {args.db}")
+        return
+
+    manager = SnapshotManager(args.db)
+    snap = manager.current
+    size_mb = os.path.getsize(args.db) / 1024 / 1024
+    print(f"✅ 快照加载完成: {size_mb:.2f} MB, {len(snap.orbits['norad_id']):,} 条轨道, "
+          f"{len(snap.objects['norad_id']):,} 个物体 ({snap.load_seconds:.2f}秒)")
+
+    print_header("快照分析结果")
+    for row in orbital_density(snap):
+        print(f"   {row['altitude_range']:16s} 总数 {row['total_objects']:>6,}  "
+              f"碎片 {row['debris_count']:>6,}  载荷 {row['payload_count']:>6,}  "
+              f"碎片占比 {row['debris_percentage']:>6.2f}%")
+    print(f"\n   合规统计: {compliance_summary(snap)}")
+    top = constellation_rollup(snap)[:5]
+    print(f"   最大星座: {top}")
+
+    compare_latency(snap, args.db)
+
+    if args.watch:
+        print(f"\n👀 监测 {args.db} 的新构建 (每 {args.watch} 秒)，Ctrl+C 退出")
+        manager.start_watch(args.watch)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            manager.stop_watch()
+
+if __name__ == "__main__":
+    main()
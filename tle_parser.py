@@ -0,0 +1,390 @@
+"""
+OrbitalGuard - TLE 固定宽度快速解析 (Vectorized TLE Parser)
+==========================================================
+功能：
+1. 将成批的 TLE 行转换为 (N, 69) 字节矩阵，按固定列宽一次性切片解析所有字段
+2. 校验和验证（数字之和 + '-' 计 1，模 10），行号 / 卫星编号一致性检查
+3. 解码隐含小数点字段（BSTAR、平均运动二阶导数，如 " 15316-3" → 1.5316e-4）与 Alpha-5 编号
+4. 支持 2 行 / 3 行格式的 .tle / .txt 文件（可 gzip 压缩）与标准输入流
+5. 直接写入 Orbits 表；create_database.py 导入 GP 数据时用本模块解析 TLE_LINE1 / TLE_LINE2 补齐 JSON 缺失的根数
+
+字段位置（0 起始，左闭右开，与 TLE 格式说明的 1 起始列号差 1）：
+    第 1 行: 卫星编号 2:7, 分类 7, 国际编号 9:17, 历元年 18:20, 历元日 20:32,
+             一阶导数 33:43, 二阶导数 44:52, BSTAR 53:61, 根数组号 64:68, 校验和 68
+    第 2 行: 卫星编号 2:7, 倾角 8:16, 升交点赤经 17:25, 偏心率 26:33 (隐含前导小数点),
+             近地点幅角 34:42, 平近点角 43:51, 平均运动 52:63, 圈数 63:68, 校验和 68
+
+用法：
+    python tle_parser.py ingest catalog.tle history.txt     # 写入 orbitalguard.db 的 Orbits
+    cat feed.tle | python tle_parser.py ingest -            # 从标准输入读取
+    python tle_parser.py bench --lines 2000000               # 解析吞吐量 (lines/min)
+"""
+
+import sqlite3
+import argparse
+import gzip
+import sys
+import time
+
+import numpy as np
+
+from create_database import DB_NAME, print_header, safe_float
+
+# ============================================================
+# 配置
+# ============================================================
+
+LINE_WIDTH = 69
+INGEST_BATCH = 500_000
+
+# 两位年份：57-99 → 19xx，00-56 → 20xx（Sputnik 1957 之前没有 TLE）
+PIVOT_YEAR = 57
+
+# Alpha-5 编号首字母（跳过 I 与 O）：A=10 ... Z=33
+ALPHA5_LETTERS = "ABCDEFGHJKLMNPQRSTUVWXYZ"
+
+ORBIT_FIELDS = ['inclination_deg', 'eccentricity', 'mean_motion', 'ra_of_asc_node',
+                'arg_of_pericenter', 'mean_anomaly', 'bstar']
+
+_SPACE, _MINUS, _PLUS, _DOT = (ord(c) for c in " -+.")
+
+# Alpha-5 首位查找表：数字 0-9、空格 0、字母 10-33，其余 -1
+_ALPHA5_VALUE = np.full(256, -1, dtype=np.int64)
+_ALPHA5_VALUE[ord('0'):ord('9') + 1] = np.arange(10)
+_ALPHA5_VALUE[_SPACE] = 0
+_ALPHA5_VALUE[[ord(c) for c in ALPHA5_LETTERS]] = np.arange(10, 10 + len(ALPHA5_LETTERS))
+
+# ============================================================
+# 1. 行矩阵与字段解码
+# ============================================================
+
+def to_matrix(lines):
+    """TLE 行列表 (str 或 bytes) → (N, 69) uint8 矩阵，短行右侧补空格"""
+    if not lines:
+        return np.empty((0, LINE_WIDTH), dtype=np.uint8)
+    # 快速路径：全部恰好 69 列时整体拼接，无需逐行补齐
+    lengths = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+    if (lengths == LINE_WIDTH).all():
+        buffer = "".join(lines).encode('ascii', 'replace') if isinstance(lines[0], str) else b"".join(lines)
+        if len(buffer) == LINE_WIDTH * len(lines):
+            return np.frombuffer(buffer, dtype=np.uint8).reshape(-1, LINE_WIDTH)
+    encoded = [l.encode('ascii', 'replace') if isinstance(l, str) else l for l in lines]
+    buffer = b"".join(l[:LINE_WIDTH].ljust(LINE_WIDTH) for l in encoded)
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(-1, LINE_WIDTH)
+
+class FixedColumns:
+    """一批 TLE 行的列式视图
+
+    字节矩阵转置为 (69, N)：每一列字符在内存中连续，字段解码是逐列的整数 Horner 累加，
+    只涉及 N 长度的向量运算。
+    """
+
+    def __init__(self, matrix):
+        self.chars = np.ascontiguousarray(matrix.T)
+        digits = self.chars - np.uint8(ord('0'))
+        is_digit = digits < 10
+        self.digits = np.where(is_digit, digits, np.uint8(0))
+        self.numeric = is_digit | (self.chars == _SPACE)
+
+    def _signed_or_numeric(self, column):
+        c = self.chars[column]
+        return self.numeric[column] | (c == _MINUS) | (c == _PLUS)
+
+    def decimal(self, start, end, point=None):
+        """定点小数字段（首列可为符号位）
+
+        Args:
+            point: 小数点所在列；None 表示隐含在字段最左侧（如偏心率）
+
+        Returns:
+            (float64 数组, 字段格式是否有效)
+        """
+        value = np.zeros(self.chars.shape[1], dtype=np.int64)
+        ok = self._signed_or_numeric(start)
+        for column in range(start, end):
+            if column == point:
+                continue
+            value *= 10
+            value += self.digits[column]
+            if column > start:
+                ok &= self.numeric[column]
+        if point is not None:
+            ok &= self.chars[point] == _DOT
+        ok &= (self.chars[start:end] != _SPACE).any(axis=0)
+
+        decimals = end - start if point is None else end - 1 - point
+        value = value / 10.0 ** decimals
+        return np.where(self.chars[start] == _MINUS, -value, value), ok
+
+    def integer(self, start, end):
+        value = np.zeros(self.chars.shape[1], dtype=np.int64)
+        for column in range(start, end):
+            value *= 10
+            value += self.digits[column]
+        return value, self.numeric[start:end].all(axis=0)
+
+    def implied(self, start):
+        """8 列隐含小数点指数字段 "±ddddd±d"，如 " 15316-3" → 0.15316e-3"""
+        mantissa, ok_m = self.decimal(start + 1, start + 6)
+        exponent, ok_e = self.integer(start + 7, start + 8)
+        exponent = np.where(self.chars[start + 6] == _MINUS, -exponent, exponent)
+        ok = ok_m & ok_e & self._signed_or_numeric(start) & self._signed_or_numeric(start + 6)
+        # 尾数还原为 5 位整数，再只做一次 10 的幂乘除，结果与解析十进制字符串一致
+        # （0.50119 * 1e-4 会二次舍入成 5.0119000000000006e-05）
+        digits = np.rint(mantissa * 1e5)
+        scale = 5 - exponent
+        value = np.where(scale >= 0, digits / 10.0 ** np.maximum(scale, 0),
+                         digits * 10.0 ** np.maximum(-scale, 0))
+        value = np.where(self.chars[start] == _MINUS, -value, value)
+        return value, ok
+
+    def catalog_number(self):
+        """第 3-7 列卫星编号，支持 Alpha-5（首位字母表示 10 万以上编号）"""
+        tail, ok = self.integer(3, 7)
+        lead = _ALPHA5_VALUE[self.chars[2]]
+        return lead * 10000 + tail, ok & (lead >= 0)
+
+    def checksum_ok(self):
+        """第 69 列校验和：前 68 列数字之和 + '-' 个数，模 10"""
+        body = slice(0, LINE_WIDTH - 1)
+        total = (self.digits[body].sum(axis=0, dtype=np.int32)
+                 + (self.chars[body] == _MINUS).sum(axis=0, dtype=np.int32))
+        last = LINE_WIDTH - 1
+        return (total % 10 == self.digits[last]) & (self.numeric[last]) & (self.chars[last] != _SPACE)
+
+    def epoch(self):
+        """历元年 + 年积日 → datetime64[us]"""
+        year, ok_y = self.integer(18, 20)
+        day, ok_d = self.decimal(20, 32, point=23)
+        year = np.where(year < PIVOT_YEAR, 2000 + year, 1900 + year)
+        start = (year - 1970).astype('datetime64[Y]').astype('datetime64[us]')
+        offset = np.round((day - 1.0) * 86400e6).astype(np.int64).astype('timedelta64[us]')
+        return start + offset, ok_y & ok_d & (day >= 1.0) & (day < 367.0)
+
+# ============================================================
+# 2. 批量解析
+# ============================================================
+
+def parse_tle_lines(line1, line2, names=None):
+    """批量解析 TLE 行对
+
+    Args:
+        line1, line2: 等长的行列表；缺失的记录可传空字符串
+        names: 可选的第 0 行名称列表
+
+    Returns:
+        列数组字典：norad_id、epoch (datetime64[us])、ORBIT_FIELDS、mean_motion_dot、
+        mean_motion_ddot、element_set_no、rev_at_epoch、classification、intl_designator、
+        checksum_ok、valid（格式 + 校验和 + 两行编号一致全部通过）
+    """
+    m1, m2 = to_matrix(line1), to_matrix(line2)
+    c1, c2 = FixedColumns(m1), FixedColumns(m2)
+
+    norad_id, ok_id1 = c1.catalog_number()
+    norad_id2, ok_id2 = c2.catalog_number()
+    epoch, ok_epoch = c1.epoch()
+    ndot, ok_ndot = c1.decimal(33, 43, point=34)
+    nddot, ok_nddot = c1.implied(44)
+    bstar, ok_bstar = c1.implied(53)
+    element_set_no, _ = c1.integer(64, 68)
+
+    inc, ok_inc = c2.decimal(8, 16, point=11)
+    raan, ok_raan = c2.decimal(17, 25, point=20)
+    ecc, ok_ecc = c2.decimal(26, 33)
+    argp, ok_argp = c2.decimal(34, 42, point=37)
+    mean_anomaly, ok_ma = c2.decimal(43, 51, point=46)
+    mean_motion, ok_mm = c2.decimal(52, 63, point=54)
+    rev_at_epoch, _ = c2.integer(63, 68)
+
+    checksums = c1.checksum_ok() & c2.checksum_ok()
+    valid = ((m1[:, 0] == ord('1')) & (m2[:, 0] == ord('2'))
+             & ok_id1 & ok_id2 & (norad_id == norad_id2) & ok_epoch
+             & ok_ndot & ok_nddot & ok_bstar & ok_inc & ok_raan & ok_ecc
+             & ok_argp & ok_ma & ok_mm & checksums)
+
+    result = {
+        'norad_id': norad_id,
+        'epoch': epoch,
+        'inclination_deg': inc,
+        'eccentricity': ecc,
+        'mean_motion': mean_motion,
+        'ra_of_asc_node': raan,
+        'arg_of_pericenter': argp,
+        'mean_anomaly': mean_anomaly,
+        'bstar': bstar,
+        'mean_motion_dot': ndot,
+        'mean_motion_ddot': nddot,
+        'element_set_no': element_set_no,
+        'rev_at_epoch': rev_at_epoch,
+        'classification': m1[:, 7].view('S1').astype(str),
+        'intl_designator': np.char.strip(m1[:, 9:17].copy().view('S8').ravel().astype(str)),
+        'checksum_ok': checksums,
+        'valid': valid,
+    }
+    if names is not None:
+        # 3 行格式的名称行可能带 "0 " 前缀
+        result['object_name'] = np.array([n[2:].strip() if n.startswith('0 ') else n.strip()
+                                          for n in names], dtype=object)
+    return result
+
+def epoch_to_iso(epoch):
+    """datetime64[us] → 与 GP JSON EPOCH 相同格式的字符串 (YYYY-MM-DDTHH:MM:SS.ffffff)"""
+    return np.datetime_as_string(epoch, unit='us')
+
+def pair_lines(lines):
+    """从 2 行 / 3 行混合文本中找出 (名称, 第 1 行, 第 2 行)
+
+    以 "1 " 开头且下一行以 "2 " 开头的位置视为一条记录；前一行若不是 TLE 数据行则作为名称。
+    """
+    lines = [l.rstrip(b"\r\n") if isinstance(l, bytes) else l.rstrip("\r\n") for l in lines]
+    lines = [l for l in lines if l.strip()]
+    if len(lines) < 2:
+        return [], [], []
+    head = np.array([l[:2] for l in lines])
+    is_1 = head == head.dtype.type('1 ')
+    is_2 = head == head.dtype.type('2 ')
+
+    starts = np.flatnonzero(is_1[:-1] & is_2[1:])
+    has_name = np.zeros(len(starts), dtype=bool)
+    prev = starts - 1
+    has_name[starts > 0] = ~(is_1[prev[starts > 0]] | is_2[prev[starts > 0]])
+
+    def text(l):
+        return l.decode('ascii', 'replace') if isinstance(l, bytes) else l
+
+    names = [text(lines[p]) if h else '' for p, h in zip(prev, has_name)]
+    return names, [lines[s] for s in starts], [lines[s + 1] for s in starts]
+
+def read_tle_file(path):
+    """读取 .tle / .txt（可 gzip 压缩）文件或标准输入 ('-')，返回 parse_tle_lines() 的结果"""
+    if path == '-':
+        raw = sys.stdin.buffer.read()
+    else:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            raw = f.read()
+    names, line1, line2 = pair_lines(raw.splitlines())
+    return parse_tle_lines(line1, line2, names)
+
+# ============================================================
+# 3. 写入 Orbits
+# ============================================================
+
+def orbit_rows(parsed, index=None):
+    """解析结果 → Orbits 插入参数元组列表 (norad_id, epoch, 7 个根数)"""
+    if index is None:
+        index = np.flatnonzero(parsed['valid'])
+    epochs = epoch_to_iso(parsed['epoch'][index])
+    values = np.column_stack([parsed[c][index] for c in ORBIT_FIELDS]).tolist()
+    return [(int(n), e, *v) for n, e, v in zip(parsed['norad_id'][index], epochs, values)]
+
+def ingest_orbits(conn, parsed):
+    """有效记录写入 Orbits，返回 (写入数, 校验和失败数, 其他无效数)"""
+    valid = np.flatnonzero(parsed['valid'])
+    for offset in range(0, len(valid), INGEST_BATCH):
+        conn.executemany("""
+            INSERT INTO Orbits
+            (norad_id, epoch, inclination_deg, eccentricity, mean_motion,
+             ra_of_asc_node, arg_of_pericenter, mean_anomaly, bstar)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, orbit_rows(parsed, valid[offset:offset + INGEST_BATCH]))
+    conn.commit()
+    bad_checksum = int((~parsed['checksum_ok']).sum())
+    return len(valid), bad_checksum, len(parsed['valid']) - len(valid) - bad_checksum
+
+def ingest_files(paths, db_path=DB_NAME):
+    print_header("TLE 导入 Orbits")
+    conn = sqlite3.connect(db_path)
+    try:
+        for path in paths:
+            start = time.time()
+            parsed = read_tle_file(path)
+            inserted, bad_checksum, invalid = ingest_orbits(conn, parsed)
+            label = "stdin" if path == '-' else path
+            print(f"✅ {label}: {len(parsed['valid']):,} 组 → 写入 {inserted:,} "
+                  f"(校验和失败 {bad_checksum:,}, 格式无效 {invalid:,}) {time.time() - start:.2f}秒")
+    finally:
+        conn.close()
+
+# ============================================================
+# 4. 基准测试
+# ============================================================
+
+def _scalar_parse(line1, line2):
+    """逐行字符串切片 + safe_float 的参考实现（对比用）"""
+    def implied(field):
+        field = field.strip()
+        mantissa, exponent = field[:-2], field[-2:]
+        sign = -1.0 if mantissa.startswith('-') else 1.0
+        return sign * safe_float('0.' + mantissa.lstrip('+-')) * 10 ** int(exponent)
+
+    rows = []
+    for l1, l2 in zip(line1, line2):
+        rows.append((
+            int(l1[2:7]),
+            safe_float(l2[8:16]),
+            safe_float('0.' + l2[26:33]),
+            safe_float(l2[52:63]),
+            safe_float(l2[17:25]),
+            safe_float(l2[34:42]),
+            safe_float(l2[43:51]),
+            implied(l1[53:61]),
+        ))
+    return rows
+
+def run_benchmark(n_lines, source=None):
+    print_header(f"TLE 解析吞吐量 ({n_lines:,} 行)")
+
+    if source:
+        with open(source, 'r') as f:
+            names, line1, line2 = pair_lines(f.read().splitlines())
+    else:
+        line1 = ['1 24946U 97051C   25330.73852204  .00000456  00000-0  15316-3 0  9995']
+        line2 = ['2 24946  86.3868  74.9371 0005799 265.2059  94.8475 14.35019534476050']
+    repeat = max(1, n_lines // (2 * len(line1)))
+    line1, line2 = line1 * repeat, line2 * repeat
+    n = 2 * len(line1)
+
+    start = time.perf_counter()
+    parsed = parse_tle_lines(line1, line2)
+    vec = time.perf_counter() - start
+
+    n_scalar = min(len(line1), 200_000)
+    start = time.perf_counter()
+    scalar = _scalar_parse(line1[:n_scalar], line2[:n_scalar])
+    sca = (time.perf_counter() - start) * len(line1) / n_scalar
+
+    print(f"   向量化:   {n / vec * 60:>14,.0f} lines/min ({vec:.2f}秒, 有效 {parsed['valid'].sum():,} 组)")
+    print(f"   逐行参考: {n / sca * 60:>14,.0f} lines/min (按 {n_scalar:,} 组外推)")
+    print(f"   加速比:   {sca / vec:>14.1f}×")
+
+    # 一致性校验
+    ref = np.array([r[1:] for r in scalar])
+    ours = np.column_stack([parsed[c][:n_scalar] for c in ORBIT_FIELDS])
+    print(f"   最大差异: {np.nanmax(np.abs(ref - ours)):.2e}")
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard TLE 快速解析")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_ingest = sub.add_parser('ingest', help="TLE 文件 (.tle / .txt，'-' 为标准输入) 写入 Orbits")
+    p_ingest.add_argument('files', nargs='+')
+    p_ingest.add_argument('--db', default=DB_NAME)
+
+    p_bench = sub.add_parser('bench', help="解析吞吐量测试")
+    p_bench.add_argument('--lines', type=int, default=2_000_000)
+    p_bench.add_argument('--source', help="用真实 TLE 文件作为样本（默认内置一组）")
+
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        ingest_files(args.files, args.db)
+    elif args.command == 'bench':
+        run_benchmark(args.lines, args.source)
+
+if __name__ == "__main__":
+    main()
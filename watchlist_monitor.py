@@ -0,0 +1,634 @@
+"""
+OrbitalGuard - 重点目标增量监视 (Incremental Watchlist Screening Monitor)
+=========================================================================
+功能：
+1. Watchlist 表保存需要重点保护的目标（空间站、自有星座等）的 NORAD 编号；
+   表放在独立文件 orbitalguard_watchlist.db 中，create_database.py 整体替换主库时不受影响
+2. 常驻进程轮询数据库与 Watchlist 文件标识，检测到新的导入（或 add / remove）后
+   重新读取 Watchlist，只重新筛选受影响的物体对：
+   - 根数有更新的重点目标：重建候选集，与全部候选重新筛选
+   - 根数有更新的其他物体：只与把它列为候选的重点目标重新筛选
+   - 未变化的物体对保留上次结果，筛选窗口前移时只补算新增的时间段
+3. 每个重点目标的候选集（近地点 / 远地点高度区间重叠的物体）在两次导入之间常驻内存
+4. 与上次结果比较后输出告警：NEW（新出现）、UPDATED（脱靶距离或风险等级变化）、
+   CLEARED（新根数下相遇消失），写入 JSON Lines 文件，同时放入进程内队列
+5. 记录每次导入到告警输出的延迟（以数据库文件修改时间为导入时刻）
+
+与 v_collision_risks / collision_probability.py 的区别：
+- 后者每次对全目录所有物体对从头计算
+- 本模块只计算 "重点目标 × 候选" 中涉及变化物体的物体对，常规导入只更新很少一部分
+
+用法：
+    python watchlist_monitor.py add 25544 48274 --label "ISS / CSS"
+    python watchlist_monitor.py remove 48274
+    python watchlist_monitor.py list
+    python watchlist_monitor.py run --interval 30 --alerts watchlist_alerts.jsonl
+    python watchlist_monitor.py run --once
+    python watchlist_monitor.py bench --assets 200 --changed 300
+"""
+
+import sqlite3
+import argparse
+import json
+import os
+import queue
+import time
+from datetime import datetime
+
+import numpy as np
+
+from create_database import DB_NAME, print_header
+from snapshot import file_identity
+import orbit_math as om
+import collision_probability as cp
+import conjunction_screening as cs
+
+# ============================================================
+# 配置
+# ============================================================
+
+HORIZON_HOURS = cp.WINDOW_HOURS
+STEP_SECONDS = cp.SCREEN_STEP_SECONDS
+MISS_THRESHOLD_KM = cp.MISS_THRESHOLD_KM
+# 候选集高度区间的额外余量 (km)，覆盖偏心率引起的高度估计误差
+CANDIDATE_PAD_KM = 10.0
+# 同一物体对 TCA 相差不超过该值视为同一次相遇（远小于最短轨道周期）
+MATCH_WINDOW_SECONDS = 600.0
+# 脱靶距离变化超过该值才发出 UPDATED 告警
+UPDATE_MISS_KM = 0.1
+# 每批计算的 (物体对 × 时间步) 上限，控制 (T, P, 3) 数组大小
+PAIR_STEP_BUDGET = 2_000_000
+
+POLL_SECONDS = 30
+WATCHLIST_DB = 'orbitalguard_watchlist.db'
+ALERT_FILE = 'watchlist_alerts.jsonl'
+ELEMENT_EXTRA_COLUMNS = ('rcs_size', 'object_type')
+
+BENCH_ASSETS = 200
+BENCH_CHANGED = 300
+BENCH_CYCLES = 5
+
+# ============================================================
+# 1. Watchlist 表
+# ============================================================
+
+def create_watchlist_table(conn):
+    # 独立文件中无法引用主库 SpaceObjects，不设外键
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS Watchlist (
+            norad_id INTEGER PRIMARY KEY,
+            label TEXT,
+            added_at TEXT
+        )
+    """)
+
+def add_assets(conn, norad_ids, label=None):
+    create_watchlist_table(conn)
+    added_at = datetime.now().isoformat(timespec='seconds')
+    conn.executemany("INSERT OR REPLACE INTO Watchlist VALUES (?, ?, ?)",
+                     [(int(n), label, added_at) for n in norad_ids])
+    conn.commit()
+
+def remove_assets(conn, norad_ids):
+    create_watchlist_table(conn)
+    conn.executemany("DELETE FROM Watchlist WHERE norad_id = ?", [(int(n),) for n in norad_ids])
+    conn.commit()
+
+def load_watchlist(path=WATCHLIST_DB):
+    """读取 Watchlist 文件；文件或表不存在时返回空数组"""
+    if not os.path.exists(path):
+        return np.empty(0, dtype=np.int64)
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'Watchlist'").fetchone()
+        if exists is None:
+            return np.empty(0, dtype=np.int64)
+        return np.array([row[0] for row in conn.execute("SELECT norad_id FROM Watchlist ORDER BY norad_id")],
+                        dtype=np.int64)
+    finally:
+        conn.close()
+
+def _watchlist_identity(path):
+    return file_identity(path) if os.path.exists(path) else None
+
+# ============================================================
+# 2. 物体对筛选
+# ============================================================
+
+def screen_pairs(elements, a, b, start, end, step=STEP_SECONDS, threshold=MISS_THRESHOLD_KM):
+    """只对给定物体对 (elements 下标 a[k], b[k]) 在 [start, end] 内筛选并精化
+
+    各物体在时间网格上只推进一次，物体对距离按下标从位置数组中取出；
+    事件初值取 "最近采样点"（与 conjunction_screening 相同的规则）。
+    """
+    if len(a) == 0 or end <= start:
+        return None
+    radius = cs.screening_radius(threshold, step)
+    objects, local = np.unique(np.concatenate([a, b]), return_inverse=True)
+    la, lb = local[:len(a)], local[len(a):]
+    sub = om.subset(elements, objects)
+    times = np.arange(start, end + step / 2, step)
+    batch_steps = max(1, PAIR_STEP_BUDGET // len(a))
+
+    found_i, found_j, found_t = [], [], []
+    for s in range(0, len(times), batch_steps):
+        batch = times[s:s + batch_steps]
+        r, v = om.propagate(sub, batch[:, None])
+        dr = r[:, lb] - r[:, la]
+        step_idx, pair_idx = np.nonzero(np.einsum('tpk,tpk->tp', dr, dr) < radius**2)
+        if len(pair_idx) == 0:
+            continue
+        dr = dr[step_idx, pair_idx]
+        dv = v[step_idx, lb[pair_idx]] - v[step_idx, la[pair_idx]]
+        tau = -np.einsum('ij,ij->i', dr, dv) / np.maximum(np.einsum('ij,ij->i', dv, dv), 1e-12)
+        nearest = np.abs(tau) <= step / 2 * cs.NEAREST_SAMPLE_TOLERANCE
+        found_i.append(a[pair_idx[nearest]])
+        found_j.append(b[pair_idx[nearest]])
+        found_t.append(batch[step_idx[nearest]] + tau[nearest])
+
+    if not found_i:
+        return None
+    return cs.refine_events(elements, np.concatenate(found_i), np.concatenate(found_j),
+                            np.concatenate(found_t), start, end, step, threshold)
+
+def candidate_mask(perigee, apogee, asset_perigee, asset_apogee, threshold=MISS_THRESHOLD_KM):
+    """高度区间重叠筛选：区间不相交的物体对任何时刻距离都大于阈值"""
+    pad = threshold + CANDIDATE_PAD_KM
+    return (perigee - pad <= asset_apogee) & (apogee + pad >= asset_perigee)
+
+# ============================================================
+# 3. 增量监视
+# ============================================================
+
+class AlertSink:
+    """告警输出：追加写入 JSON Lines 文件，同时放入进程内队列供调用方消费"""
+
+    def __init__(self, path=ALERT_FILE):
+        self.path = path
+        self.queue = queue.Queue()
+        self.emitted = 0
+
+    def emit(self, alerts):
+        if not alerts:
+            return
+        if self.path:
+            with open(self.path, 'a') as f:
+                for alert in alerts:
+                    f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+        for alert in alerts:
+            self.queue.put(alert)
+        self.emitted += len(alerts)
+
+class WatchlistMonitor:
+    """保存各重点目标的候选集与当前相遇预测，每次导入只更新受影响的物体对
+
+    状态（两次导入之间常驻）：
+        epochs:      norad_id → 上次使用的根数历元
+        candidates:  重点目标 norad_id → 候选物体 norad_id 集合
+        events:      (重点目标, 物体) → [事件字典, ...]（按 TCA 排序）
+    """
+
+    def __init__(self, watchlist, sink=None, horizon_hours=HORIZON_HOURS, step=STEP_SECONDS,
+                 threshold=MISS_THRESHOLD_KM):
+        self.watchlist = set(int(n) for n in watchlist)
+        self.sink = sink if sink is not None else AlertSink(None)
+        self.horizon = horizon_hours * 3600
+        self.step = step
+        self.threshold = threshold
+        self.epochs = {}
+        self.candidates = {}
+        self.events = {}
+        self.window = None
+        self.latencies = []
+
+    def set_watchlist(self, watchlist):
+        """更新重点目标集合（运行中 add / remove 后调用）
+
+        移出的目标：丢弃其候选集与事件，不发 CLEARED 告警；
+        新加入的目标：下一次 process() 时建立候选集并全窗口筛选。
+
+        Returns:
+            集合是否有变化
+        """
+        watchlist = set(int(n) for n in watchlist)
+        if watchlist == self.watchlist:
+            return False
+        self.watchlist = watchlist
+        events = {}
+        for (a, b), found in self.events.items():
+            if a not in watchlist and b not in watchlist:
+                continue
+            # 两个目标互为候选时的方向取决于集合成员，重新规范化
+            key = next(iter(self._canonical([(a, b) if a in watchlist else (b, a)])))
+            events[key] = found
+        self.events = events
+        return True
+
+    # ---------- 变化检测 ----------
+
+    def _changed(self, elements):
+        """→ (根数有更新或新出现的 norad_id 集合, 已移出目录的 norad_id 集合)"""
+        current = dict(zip(elements['norad_id'].tolist(), elements['epoch'].tolist()))
+        changed = {n for n, epoch in current.items() if self.epochs.get(n) != epoch}
+        removed = set(self.epochs) - set(current)
+        self.epochs = current
+        return changed, removed
+
+    def _update_candidates(self, elements, index, changed, removed):
+        """重建变化目标的候选集，并把变化物体加入 / 移出其他目标的候选集
+
+        Returns:
+            需要在整个窗口重新筛选的 (重点目标, 物体) 集合
+        """
+        perigee, apogee = om.perigee_apogee_altitude(elements)
+        norad = elements['norad_id']
+        assets = sorted(n for n in self.watchlist if n in index)
+        rescreen = set()
+
+        for n in set(self.candidates) - set(assets):
+            del self.candidates[n]
+        for asset in assets:
+            k = index[asset]
+            if asset in changed or asset not in self.candidates:
+                mask = candidate_mask(perigee, apogee, perigee[k], apogee[k], self.threshold)
+                mask[k] = False
+                self.candidates[asset] = set(norad[mask].tolist())
+                rescreen.update((asset, n) for n in self.candidates[asset])
+
+        others = np.array(sorted(n for n in changed if n in index and n not in self.watchlist),
+                          dtype=np.int64)
+        if len(others) and assets:
+            rows = np.array([index[n] for n in others])
+            asset_rows = np.array([index[n] for n in assets])
+            # (changed, assets) 高度区间重叠矩阵
+            overlap = candidate_mask(perigee[rows][:, None], apogee[rows][:, None],
+                                     perigee[asset_rows][None, :], apogee[asset_rows][None, :],
+                                     self.threshold)
+            for col, asset in enumerate(assets):
+                if asset in changed:
+                    continue
+                candidates = self.candidates[asset]
+                hits = others[overlap[:, col]].tolist()
+                candidates.difference_update(others[~overlap[:, col]].tolist())
+                candidates.update(hits)
+                rescreen.update((asset, n) for n in hits)
+
+        for asset in assets:
+            self.candidates[asset] -= removed
+        return rescreen
+
+    # ---------- 筛选 ----------
+
+    def _pair_arrays(self, pairs, index):
+        # 两个重点目标互为候选时只保留一个方向
+        unique = {(a, b) for a, b in pairs if not (b in self.watchlist and b < a)}
+        ordered = sorted(unique)
+        a = np.array([index[p[0]] for p in ordered], dtype=np.int64)
+        b = np.array([index[p[1]] for p in ordered], dtype=np.int64)
+        return a, b
+
+    def _screen(self, elements, index, pairs, start, end):
+        """→ {(重点目标, 物体): [事件, ...]}"""
+        a, b = self._pair_arrays(pairs, index)
+        results = screen_pairs(elements, a, b, start, end, self.step, self.threshold)
+        found = {}
+        if results is None:
+            return found
+        for k in np.argsort(results['tca'], kind='stable'):
+            pc = float(results['pc'][k])
+            key = (int(results['object1_id'][k]), int(results['object2_id'][k]))
+            found.setdefault(key, []).append({
+                'tca': float(results['tca'][k]),
+                'miss_distance_km': float(results['miss_distance_km'][k]),
+                'relative_velocity_km_s': float(results['relative_velocity_km_s'][k]),
+                'pc': pc,
+                'risk_level': cp.risk_level(pc),
+            })
+        return found
+
+    def _canonical(self, pairs):
+        return {(a, b) if not (b in self.watchlist and b < a) else (b, a) for a, b in pairs}
+
+    # ---------- 告警 ----------
+
+    def _alert(self, kind, key, event, previous, ingest_time):
+        alert = {'type': kind, 'asset_id': key[0], 'object_id': key[1],
+                 'tca': om.unix_to_iso((event or previous)['tca'])[:23]}
+        if event is not None:
+            alert.update({k: event[k] for k in ('miss_distance_km', 'relative_velocity_km_s',
+                                                 'pc', 'risk_level')})
+        if previous is not None:
+            alert['previous_miss_km'] = previous['miss_distance_km']
+            alert['previous_risk_level'] = previous['risk_level']
+        if ingest_time is not None:
+            alert['latency_s'] = round(time.time() - ingest_time, 3)
+        return alert
+
+    def _diff(self, key, old, new, ingest_time):
+        """同一物体对新旧事件列表按 TCA 就近匹配，生成告警"""
+        alerts, matched = [], set()
+        for event in new:
+            previous = None
+            for k, candidate in enumerate(old):
+                if k not in matched and abs(candidate['tca'] - event['tca']) <= MATCH_WINDOW_SECONDS:
+                    previous = candidate
+                    matched.add(k)
+                    break
+            if previous is None:
+                alerts.append(self._alert('NEW', key, event, None, ingest_time))
+            elif (abs(event['miss_distance_km'] - previous['miss_distance_km']) > UPDATE_MISS_KM
+                  or event['risk_level'] != previous['risk_level']):
+                alerts.append(self._alert('UPDATED', key, event, previous, ingest_time))
+        for k, previous in enumerate(old):
+            if k not in matched:
+                alerts.append(self._alert('CLEARED', key, None, previous, ingest_time))
+        return alerts
+
+    # ---------- 一次导入 ----------
+
+    def process(self, elements, ingest_time=None):
+        """处理一次导入后的目录，返回本次输出的告警列表
+
+        Args:
+            elements: om.load_elements 的结果（需包含 rcs_size 列）
+            ingest_time: 导入完成时刻 (UNIX 秒)，用于计算导入 → 告警延迟
+        """
+        t = time.perf_counter()
+        index = dict(zip(elements['norad_id'].tolist(), range(len(elements['norad_id']))))
+        changed, removed = self._changed(elements)
+        rescreen = self._canonical(self._update_candidates(elements, index, changed, removed))
+
+        start = float(elements['epoch'].max())
+        end = start + self.horizon
+        warm = self._canonical((asset, n) for asset, cands in self.candidates.items() for n in cands)
+        tail = set()
+        if self.window is None or start >= self.window[1]:
+            rescreen = warm
+        elif end > self.window[1]:
+            # 窗口前移：未变化的物体对只补算新增时间段
+            tail = warm - rescreen
+        tail_start = self.window[1] if self.window is not None else end
+        self.window = (start, end)
+
+        found = self._screen(elements, index, rescreen, start, end)
+        found_tail = self._screen(elements, index, tail, tail_start, end)
+
+        alerts = []
+        stale = [key for key in self.events if key not in warm]
+        for key in stale:
+            # 物体对不再是候选（物体陨落或高度区间不再重叠）
+            alerts.extend(self._diff(key, self.events.pop(key), [], ingest_time))
+        for key in rescreen:
+            old = [e for e in self.events.get(key, []) if e['tca'] >= start]
+            new = found.get(key, [])
+            alerts.extend(self._diff(key, old, new, ingest_time))
+            self._store(key, new)
+        for key in set(self.events) - rescreen:
+            kept = [e for e in self.events[key] if e['tca'] >= start]
+            added = [e for e in found_tail.get(key, [])
+                     if all(abs(e['tca'] - k['tca']) > MATCH_WINDOW_SECONDS for k in kept)]
+            alerts.extend(self._alert('NEW', key, e, None, ingest_time) for e in added)
+            self._store(key, sorted(kept + added, key=lambda e: e['tca']))
+        for key in set(found_tail) - set(self.events):
+            alerts.extend(self._alert('NEW', key, e, None, ingest_time) for e in found_tail[key])
+            self._store(key, found_tail[key])
+
+        self.sink.emit(alerts)
+        if ingest_time is not None:
+            self.latencies.append(time.time() - ingest_time)
+        self.last_cycle = {
+            'changed': len(changed), 'removed': len(removed),
+            'assets': len(self.candidates),
+            'warm_pairs': len(warm), 'rescreened_pairs': len(rescreen), 'tail_pairs': len(tail),
+            'alerts': len(alerts), 'seconds': time.perf_counter() - t,
+        }
+        return alerts
+
+    def _store(self, key, events):
+        if events:
+            self.events[key] = events
+        else:
+            self.events.pop(key, None)
+
+    def latency_summary(self):
+        if not self.latencies:
+            return None
+        lat = np.array(self.latencies)
+        return {'cycles': len(lat), 'p50_s': float(np.percentile(lat, 50)),
+                'p95_s': float(np.percentile(lat, 95)), 'max_s': float(lat.max())}
+
+# ============================================================
+# 4. 常驻运行
+# ============================================================
+
+def _print_cycle(monitor, load_seconds):
+    c = monitor.last_cycle
+    print(f"   变化 {c['changed']:,} 个 / 移出 {c['removed']:,} 个, 重点目标 {c['assets']:,} 个, "
+          f"候选对 {c['warm_pairs']:,} (重算 {c['rescreened_pairs']:,}, 补算 {c['tail_pairs']:,}), "
+          f"告警 {c['alerts']:,} 条, 读取 {load_seconds:.2f} 秒 + 筛选 {c['seconds']:.2f} 秒")
+
+def _print_alerts(alerts, limit=10):
+    for alert in alerts[:limit]:
+        miss = alert.get('miss_distance_km', alert.get('previous_miss_km'))
+        print(f"   {alert['type']:8s} {alert['asset_id']:>6d} × {alert['object_id']:<6d} "
+              f"{alert['tca'][:19]}  {miss:6.3f} km  {alert.get('risk_level', '')}")
+    if len(alerts) > limit:
+        print(f"   ... 另有 {len(alerts) - limit:,} 条")
+
+def run(db_path, alert_path, interval=POLL_SECONDS, once=False, horizon_hours=HORIZON_HOURS,
+        step=STEP_SECONDS, threshold=MISS_THRESHOLD_KM, watchlist_path=WATCHLIST_DB):
+    """轮询数据库与 Watchlist 文件标识；每检测到一次导入（或数据库被原子替换）、
+    或 Watchlist 被修改，重新读取 Watchlist 并处理一次
+
+    导入 → 告警延迟只在数据库文件本身变化时记录：仅 Watchlist 变化的周期不计；
+    启动后的首个周期只有数据库在监视器启动之后写入才计（否则测到的是文件的年龄）
+    """
+    sink = AlertSink(alert_path)
+    monitor = None
+    identity = None
+    started_at = time.time()
+    try:
+        while True:
+            current = (file_identity(db_path), _watchlist_identity(watchlist_path))
+            if current != identity:
+                db_changed = identity is None or current[0] != identity[0]
+                first = identity is None
+                identity = current
+                ingest_time = os.stat(db_path).st_mtime if db_changed else None
+                if first and ingest_time is not None and ingest_time < started_at:
+                    ingest_time = None
+                t = time.perf_counter()
+                watchlist = load_watchlist(watchlist_path)
+                conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+                try:
+                    elements = om.load_elements(conn, extra_columns=ELEMENT_EXTRA_COLUMNS)
+                finally:
+                    conn.close()
+                load_seconds = time.perf_counter() - t
+                if monitor is None:
+                    if len(watchlist) == 0:
+                        print("⚠️  Watchlist 为空，请先运行: python watchlist_monitor.py add <norad_id> ...")
+                        return
+                    monitor = WatchlistMonitor(watchlist, sink, horizon_hours, step, threshold)
+                    print(f"📋 重点目标: {len(watchlist):,} 个")
+                elif monitor.set_watchlist(watchlist):
+                    print(f"📋 Watchlist 已更新: {len(watchlist):,} 个重点目标")
+
+                reason = "首次载入" if first else ("检测到导入" if db_changed else "Watchlist 变化")
+                print(f"\n🔄 {datetime.now().strftime('%H:%M:%S')} {reason}，在轨物体 {len(elements['norad_id']):,} 个")
+                alerts = monitor.process(elements, ingest_time)
+                _print_cycle(monitor, load_seconds)
+                _print_alerts(alerts)
+                if ingest_time is not None:
+                    print(f"   导入 → 告警延迟 {monitor.latencies[-1]:.2f} 秒")
+            if once:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n⏹️  停止监视")
+
+    summary = monitor.latency_summary() if monitor else None
+    if summary:
+        print(f"📊 {summary['cycles']} 次导入, 延迟 p50 {summary['p50_s']:.2f} 秒, "
+              f"p95 {summary['p95_s']:.2f} 秒, 最大 {summary['max_s']:.2f} 秒")
+    if alert_path and sink.emitted:
+        print(f"📁 告警共 {sink.emitted:,} 条 → {alert_path}")
+
+# ============================================================
+# 5. 基准测试
+# ============================================================
+
+def _simulate_ingest(elements, rng, n_changed):
+    """模拟一次导入：随机物体获得新历元的根数（历元 +1 小时，平近点角与半长轴略有变化）"""
+    updated = {k: v.copy() for k, v in elements.items()}
+    rows = rng.choice(len(updated['norad_id']), size=min(n_changed, len(updated['norad_id'])), replace=False)
+    dt = 3600.0
+    n_rad = updated['mean_motion'][rows] * om.TWO_PI / om.SECONDS_PER_DAY
+    updated['mean_anomaly'][rows] = np.degrees(np.radians(updated['mean_anomaly'][rows]) + n_rad * dt) % 360
+    updated['mean_motion'][rows] *= 1 + rng.normal(0, 2e-5, len(rows))
+    updated['epoch'][rows] += dt
+    return updated
+
+def run_benchmark(elements, n_assets=BENCH_ASSETS, n_changed=BENCH_CHANGED, cycles=BENCH_CYCLES,
+                  horizon_hours=HORIZON_HOURS, step=STEP_SECONDS, seed=7):
+    print_header(f"基准测试: 增量监视 vs 每次全量重算 ({n_assets} 个重点目标, 每次导入 {n_changed} 个变化)")
+    rng = np.random.default_rng(seed)
+    payload = np.flatnonzero(elements['object_type'] == 'PAYLOAD')
+    pool = payload if len(payload) >= n_assets else np.arange(len(elements['norad_id']))
+    watchlist = elements['norad_id'][rng.choice(pool, size=min(n_assets, len(pool)), replace=False)]
+
+    warm = WatchlistMonitor(watchlist, horizon_hours=horizon_hours, step=step)
+    t = time.perf_counter()
+    warm.process(elements, time.time())
+    print(f"   首次筛选（建立候选集）: {time.perf_counter() - t:.2f} 秒, "
+          f"候选对 {warm.last_cycle['warm_pairs']:,}, 事件 {sum(map(len, warm.events.values())):,}")
+
+    warm_times, cold_times = [], []
+    for cycle in range(cycles):
+        elements = _simulate_ingest(elements, rng, n_changed)
+        warm.process(elements, time.time())
+        warm_times.append(warm.last_cycle['seconds'])
+
+        cold = WatchlistMonitor(watchlist, horizon_hours=horizon_hours, step=step)
+        cold.process(elements, time.time())
+        cold_times.append(cold.last_cycle['seconds'])
+
+        same = '✅ 一致' if _event_sets_match(warm.events, cold.events) else '⚠️ 不一致'
+        c = warm.last_cycle
+        print(f"   导入 {cycle + 1}: 增量 {warm_times[-1]:6.2f} 秒 (重算 {c['rescreened_pairs']:,} + "
+              f"补算 {c['tail_pairs']:,} 对, 告警 {c['alerts']:,})  全量 {cold_times[-1]:6.2f} 秒  {same}")
+
+    summary = warm.latency_summary()
+    print(f"   平均: 增量 {np.mean(warm_times):.2f} 秒, 全量 {np.mean(cold_times):.2f} 秒, "
+          f"加速 {np.mean(cold_times) / np.mean(warm_times):.1f}×")
+    print(f"   导入 → 告警延迟 p50 {summary['p50_s']:.2f} 秒, p95 {summary['p95_s']:.2f} 秒")
+
+def _event_sets_match(a, b):
+    """增量结果与全量重算的事件一致（按物体对与 TCA 匹配，容差一个步长）"""
+    if set(a) != set(b):
+        return False
+    for key, events in a.items():
+        other = b[key]
+        if len(events) != len(other):
+            return False
+        for x, y in zip(events, other):
+            if abs(x['tca'] - y['tca']) > STEP_SECONDS or abs(x['miss_distance_km'] - y['miss_distance_km']) > 1e-3:
+                return False
+    return True
+
+# ============================================================
+# 主函数
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="OrbitalGuard 重点目标增量监视")
+    parser.add_argument('--db', default=DB_NAME)
+    parser.add_argument('--watchlist', default=WATCHLIST_DB, help="Watchlist 文件")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('add', help="加入 Watchlist")
+    p.add_argument('norad_ids', nargs='+', type=int)
+    p.add_argument('--label')
+    p = sub.add_parser('remove', help="移出 Watchlist")
+    p.add_argument('norad_ids', nargs='+', type=int)
+    sub.add_parser('list', help="列出 Watchlist")
+
+    p = sub.add_parser('run', help="常驻监视")
+    p.add_argument('--interval', type=float, default=POLL_SECONDS, help="轮询间隔 (秒)")
+    p.add_argument('--alerts', default=ALERT_FILE, help="告警输出文件 (JSON Lines)")
+    p.add_argument('--once', action='store_true', help="只处理当前数据库一次")
+    p.add_argument('--hours', type=float, default=HORIZON_HOURS, help="筛选窗口 (小时)")
+    p.add_argument('--step', type=float, default=STEP_SECONDS, help="采样步长 (秒)")
+    p.add_argument('--threshold', type=float, default=MISS_THRESHOLD_KM, help="脱靶距离阈值 (km)")
+
+    p = sub.add_parser('bench', help="增量 vs 全量重算")
+    p.add_argument('--assets', type=int, default=BENCH_ASSETS)
+    p.add_argument('--changed', type=int, default=BENCH_CHANGED)
+    p.add_argument('--cycles', type=int, default=BENCH_CYCLES)
+    p.add_argument('--hours', type=float, default=HORIZON_HOURS)
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 OrbitalGuard - 重点目标增量监视")
+    print("="*70)
+
+    if args.command == 'run':
+        run(args.db, args.alerts, args.interval, args.once, args.hours, args.step, args.threshold,
+            args.watchlist)
+        return
+
+    if args.command == 'bench':
+        conn = sqlite3.connect(args.db)
+        try:
+            elements = om.load_elements(conn, extra_columns=ELEMENT_EXTRA_COLUMNS)
+        finally:
+            conn.close()
+        print(f"📊 在轨物体: {len(elements['norad_id']):,} 个")
+        run_benchmark(elements, args.assets, args.changed, args.cycles, args.hours)
+        return
+
+    conn = sqlite3.connect(args.watchlist)
+    try:
+        if args.command == 'add':
+            add_assets(conn, args.norad_ids, args.label)
+            print(f"✅ 加入 {len(args.norad_ids)} 个目标")
+        elif args.command == 'remove':
+            remove_assets(conn, args.norad_ids)
+            print(f"✅ 移出 {len(args.norad_ids)} 个目标")
+        elif args.command == 'list':
+            create_watchlist_table(conn)
+            conn.execute("ATTACH DATABASE ? AS catalog", (args.db,))
+            rows = conn.execute("""
+                SELECT w.norad_id, s.object_name, w.label, w.added_at, s.decay_date
+                FROM Watchlist w LEFT JOIN catalog.SpaceObjects s ON s.norad_id = w.norad_id
+                ORDER BY w.norad_id
+            """).fetchall()
+            print_header(f"Watchlist: {len(rows)} 个目标")
+            for norad_id, name, label, added_at, decay in rows:
+                status = '已陨落' if decay else '在轨'
+                print(f"   {norad_id:>6d}  {str(name)[:24]:24s} {label or '':16s} {status:4s} {added_at}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()